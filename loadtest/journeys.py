@@ -0,0 +1,153 @@
+"""
+What each role does with the API, shared by ``locustfile.py`` and ``test_load.py``.
+
+A journey takes a client with the interface of ``requests.Session`` whose
+methods also accept the ``name`` a request is reported under, and the user's
+entry from the tokens file written by ``manage.py seed_load_test``.
+"""
+
+import random
+from datetime import datetime, timedelta, timezone
+
+# Pages an auditor reads per export
+EXPORT_PAGES = 5
+
+
+def results(response):
+    if response.status_code != 200:
+        return []
+    return response.json().get("results", [])
+
+
+def pick(client, path, name, params=None):
+    """Return a random item from one page of a list endpoint, or None."""
+    items = results(client.get(path, params=params, name=name))
+    return random.choice(items) if items else None
+
+
+def technician(client, user):
+    """Calibrate and service an instrument of the technician's department."""
+    instrument = pick(
+        client,
+        "/api/instruments/",
+        "instruments by department",
+        {"department": user["department"]},
+    )
+    if instrument is None:
+        return
+    client.get(f"/api/instruments/{instrument['id']}/", name="instrument")
+    client.get(
+        "/api/calibration-records/",
+        params={"instrument": instrument["id"]},
+        name="calibration records by instrument",
+    )
+    now = datetime.now(timezone.utc)
+    client.post(
+        "/api/calibration-records/",
+        json={
+            "instrument": instrument["id"],
+            "calibration_type": "routine",
+            "status": "in_progress",
+            "description": "Load test calibration",
+            "date_performed": now.isoformat(),
+            "next_calibration_date": (now + timedelta(days=365)).isoformat(),
+        },
+        name="log calibration",
+    )
+    client.post(
+        "/api/maintenance/",
+        json={
+            "instrument": instrument["id"],
+            "performed_by": user["id"],
+            "maintenance_type": "preventive",
+            "status": "in_progress",
+            "description": "Load test maintenance",
+            "start_date": now.isoformat(),
+        },
+        name="log maintenance",
+    )
+
+
+def auditor(client, user):
+    """Export this year's calibrations and the approved certificates."""
+    start = datetime.now(timezone.utc).replace(
+        month=1, day=1, hour=0, minute=0, second=0, microsecond=0
+    )
+    exports = [
+        ("/api/calibration-records/", {"created_at__gte": start.isoformat()}),
+        ("/api/calibration-certificates/", {}),
+        ("/api/maintenance/", {"created_at__gte": start.isoformat()}),
+    ]
+    for path, params in exports:
+        for page in range(1, EXPORT_PAGES + 1):
+            response = client.get(
+                path, params={**params, "page": page}, name=f"export {path}"
+            )
+            if response.status_code != 200 or not response.json().get("next"):
+                break
+
+
+def manager(client, user):
+    """Go through the department's reviews and request a new one."""
+    client.get("/api/reviews/", params={"status": "pending"}, name="pending reviews")
+    review = pick(client, "/api/reviews/", "reviews")
+    if review is not None:
+        client.get(f"/api/reviews/{review['id']}/", name="review")
+    instrument = pick(
+        client,
+        "/api/instruments/",
+        "instruments by department",
+        {"department": user["department"]},
+    )
+    if instrument is not None:
+        client.post(
+            "/api/reviews/",
+            json={
+                "instrument": instrument["id"],
+                "requested_by": user["id"],
+                "reason": "Load test review",
+                "priority": random.choice(["low", "medium", "high"]),
+            },
+            name="request review",
+        )
+    client.get(
+        "/api/maintenance/", params={"status": "in_progress"}, name="open maintenance"
+    )
+
+
+def researcher(client, user):
+    """Browse instruments and the certificates behind them."""
+    instrument = pick(
+        client,
+        "/api/instruments/",
+        "instruments by category",
+        {"category": random.choice(["measurement", "testing", "analysis"])},
+    )
+    if instrument is not None:
+        client.get(f"/api/instruments/{instrument['id']}/", name="instrument")
+    client.get("/api/calibration-certificates/", name="certificates")
+
+
+def admin(client, user):
+    """Check the reference data and accounts."""
+    client.get("/api/sites/", name="sites")
+    client.get("/api/locations/", name="locations")
+    client.get("/api/users/", name="users")
+
+
+JOURNEYS = {
+    "technician": technician,
+    "auditor": auditor,
+    "manager": manager,
+    "researcher": researcher,
+    "admin": admin,
+}
+
+# Relative number of simulated users of each role
+WEIGHTS = {
+    "technician": 4,
+    "researcher": 3,
+    "manager": 2,
+    "auditor": 1,
+    "admin": 1,
+}
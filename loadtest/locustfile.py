@@ -0,0 +1,66 @@
+"""
+Locust load test of the API, one user class per role.
+
+Seed the database and write tokens, then run against a deployment::
+
+    python manage.py seed_load_test --tokens loadtest/tokens.json
+    locust -f loadtest/locustfile.py --host http://localhost:8000
+
+``LOAD_TEST_TOKENS`` overrides the path of the tokens file.
+"""
+
+import itertools
+import json
+import os
+
+from locust import HttpUser, between, task
+
+from journeys import JOURNEYS, WEIGHTS
+
+with open(os.environ.get("LOAD_TEST_TOKENS", "loadtest/tokens.json")) as f:
+    _tokens = json.load(f)
+
+# Simulated users take the accounts of their role in turn
+ACCOUNTS = {
+    role: itertools.cycle([account for account in _tokens if account["role"] == role])
+    for role in JOURNEYS
+}
+
+
+class RoleUser(HttpUser):
+    abstract = True
+    wait_time = between(1, 3)
+    role = None
+
+    def on_start(self):
+        self.account = next(ACCOUNTS[self.role])
+        self.client.headers["Authorization"] = f"Bearer {self.account['token']}"
+
+    @task
+    def journey(self):
+        JOURNEYS[self.role](self.client, self.account)
+
+
+class Technician(RoleUser):
+    role = "technician"
+    weight = WEIGHTS[role]
+
+
+class Auditor(RoleUser):
+    role = "auditor"
+    weight = WEIGHTS[role]
+
+
+class Manager(RoleUser):
+    role = "manager"
+    weight = WEIGHTS[role]
+
+
+class Researcher(RoleUser):
+    role = "researcher"
+    weight = WEIGHTS[role]
+
+
+class Admin(RoleUser):
+    role = "admin"
+    weight = WEIGHTS[role]
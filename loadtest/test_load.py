@@ -0,0 +1,147 @@
+"""
+Run the role journeys against a deployment and check latency percentiles.
+
+    LOAD_TEST_URL=http://localhost:8000 pytest loadtest -s
+
+Settings, from the environment:
+
+- ``LOAD_TEST_TOKENS``: tokens file written by ``seed_load_test``
+  (``loadtest/tokens.json``);
+- ``LOAD_TEST_USERS``: simulated users per unit of role weight (2);
+- ``LOAD_TEST_SECONDS``: duration of the run (60);
+- ``LOAD_TEST_P95_MS``: highest acceptable 95th percentile per request (1000);
+- ``LOAD_TEST_REPORT``: path of a CSV copy of the report.
+"""
+
+import csv
+import itertools
+import json
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import requests
+
+from journeys import JOURNEYS, WEIGHTS
+
+pytestmark = pytest.mark.skipif(
+    not os.environ.get("LOAD_TEST_URL"), reason="Set LOAD_TEST_URL to run"
+)
+
+
+class Stats:
+    def __init__(self):
+        self.durations = {}
+        self.errors = {}
+        self.lock = threading.Lock()
+
+    def record(self, name, duration, failed):
+        with self.lock:
+            self.durations.setdefault(name, []).append(duration)
+            self.errors[name] = self.errors.get(name, 0) + failed
+
+    def report(self, elapsed):
+        rows = []
+        for name, durations in sorted(self.durations.items()):
+            durations = sorted(durations)
+            rows.append(
+                {
+                    "name": name,
+                    "requests": len(durations),
+                    "rps": round(len(durations) / elapsed, 2),
+                    "p50_ms": percentile(durations, 50),
+                    "p95_ms": percentile(durations, 95),
+                    "p99_ms": percentile(durations, 99),
+                    "errors": self.errors[name],
+                }
+            )
+        return rows
+
+
+def percentile(durations, p):
+    """Nearest-rank percentile of sorted durations, in milliseconds."""
+    index = max(math.ceil(len(durations) * p / 100) - 1, 0)
+    return round(durations[index] * 1000, 1)
+
+
+class TimedSession(requests.Session):
+    """Session recording each request's duration under its name."""
+
+    def __init__(self, base_url, token, stats):
+        super().__init__()
+        self.base_url = base_url.rstrip("/")
+        self.headers["Authorization"] = f"Bearer {token}"
+        self.stats = stats
+
+    def request(self, method, url, name=None, **kwargs):
+        kwargs.setdefault("timeout", 30)
+        started = time.perf_counter()
+        try:
+            response = super().request(method, self.base_url + url, **kwargs)
+        except requests.RequestException:
+            self.stats.record(name or url, time.perf_counter() - started, True)
+            raise
+        self.stats.record(
+            name or url, time.perf_counter() - started, response.status_code >= 400
+        )
+        return response
+
+
+def run_user(base_url, account, stats, deadline):
+    session = TimedSession(base_url, account["token"], stats)
+    journey = JOURNEYS[account["role"]]
+    while time.monotonic() < deadline:
+        try:
+            journey(session, account)
+        except requests.RequestException:
+            pass
+
+
+@pytest.fixture
+def accounts():
+    with open(os.environ.get("LOAD_TEST_TOKENS", "loadtest/tokens.json")) as f:
+        return json.load(f)
+
+
+def test_journeys(accounts):
+    base_url = os.environ["LOAD_TEST_URL"]
+    users_per_weight = int(os.environ.get("LOAD_TEST_USERS", "2"))
+    seconds = int(os.environ.get("LOAD_TEST_SECONDS", "60"))
+    p95_limit = float(os.environ.get("LOAD_TEST_P95_MS", "1000"))
+
+    users = []
+    for role, weight in WEIGHTS.items():
+        role_accounts = [account for account in accounts if account["role"] == role]
+        users.extend(
+            itertools.islice(itertools.cycle(role_accounts), weight * users_per_weight)
+        )
+
+    stats = Stats()
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=len(users)) as pool:
+        for account in users:
+            pool.submit(run_user, base_url, account, stats, started + seconds)
+    rows = stats.report(time.monotonic() - started)
+
+    print()
+    print(
+        f"{'request':40} {'count':>7} {'rps':>7} {'p50':>8} {'p95':>8} {'p99':>8} {'err':>5}"
+    )
+    for row in rows:
+        print(
+            f"{row['name']:40} {row['requests']:7} {row['rps']:7} "
+            f"{row['p50_ms']:8} {row['p95_ms']:8} {row['p99_ms']:8} {row['errors']:5}"
+        )
+    if os.environ.get("LOAD_TEST_REPORT"):
+        with open(os.environ["LOAD_TEST_REPORT"], "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+
+    assert rows, "No requests were made"
+    for row in rows:
+        assert row["errors"] <= row["requests"] * 0.01, f"{row['name']} failed"
+        assert row["p95_ms"] <= p95_limit, f"{row['name']} is too slow"
@@ -8,6 +8,7 @@ setup(
     install_requires=[
         "Django>=4.2.0",
         "djangorestframework>=3.14.0",
+        "orjson>=3.8.0",
         "django-cors-headers>=4.3.0",
         "django-filter>=23.2",
         "psycopg2-binary>=2.9.6",
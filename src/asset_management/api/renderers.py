@@ -0,0 +1,58 @@
+"""
+Fast JSON rendering for the REST API.
+
+``ORJSONRenderer`` is a drop-in replacement for DRF's ``JSONRenderer`` that
+encodes with orjson. Types orjson does not handle natively (``Decimal``,
+``timedelta``, lazy translation strings, querysets) are passed through DRF's
+own encoder, so they are written as by the stock renderer. Floats are the
+exception: orjson writes the shortest form without an exponent sign, such as
+``0.00001`` and ``1e16`` where the stock renderer writes ``1e-05`` and
+``1e+16``, which parse to the same values. Without orjson installed, with
+settings orjson cannot honour, or for data it cannot encode, such as integers
+wider than 64 bits in a JSON field, it defers to the stock renderer.
+"""
+
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    Renderer which serializes to JSON using orjson.
+
+    orjson only indents by two spaces, so any requested indent (such as the
+    browsable API's) is rendered with two. Unlike ``STRICT_JSON`` in the stock
+    renderer, NaN and infinite floats are written as ``null`` rather than
+    raising.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        if data is None:
+            return b""
+
+        renderer_context = renderer_context or {}
+        option = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+        if self.get_indent(accepted_media_type, renderer_context):
+            option |= orjson.OPT_INDENT_2
+
+        try:
+            ret = orjson.dumps(
+                data, default=self.encoder_class().default, option=option
+            )
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Escape U+2028 and U+2029 like JSONRenderer, keeping the output a
+        # strict javascript subset
+        if b"\xe2\x80\xa8" in ret or b"\xe2\x80\xa9" in ret:
+            ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+                b"\xe2\x80\xa9", b"\\u2029"
+            )
+        return ret
@@ -1,9 +1,13 @@
 from rest_framework import serializers
 from django.utils.dateparse import parse_datetime
 from asset_management.assets.models import (
+    AuditEvent,
     Location,
     Department,
     Instrument,
+    InstrumentCapability,
+    InstrumentHistory,
+    InstrumentTransfer,
     MaintenanceRecord,
     CalibrationRecord,
     CalibrationCertificate,
@@ -64,6 +68,94 @@ class InstrumentSerializer(serializers.ModelSerializer):
         fields = "__all__"
 
 
+class NearestInstrumentsSerializer(serializers.Serializer):
+    """The query of a nearest-instrument search."""
+
+    latitude = serializers.FloatField(min_value=-90, max_value=90)
+    longitude = serializers.FloatField(min_value=-180, max_value=180)
+    sensor_type = serializers.ListField(
+        child=serializers.IntegerField(), required=False
+    )
+    calibrated = serializers.BooleanField(required=False, default=False)
+    max_distance_km = serializers.FloatField(min_value=0, required=False)
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=10)
+
+
+class CapabilitySearchSerializer(serializers.Serializer):
+    """The query of a capability search."""
+
+    unit = serializers.CharField(max_length=20)
+    range_min = serializers.DecimalField(
+        max_digits=10, decimal_places=3, required=False
+    )
+    range_max = serializers.DecimalField(
+        max_digits=10, decimal_places=3, required=False
+    )
+    max_accuracy = serializers.DecimalField(
+        max_digits=5, decimal_places=2, required=False
+    )
+    max_resolution = serializers.DecimalField(
+        max_digits=10, decimal_places=3, required=False
+    )
+    status = serializers.ChoiceField(Instrument.STATUS_CHOICES, required=False)
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=20)
+
+    def validate(self, data):
+        # A single bound is a point to measure
+        low = data.setdefault("range_min", data.get("range_max"))
+        high = data.setdefault("range_max", low)
+        if low is not None and low > high:
+            raise serializers.ValidationError(
+                "range_min must not be greater than range_max"
+            )
+        return data
+
+
+class InstrumentCapabilitySerializer(serializers.ModelSerializer):
+    instrument_name = serializers.CharField(source="instrument.name")
+    serial_number = serializers.CharField(source="instrument.serial_number")
+    status = serializers.CharField(source="instrument.status")
+
+    class Meta:
+        model = InstrumentCapability
+        fields = "__all__"
+
+
+class AuditEventSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = AuditEvent
+        fields = "__all__"
+
+
+class InstrumentHistorySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = InstrumentHistory
+        fields = "__all__"
+
+
+class InstrumentTransferSerializer(serializers.ModelSerializer):
+    """
+    A bulk move of instruments. ``instruments`` optionally lists the ids to
+    move among those matching the request's filters.
+    """
+
+    instruments = serializers.ListField(
+        child=serializers.IntegerField(), write_only=True, required=False
+    )
+
+    class Meta:
+        model = InstrumentTransfer
+        fields = "__all__"
+        read_only_fields = ("moved", "instrument_count", "transferred_by")
+
+    def validate(self, data):
+        if not data.get("location") and not data.get("department"):
+            raise serializers.ValidationError(
+                "Give the location or department to move the instruments to"
+            )
+        return data
+
+
 class MaintenanceRecordSerializer(serializers.ModelSerializer):
     class Meta:
         model = MaintenanceRecord
@@ -1,6 +1,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
+    AuditEventViewSet,
     LocationViewSet,
     DepartmentViewSet,
     InstrumentViewSet,
@@ -10,7 +11,13 @@ from .views import (
     HealthCheckViewSet,
     ReviewViewSet,
 )
-from asset_management.assets.views import CalibrationCertificateViewSet, SiteViewSet
+from asset_management.assets.views import (
+    ArchivedRecordViewSet,
+    AssetImportView,
+    CalibrationCertificateViewSet,
+    EventStreamView,
+    SiteViewSet,
+)
 
 router = DefaultRouter()
 router.register(r"locations", LocationViewSet)
@@ -23,7 +30,11 @@ router.register(r"health", HealthCheckViewSet, basename="health")
 router.register(r"reviews", ReviewViewSet)
 router.register(r"calibration-certificates", CalibrationCertificateViewSet)
 router.register(r"sites", SiteViewSet)
+router.register(r"archive", ArchivedRecordViewSet)
+router.register(r"audit-events", AuditEventViewSet)
 
 urlpatterns = [
     path("", include(router.urls)),
+    path("events/", EventStreamView.as_view(), name="event_stream"),
+    path("imports/<str:kind>/", AssetImportView.as_view(), name="asset_import"),
 ]
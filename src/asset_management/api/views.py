@@ -1,21 +1,34 @@
 from rest_framework import viewsets, permissions
 from rest_framework.decorators import action, api_view
+from rest_framework.exceptions import ValidationError
+from rest_framework.generics import get_object_or_404
 from rest_framework.response import Response
 from django_filters import rest_framework as filters
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from asset_management.assets.models import (
+    AuditEvent,
     Location,
     Department,
     Instrument,
+    InstrumentCapability,
+    InstrumentHistory,
     MaintenanceRecord,
     CalibrationRecord,
     Review,
 )
 from django.contrib.auth import get_user_model
 from .serializers import (
+    AuditEventSerializer,
+    CapabilitySearchSerializer,
     LocationSerializer,
     DepartmentSerializer,
     InstrumentSerializer,
+    InstrumentCapabilitySerializer,
+    InstrumentHistorySerializer,
+    InstrumentTransferSerializer,
     MaintenanceRecordSerializer,
+    NearestInstrumentsSerializer,
     CalibrationRecordSerializer,
     UserSerializer,
     ReviewSerializer,
@@ -26,7 +39,15 @@ from .permissions import (
     IsAuditor,
 )
 from rest_framework import status
-from asset_management.assets.services import TicketService
+from asset_management.assets.services import (
+    InstrumentTransferService,
+    ReviewWorkflowService,
+    TicketService,
+)
+from asset_management.assets.conditional import ConditionalViewSetMixin
+from asset_management.assets.flat_serializers import FlatListMixin, FlatSerializer
+from asset_management.assets import audit, geo
+from asset_management.assets.monitoring import check_database
 
 User = get_user_model()
 
@@ -37,8 +58,27 @@ class HealthCheckViewSet(viewsets.ViewSet):
     def list(self, request):
         return Response({"status": "healthy"})
 
+    @action(detail=False)
+    def ready(self, request):
+        """
+        Readiness probe: fails while the database is unreachable or slower
+        than ``READINESS_DB_TIMEOUT_MS``.
+        """
+        database = check_database()
+        return Response(
+            {
+                "status": "ready" if database.ok else "unavailable",
+                "database": database._asdict(),
+            },
+            status=(
+                status.HTTP_200_OK
+                if database.ok
+                else status.HTTP_503_SERVICE_UNAVAILABLE
+            ),
+        )
+
 
-class LocationViewSet(viewsets.ModelViewSet):
+class LocationViewSet(ConditionalViewSetMixin, viewsets.ModelViewSet):
     queryset = Location.objects.all()
     serializer_class = LocationSerializer
     permission_classes = [permissions.IsAuthenticated & (IsAdminOrManager | IsAuditor)]
@@ -46,7 +86,7 @@ class LocationViewSet(viewsets.ModelViewSet):
     filterset_fields = ["building", "room"]
 
 
-class DepartmentViewSet(viewsets.ModelViewSet):
+class DepartmentViewSet(ConditionalViewSetMixin, viewsets.ModelViewSet):
     queryset = Department.objects.all()
     serializer_class = DepartmentSerializer
     permission_classes = [permissions.IsAuthenticated & (IsAdminOrManager | IsAuditor)]
@@ -54,47 +94,181 @@ class DepartmentViewSet(viewsets.ModelViewSet):
     filterset_fields = ["name", "manager"]
 
 
-class InstrumentViewSet(viewsets.ModelViewSet):
+class InstrumentHistoryFilter(filters.FilterSet):
+    class Meta:
+        model = InstrumentHistory
+        fields = ["instrument", "status", "department", "location"]
+
+
+class InstrumentViewSet(ConditionalViewSetMixin, FlatListMixin, viewsets.ModelViewSet):
     queryset = Instrument.objects.all()
     serializer_class = InstrumentSerializer
     permission_classes = [permissions.IsAuthenticated]
+    conditional_related = ("sensor_types", "measurement_types")
     filter_backends = [filters.DjangoFilterBackend]
     filterset_fields = ["status", "category", "department", "location"]
 
     def get_queryset(self):
-        user = self.request.user
-        if user.is_staff or user.role == "auditor":
-            return Instrument.objects.all()
-        elif user.role == "manager":
-            return Instrument.objects.filter(department=user.department)
-        elif user.role in ["technician", "researcher"]:
-            return Instrument.objects.filter(department=user.department)
-        return Instrument.objects.none()
+        return Instrument.objects.visible_to(self.request.user)
 
     def get_permissions(self):
-        if self.action in ["create", "update", "partial_update", "destroy"]:
+        if self.action in ["create", "update", "partial_update", "destroy", "transfer"]:
             permission_classes = [IsAdminOrManager]
         else:
             permission_classes = [permissions.IsAuthenticated]
         return [permission() for permission in permission_classes]
 
+    @action(detail=False, methods=["post"])
+    def transfer(self, request):
+        """
+        Move the instruments matching the query's filters, or those of them
+        listed in ``instruments``, to another location or department at once.
+        """
+        serializer = InstrumentTransferSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        department = data.get("department")
+        if (
+            department is not None
+            and not request.user.is_staff
+            and department.pk != request.user.department_id
+        ):
+            return Response(
+                {"detail": "Only staff can move instruments to another department"},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        instruments = self.filter_queryset(self.get_queryset())
+        if "instruments" in data:
+            instruments = instruments.filter(pk__in=data["instruments"])
+        elif not any(
+            value.strip()
+            for name in self.filterset_fields
+            for value in request.query_params.getlist(name)
+        ):
+            # Empty filters such as ?status= match everything
+            return Response(
+                {"detail": "Select the instruments with a filter or their ids"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
-class MaintenanceRecordViewSet(viewsets.ModelViewSet):
+        with audit.action("transfer"):
+            transfer = InstrumentTransferService().transfer(
+                instruments,
+                request.user,
+                location=data.get("location"),
+                department=department,
+                reason=data.get("reason", ""),
+            )
+        return Response(InstrumentTransferSerializer(transfer).data)
+
+    @action(detail=False)
+    def nearest(self, request):
+        """
+        The instruments nearest to ``latitude`` and ``longitude``, with their
+        distance in km, optionally only those with all the ``sensor_type``
+        ids given, currently ``calibrated``, or within ``max_distance_km``.
+        The list filters, such as ``status``, apply too.
+        """
+        serializer = NearestInstrumentsSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        query = serializer.validated_data
+        instruments = self.filter_queryset(self.get_queryset())
+        for sensor_type in query.get("sensor_type", []):
+            instruments = instruments.filter(sensor_types=sensor_type)
+        if query["calibrated"]:
+            instruments = instruments.filter(
+                summary__next_calibration_date__gt=timezone.now()
+            )
+        found = geo.nearest_instruments(
+            instruments.prefetch_related(*self.conditional_related),
+            query["latitude"],
+            query["longitude"],
+            limit=query["limit"],
+            max_distance_km=query.get("max_distance_km"),
+        )
+        return Response(
+            [
+                {
+                    **InstrumentSerializer(instrument).data,
+                    "distance_km": round(distance, 3),
+                }
+                for distance, instrument in found
+            ]
+        )
+
+    @action(detail=False)
+    def capable(self, request):
+        """
+        The instruments able to measure in ``unit`` over all of ``range_min``
+        to ``range_max``, most accurate first, optionally only those at most
+        ``max_accuracy`` (%) or ``max_resolution`` or with a ``status``.
+        """
+        serializer = CapabilitySearchSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        query = serializer.validated_data
+        capabilities = InstrumentCapability.objects.visible_to(request.user).filter(
+            unit=query["unit"]
+        )
+        if query["range_min"] is not None:
+            capabilities = capabilities.covering(query["range_min"], query["range_max"])
+        if "max_accuracy" in query:
+            capabilities = capabilities.filter(best_accuracy__lte=query["max_accuracy"])
+        if "max_resolution" in query:
+            capabilities = capabilities.filter(resolution__lte=query["max_resolution"])
+        if "status" in query:
+            capabilities = capabilities.filter(instrument__status=query["status"])
+        capabilities = capabilities.select_related("instrument").best(query["limit"])
+        return Response(InstrumentCapabilitySerializer(capabilities, many=True).data)
+
+    @action(detail=False, url_path="as-of")
+    def as_of(self, request):
+        """
+        Where each instrument was, in which department and with which status,
+        at the time given by ``at``. Filters apply to the values of that time.
+        """
+        when = parse_datetime(request.query_params.get("at", ""))
+        if when is None:
+            return Response(
+                {"detail": "Give the time to look at as an ISO 8601 'at'"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if timezone.is_naive(when):
+            when = timezone.make_aware(when)
+        periods = InstrumentHistory.objects.visible_to(request.user).as_of(when)
+        return self.history_page(periods.order_by("instrument"))
+
+    @action(detail=True)
+    def history(self, request, pk=None):
+        """The periods of the instrument's location, department and status."""
+        instrument = get_object_or_404(self.get_queryset(), pk=pk)
+        return self.history_page(instrument.history.order_by("valid_from"))
+
+    def history_page(self, periods):
+        filterset = InstrumentHistoryFilter(
+            self.request.query_params, queryset=periods, request=self.request
+        )
+        if not filterset.is_valid():
+            raise ValidationError(filterset.errors)
+        flat = FlatSerializer(InstrumentHistorySerializer())
+        page = self.paginate_queryset(flat.values(filterset.qs))
+        return self.get_paginated_response(flat.serialize(page))
+
+
+class MaintenanceRecordViewSet(ConditionalViewSetMixin, viewsets.ModelViewSet):
     queryset = MaintenanceRecord.objects.all()
     serializer_class = MaintenanceRecordSerializer
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [filters.DjangoFilterBackend]
-    filterset_fields = ["status", "instrument", "date_scheduled"]
+    filterset_fields = {
+        "status": ["exact"],
+        "instrument": ["exact"],
+        "start_date": ["exact"],
+        "created_at": ["gte", "lt"],
+    }
 
     def get_queryset(self):
-        user = self.request.user
-        if user.is_staff or user.role == "auditor":
-            return MaintenanceRecord.objects.all()
-        elif user.role in ["manager", "technician"]:
-            return MaintenanceRecord.objects.filter(
-                instrument__department=user.department
-            )
-        return MaintenanceRecord.objects.none()
+        return MaintenanceRecord.objects.visible_to(self.request.user)
 
     def get_permissions(self):
         if self.action in ["create", "update", "partial_update"]:
@@ -106,24 +280,27 @@ class MaintenanceRecordViewSet(viewsets.ModelViewSet):
         return [permission() for permission in permission_classes]
 
 
-class CalibrationRecordViewSet(viewsets.ModelViewSet):
+class CalibrationRecordViewSet(
+    ConditionalViewSetMixin, FlatListMixin, viewsets.ModelViewSet
+):
     queryset = CalibrationRecord.objects.all()
     serializer_class = CalibrationRecordSerializer
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [filters.DjangoFilterBackend]
-    filterset_fields = ["status", "calibration_type", "instrument", "date_performed"]
+    filterset_fields = {
+        "status": ["exact"],
+        "calibration_type": ["exact"],
+        "instrument": ["exact"],
+        "date_performed": ["exact"],
+        "created_at": ["gte", "lt"],
+    }
 
     def get_queryset(self):
-        user = self.request.user
         queryset = CalibrationRecord.objects.all()
 
-        # Filter by user's role and department for write operations
+        # Calibration history is readable by everyone; changes are scoped
         if self.action in ["create", "update", "partial_update", "destroy"]:
-            if not user.is_staff and user.role != "auditor":
-                if user.role in ["manager", "technician"]:
-                    queryset = queryset.filter(instrument__department=user.department)
-                else:
-                    queryset = CalibrationRecord.objects.none()
+            queryset = queryset.visible_to(self.request.user)
 
         # Apply search if provided
         search = self.request.query_params.get("search")
@@ -148,7 +325,7 @@ class UserViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAdminUser]
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(ConditionalViewSetMixin, FlatListMixin, viewsets.ModelViewSet):
     queryset = Review.objects.all()
     serializer_class = ReviewSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -156,14 +333,7 @@ class ReviewViewSet(viewsets.ModelViewSet):
     filterset_fields = ["status", "priority", "instrument"]
 
     def get_queryset(self):
-        user = self.request.user
-        if user.is_staff or user.role == "auditor":
-            return Review.objects.all()
-        elif user.role == "manager":
-            return Review.objects.filter(instrument__department=user.department)
-        else:
-            # Regular users can see reviews in their department
-            return Review.objects.filter(instrument__department=user.department)
+        return Review.objects.visible_to(self.request.user)
 
     def get_permissions(self):
         if self.action in ["create"]:
@@ -194,9 +364,8 @@ class ReviewViewSet(viewsets.ModelViewSet):
         }
 
         ticket = ticket_service.create_ticket(review)
-        review.external_ticket_id = ticket["ticket_id"]
-        review.external_ticket_url = ticket["ticket_url"]
-        review.save()
+        with audit.action("create_ticket"):
+            ReviewWorkflowService().attach_ticket(review, ticket)
 
         return Response(
             {
@@ -208,6 +377,26 @@ class ReviewViewSet(viewsets.ModelViewSet):
         )
 
 
+class AuditEventViewSet(FlatListMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    The audit trail, for staff and auditors: the changes to one object with
+    ``object_type`` and ``object_id``, or those made by an ``actor``.
+    """
+
+    queryset = AuditEvent.objects.all()
+    serializer_class = AuditEventSerializer
+    permission_classes = [permissions.IsAdminUser | IsAuditor]
+    filter_backends = [filters.DjangoFilterBackend]
+    filterset_fields = {
+        "object_type": ["exact"],
+        "object_id": ["exact"],
+        "actor": ["exact"],
+        "operation": ["exact"],
+        "action": ["exact"],
+        "created_at": ["gte", "lt"],
+    }
+
+
 @api_view(["GET"])
 def health_check(request):
     """
@@ -1,8 +1,11 @@
 from django.contrib import admin
 from .models import (
+    AuditEvent,
     Location,
     Department,
     Instrument,
+    InstrumentHistory,
+    InstrumentTransfer,
     CalibrationCertificate,
     CalibrationRecord,
     Review,
@@ -11,6 +14,19 @@ from .models import (
     SensorType,
     MeasurementType,
 )
+from .paginators import EstimatedCountPaginator
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """
+    Base admin for tables expected to reach millions of rows.
+
+    Listings are counted with ``EstimatedCountPaginator`` and the second,
+    unfiltered count behind "N total" is skipped.
+    """
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 @admin.register(Site)
@@ -24,7 +40,9 @@ class SiteAdmin(admin.ModelAdmin):
 class LocationAdmin(admin.ModelAdmin):
     list_display = ("name", "building", "room", "site")
     list_filter = ("site", "building")
+    list_select_related = ("site",)
     search_fields = ("name", "building", "room")
+    autocomplete_fields = ("site",)
 
 
 @admin.register(Department)
@@ -50,21 +68,73 @@ class MeasurementTypeAdmin(admin.ModelAdmin):
 
 
 @admin.register(Instrument)
-class InstrumentAdmin(admin.ModelAdmin):
+class InstrumentAdmin(LargeTableAdmin):
     list_display = ("name", "serial_number", "model", "status", "resolution")
-    list_filter = (
-        "status",
-        "department",
-        "location",
-        "sensor_types",
-        "measurement_types",
+    # Locations can number in the thousands, so they are narrowed down by site
+    # and found through search rather than listed as filter options. Sensor
+    # and measurement types are not filters at all: each would list every
+    # type and filter through a join needing DISTINCT over the whole table.
+    list_filter = ("status", "department", "location__site")
+    search_fields = (
+        "name",
+        "serial_number",
+        "model",
+        "manufacturer",
+        "location__name",
     )
-    search_fields = ("name", "serial_number", "model", "manufacturer")
+    autocomplete_fields = ("location", "department")
     filter_horizontal = ("sensor_types", "measurement_types")
 
 
+@admin.register(AuditEvent)
+class AuditEventAdmin(LargeTableAdmin):
+    list_display = (
+        "created_at",
+        "object_type",
+        "object_id",
+        "operation",
+        "action",
+        "actor",
+    )
+    list_filter = ("object_type", "operation")
+    list_select_related = ("actor",)
+    date_hierarchy = "created_at"
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(InstrumentHistory)
+class InstrumentHistoryAdmin(LargeTableAdmin):
+    list_display = ("instrument", "valid_from", "valid_to", "location", "status")
+    list_filter = ("status",)
+    list_select_related = ("instrument", "location")
+    raw_id_fields = ("instrument",)
+    date_hierarchy = "valid_from"
+
+
+@admin.register(InstrumentTransfer)
+class InstrumentTransferAdmin(admin.ModelAdmin):
+    list_display = (
+        "created_at",
+        "instrument_count",
+        "location",
+        "department",
+        "transferred_by",
+    )
+    list_select_related = ("location", "department", "transferred_by")
+    date_hierarchy = "created_at"
+    readonly_fields = ("moved",)
+
+
 @admin.register(CalibrationCertificate)
-class CalibrationCertificateAdmin(admin.ModelAdmin):
+class CalibrationCertificateAdmin(LargeTableAdmin):
     list_display = (
         "certificate_number",
         "version",
@@ -74,12 +144,14 @@ class CalibrationCertificateAdmin(admin.ModelAdmin):
         "created_by",
     )
     list_filter = ("status", "certificate_type", "issue_date")
+    list_select_related = ("created_by",)
     search_fields = ("certificate_number",)
+    autocomplete_fields = ("created_by", "reviewer")
     date_hierarchy = "issue_date"
 
 
 @admin.register(CalibrationRecord)
-class CalibrationRecordAdmin(admin.ModelAdmin):
+class CalibrationRecordAdmin(LargeTableAdmin):
     list_display = (
         "instrument",
         "date_performed",
@@ -88,20 +160,26 @@ class CalibrationRecordAdmin(admin.ModelAdmin):
         "performed_by",
     )
     list_filter = ("status", "calibration_type")
+    list_select_related = ("instrument", "performed_by")
     search_fields = ("instrument__name", "instrument__serial_number")
+    autocomplete_fields = ("instrument", "performed_by", "certificate")
     date_hierarchy = "date_performed"
 
 
 @admin.register(MaintenanceRecord)
-class MaintenanceRecordAdmin(admin.ModelAdmin):
+class MaintenanceRecordAdmin(LargeTableAdmin):
     list_display = ("instrument", "start_date", "end_date", "status", "performed_by")
     list_filter = ("status", "maintenance_type")
+    list_select_related = ("instrument", "performed_by")
     search_fields = ("instrument__name", "instrument__serial_number")
+    autocomplete_fields = ("instrument", "performed_by")
     date_hierarchy = "start_date"
 
 
 @admin.register(Review)
-class ReviewAdmin(admin.ModelAdmin):
+class ReviewAdmin(LargeTableAdmin):
     list_display = ("instrument", "status", "priority", "requested_by", "assigned_to")
     list_filter = ("status", "priority")
+    list_select_related = ("instrument", "requested_by", "assigned_to")
     search_fields = ("instrument__name", "instrument__serial_number", "reason")
+    autocomplete_fields = ("instrument", "requested_by", "assigned_to")
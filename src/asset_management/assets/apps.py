@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class AssetsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "asset_management.assets"
+
+    def ready(self):
+        from . import checks, signals  # noqa: F401
@@ -0,0 +1,119 @@
+"""
+Archival of superseded certificates and closed issues and reviews.
+
+Rows that have been closed for longer than the retention window are moved out
+of their live tables into ``ArchivedRecord``, which keeps each row's fields as
+compressed JSON. The live tables, their indexes and the default viewset
+querysets then only hold the rows still in use, while archived rows stay
+readable through the read-only archive API.
+
+Superseded certificates still cited by a calibration record stay in place, as
+the record's foreign key protects them.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core import serializers
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from .models import (
+    ArchivedRecord,
+    CalibrationCertificate,
+    CalibrationRecord,
+    Issue,
+    Review,
+)
+
+
+class ArchivePolicy:
+    """
+    Which rows of a model are archived once closed for the retention window.
+
+    ``instrument`` names the field linking rows to an instrument, if any.
+    """
+
+    def __init__(self, kind, model, statuses, instrument=None):
+        self.kind = kind
+        self.model = model
+        self.statuses = statuses
+        self.instrument = instrument
+
+    def queryset(self, cutoff):
+        return self.model._default_manager.filter(
+            status__in=self.statuses, updated_at__lt=cutoff
+        )
+
+
+class CertificatePolicy(ArchivePolicy):
+    def queryset(self, cutoff):
+        cited = CalibrationRecord.objects.filter(certificate=OuterRef("pk"))
+        return super().queryset(cutoff).filter(~Exists(cited))
+
+
+POLICIES = {
+    policy.kind: policy
+    for policy in [
+        CertificatePolicy(
+            ArchivedRecord.CERTIFICATE,
+            CalibrationCertificate,
+            [CalibrationCertificate.SUPERSEDED],
+        ),
+        ArchivePolicy(ArchivedRecord.ISSUE, Issue, ["closed"], instrument="instrument"),
+        ArchivePolicy(
+            ArchivedRecord.REVIEW, Review, ["completed"], instrument="instrument"
+        ),
+    ]
+}
+
+
+def retention_cutoff():
+    days = getattr(settings, "ARCHIVE_RETENTION_DAYS", 365)
+    return timezone.now() - timedelta(days=days)
+
+
+def snapshot(policy, instance):
+    """Return the ``ArchivedRecord`` preserving an instance."""
+    (serialized,) = serializers.serialize("python", [instance])
+    instrument_id = None
+    if policy.instrument:
+        instrument_id = getattr(
+            instance, instance._meta.get_field(policy.instrument).attname
+        )
+    return ArchivedRecord(
+        kind=policy.kind,
+        object_id=instance.pk,
+        instrument_id=instrument_id,
+        closed_at=instance.updated_at,
+        data={"id": instance.pk, **serialized["fields"]},
+    )
+
+
+def archive_records(kind, cutoff=None, batch_size=1000, dry_run=False):
+    """
+    Move rows of one kind closed before ``cutoff`` into the archive.
+
+    Each batch is archived and deleted in one transaction. Returns the number
+    of rows archived, or that would be with ``dry_run``.
+    """
+    policy = POLICIES[kind]
+    queryset = policy.queryset(cutoff or retention_cutoff()).order_by("pk")
+    if dry_run:
+        return queryset.count()
+
+    archived = 0
+    while True:
+        with transaction.atomic():
+            batch = list(queryset.select_for_update(skip_locked=True)[:batch_size])
+            if not batch:
+                break
+            ArchivedRecord.objects.bulk_create(
+                [snapshot(policy, instance) for instance in batch]
+            )
+            policy.model._default_manager.filter(
+                pk__in=[instance.pk for instance in batch]
+            ).delete()
+        archived += len(batch)
+    return archived
@@ -0,0 +1,227 @@
+"""
+Audit trail of changes to instruments, certificates and their records.
+
+The receivers in ``signals.py`` record an ``AuditEvent`` for each save and
+delete of the audited models, keeping only the fields that changed as
+``{"field": [old, new]}``. Bulk writes that skip the signals, such as imports
+and calibration history ingestion, record theirs with ``record_many()``.
+
+Events are written in the same transaction as the change they describe, so a
+rolled back change leaves no event and a committed change never loses its
+event. Code making many changes groups them with ``batch()``, which runs its
+block in a transaction and writes the events recorded in it with one INSERT
+before it commits. ``AuditMiddleware`` runs each request that may change data
+in a batch, so the saves of a request cost one INSERT of events between them.
+
+Custom actions label the events of the changes they make with
+``action("review")``, and the user of the current request is the actor.
+"""
+
+import contextvars
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils import timezone
+
+from .models import (
+    AuditEvent,
+    CalibrationCertificate,
+    CalibrationRecord,
+    Instrument,
+    Issue,
+    MaintenanceRecord,
+    Review,
+)
+
+# Models whose changes are kept in the audit trail
+AUDITED_MODELS = (
+    Instrument,
+    CalibrationCertificate,
+    CalibrationRecord,
+    MaintenanceRecord,
+    Review,
+    Issue,
+)
+
+# Fields every save changes, or that the event already holds
+IGNORED_FIELDS = {"id", "created_at", "updated_at"}
+
+_request = contextvars.ContextVar("audit_request", default=None)
+_batch = contextvars.ContextVar("audit_batch", default=None)
+_action = contextvars.ContextVar("audit_action", default="")
+
+_MISSING = object()
+
+
+def audited_fields(model):
+    """Return the names of the audited fields of a model."""
+    return [
+        field.name
+        for field in model._meta.concrete_fields
+        if field.name not in IGNORED_FIELDS
+    ]
+
+
+def snapshot(instance):
+    """
+    Return the audited values of a model instance.
+
+    Values are read from ``__dict__`` so that deferred fields are never
+    fetched; they are left out instead.
+    """
+    values = {}
+    for field in instance._meta.concrete_fields:
+        if field.name not in IGNORED_FIELDS:
+            value = instance.__dict__.get(field.attname, _MISSING)
+            if value is not _MISSING:
+                values[field.name] = value
+    return values
+
+
+def diff(old, new):
+    """
+    Return the changes from one snapshot to the next as ``{name: [old, new]}``.
+
+    Against an empty ``old``, as for a created object, the fields with a
+    value are listed with ``None`` as their old value. Fields missing from
+    either side are not compared.
+    """
+    if not old:
+        return {
+            name: [None, value]
+            for name, value in new.items()
+            if value is not None and value != ""
+        }
+    return {
+        name: [old[name], value]
+        for name, value in new.items()
+        if name in old and old[name] != value
+    }
+
+
+class AuditBatch:
+    """Events recorded in a ``batch()`` block, waiting to be written together."""
+
+    def __init__(self, using):
+        self.using = using
+        self.connection = connections[using]
+        # Events recorded deeper, inside a savepoint, are written at once so
+        # that rolling back to the savepoint discards them too
+        self.depth = len(self.connection.savepoint_ids)
+        self.events = []
+
+    def holds(self, using):
+        return (
+            using == self.using
+            and self.connection.in_atomic_block
+            and len(self.connection.savepoint_ids) == self.depth
+        )
+
+    def add(self, events):
+        self.events.extend(events)
+        if len(self.events) >= getattr(settings, "AUDIT_BATCH_SIZE", 1000):
+            self.flush()
+
+    def flush(self):
+        events, self.events = self.events, []
+        _write(self.using, events)
+
+
+@contextmanager
+def batch(using="default"):
+    """
+    Run the block in a transaction and write the events recorded in it
+    together before it commits.
+
+    Nested blocks join the outermost one.
+    """
+    if _batch.get() is not None:
+        yield _batch.get()
+        return
+    with transaction.atomic(using=using):
+        current = AuditBatch(using)
+        token = _batch.set(current)
+        try:
+            yield current
+        finally:
+            _batch.reset(token)
+        current.flush()
+
+
+@contextmanager
+def action(name):
+    """Label the events recorded in the block with a custom action's name."""
+    token = _action.set(name)
+    try:
+        yield
+    finally:
+        _action.reset(token)
+
+
+def _actor_id():
+    user = getattr(_request.get(), "user", None)
+    if user is not None and user.is_authenticated:
+        return user.pk
+    return None
+
+
+def record(model, object_id, operation, changes, using="default"):
+    """Record a change to an object in the transaction making it."""
+    record_many(model, [(object_id, changes)], operation, using=using)
+
+
+def record_many(model, changes, operation, using="default"):
+    """
+    Record the same operation on many objects of a model.
+
+    ``changes`` are ``(object_id, changes)`` pairs.
+    """
+    now = timezone.now()
+    actor_id = _actor_id()
+    events = [
+        AuditEvent(
+            object_type=model._meta.label_lower,
+            object_id=object_id,
+            operation=operation,
+            action=_action.get(),
+            actor_id=actor_id,
+            changes=object_changes,
+            created_at=now,
+        )
+        for object_id, object_changes in changes
+    ]
+    current = _batch.get()
+    if current is not None and current.holds(using):
+        current.add(events)
+    else:
+        _write(using, events)
+
+
+def _write(using, events):
+    if events:
+        AuditEvent.objects.using(using).bulk_create(
+            events, batch_size=getattr(settings, "AUDIT_BATCH_SIZE", 1000)
+        )
+
+
+class AuditMiddleware:
+    """
+    Make the user of each request the actor of the events it records, and
+    write the events of a request that may change data in one batch.
+    """
+
+    SAFE_METHODS = ("GET", "HEAD", "OPTIONS", "TRACE")
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = _request.set(request)
+        try:
+            if request.method in self.SAFE_METHODS:
+                return self.get_response(request)
+            with batch():
+                return self.get_response(request)
+        finally:
+            _request.reset(token)
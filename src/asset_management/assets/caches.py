@@ -0,0 +1,55 @@
+"""
+Cache backends that count their hits and misses.
+
+They are drop-in replacements for Django's local memory and Redis backends,
+exporting ``asset_cache_requests_total{result}`` when ``prometheus_client`` is
+installed.
+"""
+
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends.redis import RedisCache
+
+try:
+    import prometheus_client
+except ImportError:  # pragma: no cover
+    prometheus_client = None
+
+_MISSING = object()
+
+if prometheus_client is not None:
+    CACHE_REQUESTS = prometheus_client.Counter(
+        "asset_cache_requests", "Cache lookups, by result", ["result"]
+    )
+
+
+class MeteredCacheMixin:
+    """Count the hits and misses of a cache backend's lookups."""
+
+    def _count(self, hits, misses):
+        if prometheus_client is None:
+            return
+        if hits:
+            CACHE_REQUESTS.labels("hit").inc(hits)
+        if misses:
+            CACHE_REQUESTS.labels("miss").inc(misses)
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _MISSING, version=version)
+        if value is _MISSING:
+            self._count(0, 1)
+            return default
+        self._count(1, 0)
+        return value
+
+
+class MeteredLocMemCache(MeteredCacheMixin, LocMemCache):
+    pass
+
+
+class MeteredRedisCache(MeteredCacheMixin, RedisCache):
+    # The base get_many() goes through get(); Redis fetches keys in one call
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        found = super().get_many(keys, version=version)
+        self._count(len(found), len(keys) - len(found))
+        return found
@@ -0,0 +1,163 @@
+"""
+Maintenance of the ``InstrumentCapability`` index: what instruments measure.
+
+The ranges of an instrument's sensor types are merged per unit into the
+ranges it covers. Where sensors of different accuracy overlap, a merged range
+is only as accurate as its worst part, so it is also split at the points
+where the best accuracy available changes, and every stretch of it that is
+better than the whole is kept as a row of its own, with the accuracy of its
+worst part. The row of a search range with the best accuracy then gives the
+accuracy the instrument has over all of it. Searches for instruments able to
+measure a range read that one table, without joining sensor types, through
+``InstrumentCapability.objects.covering()``; on PostgreSQL a GiST index on
+``numrange(range_min, range_max)`` serves them.
+
+Writes that change sensor types, which instruments have them or the
+resolution of instruments call ``schedule_capability_refresh`` (see
+``signals.py``). As for summaries, refreshes are deferred until the
+transaction commits and coalesced.
+"""
+
+from django.db import transaction
+
+from .models import Instrument, InstrumentCapability
+from .read_models import DeferredRefresh
+
+
+def merge_ranges(sensors):
+    """
+    Return the ranges covered by sensors as ``(unit, low, high, accuracy)``.
+
+    ``sensors`` are ``(unit, min_range, max_range, accuracy)`` tuples.
+    Overlapping or touching ranges of a unit are merged. Each merged range is
+    returned with the accuracy of its least accurate part, where every part
+    is measured by the most accurate sensor covering it, followed by the
+    stretches of it that are more accurate than the whole. A null accuracy
+    counts as the worst. A unit whose sensors give no complete range is
+    returned once with null bounds, so that it is still found by unit.
+    """
+    by_unit = {}
+    for unit, low, high, accuracy in sensors:
+        by_unit.setdefault(unit, []).append((low, high, accuracy))
+
+    merged = []
+    for unit, ranges in sorted(by_unit.items()):
+        bounded = sorted(
+            (low, high, accuracy)
+            for low, high, accuracy in ranges
+            if low is not None and high is not None
+        )
+        if not bounded:
+            merged.append((unit, None, None, _best(a for _, _, a in ranges)))
+            continue
+        group = []
+        for sensor in bounded:
+            if group and sensor[0] > max(high for _, high, _ in group):
+                merged.extend((unit, *row) for row in _split(group))
+                group = []
+            group.append(sensor)
+        merged.extend((unit, *row) for row in _split(group))
+    return merged
+
+
+def _split(sensors):
+    """Return the stretches of overlapping sensors, as described above."""
+    points = sorted({point for low, high, _ in sensors for point in (low, high)})
+    if len(points) == 1:
+        return [(points[0], points[0], _best(a for _, _, a in sensors))]
+    # The best accuracy over each stretch between consecutive points
+    parts = [
+        (
+            low,
+            high,
+            _best(a for start, end, a in sensors if start <= low and end >= high),
+        )
+        for low, high in zip(points, points[1:])
+    ]
+    levels = sorted({_rank(accuracy) for _, _, accuracy in parts}, reverse=True)
+    rows = []
+    for level in levels:
+        run = []
+        for part in parts + [None]:
+            if part is not None and _rank(part[2]) <= level:
+                run.append(part)
+                continue
+            if run:
+                row = (run[0][0], run[-1][1], max((p[2] for p in run), key=_rank))
+                if row[:2] not in {existing[:2] for existing in rows}:
+                    rows.append(row)
+            run = []
+    return rows
+
+
+def _rank(accuracy):
+    return (accuracy is None, accuracy or 0)
+
+
+def _best(accuracies):
+    accuracies = [accuracy for accuracy in accuracies if accuracy is not None]
+    return min(accuracies) if accuracies else None
+
+
+def schedule_capability_refresh(instrument_ids, using="default"):
+    """
+    Refresh the capabilities of the given instruments once the transaction
+    commits.
+    """
+    _pending.schedule(instrument_ids, using=using)
+
+
+def refresh_capabilities(instrument_ids=None, batch_size=1000, using="default"):
+    """
+    Recompute the capabilities of the given instruments, or all of them if
+    None.
+
+    Each batch is read with two queries and replaced with one delete and one
+    insert, in a transaction so searches never see it half written. Returns
+    the number of rows written.
+    """
+    queryset = Instrument.objects.using(using).order_by("pk")
+    if instrument_ids is not None:
+        queryset = queryset.filter(pk__in=list(instrument_ids))
+    assignments = Instrument.sensor_types.through.objects.using(using)
+
+    written = 0
+    last_pk = 0
+    while True:
+        batch = dict(
+            queryset.filter(pk__gt=last_pk).values_list("pk", "resolution")[:batch_size]
+        )
+        if not batch:
+            break
+        sensors = {}
+        rows = assignments.filter(instrument__in=batch).values_list(
+            "instrument",
+            "sensortype__unit",
+            "sensortype__min_range",
+            "sensortype__max_range",
+            "sensortype__accuracy",
+        )
+        for instrument_id, *sensor in rows:
+            sensors.setdefault(instrument_id, []).append(sensor)
+        capabilities = [
+            InstrumentCapability(
+                instrument_id=instrument_id,
+                unit=unit,
+                range_min=low,
+                range_max=high,
+                best_accuracy=accuracy,
+                resolution=batch[instrument_id],
+            )
+            for instrument_id, instrument_sensors in sensors.items()
+            for unit, low, high, accuracy in merge_ranges(instrument_sensors)
+        ]
+        with transaction.atomic(using=using):
+            stored = InstrumentCapability.objects.using(using)
+            stored.filter(instrument__in=batch).delete()
+            stored.bulk_create(capabilities)
+        written += len(capabilities)
+        last_pk = max(batch)
+    return written
+
+
+_pending = DeferredRefresh(refresh_capabilities)
@@ -0,0 +1,27 @@
+"""
+System checks of the deployment settings the assets app relies on.
+"""
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Tags, Warning, register
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    Cached site trees are invalidated through the default cache, which each
+    process of a deployment must therefore share. Checked on every command
+    rather than only by ``check --deploy``, as ``migrate`` runs on deploys.
+    """
+    if settings.DEBUG or not isinstance(caches["default"], LocMemCache):
+        return []
+    return [
+        Warning(
+            "The default cache is local to each process, so the site trees "
+            "cached by one process are not invalidated by writes in another.",
+            hint="Set REDIS_URL to share a Redis cache between processes.",
+            id="assets.W001",
+        )
+    ]
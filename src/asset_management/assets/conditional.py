@@ -0,0 +1,195 @@
+"""
+Conditional request support for the HTML list pages and the REST API.
+
+Validators are derived from ``updated_at`` without rendering anything: a
+single aggregate query over the filtered queryset (row count and latest
+``updated_at``) for lists, and the loaded row for detail requests. An
+unchanged resource is answered with 304 Not Modified, and updates carrying a
+stale ``If-Match`` are refused with 412 Precondition Failed.
+"""
+
+import hashlib
+
+from django.conf import settings
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.response import Response
+
+from .profiling import measure
+
+
+def make_etag(*parts):
+    """Return a quoted ETag hashed from the given parts."""
+    key = ":".join("" if part is None else str(part) for part in parts)
+    return quote_etag(hashlib.md5(key.encode()).hexdigest())
+
+
+def queryset_validators(queryset, related=(), extra=()):
+    """
+    Return ``(etag, last_modified)`` for the rows of a queryset.
+
+    ``related`` names relations whose ``updated_at`` also affects the
+    representation, e.g. ``("instrument",)`` when rows show the instrument
+    name. ``extra`` values (page number, user) are folded into the ETag.
+    """
+    aggregates = {
+        # Joins through many-to-many relations repeat rows
+        "count": Count("pk", distinct=bool(related)),
+        "updated_at": Max("updated_at"),
+    }
+    for name in related:
+        aggregates[f"{name}_updated_at"] = Max(f"{name}__updated_at")
+    stats = queryset.order_by().aggregate(**aggregates)
+
+    timestamps = [value for key, value in stats.items() if key != "count"]
+    present = [value for value in timestamps if value is not None]
+    last_modified = max(present) if present else None
+    etag = make_etag(
+        stats["count"],
+        *(value.isoformat() if value else None for value in timestamps),
+        *extra,
+    )
+    return etag, last_modified
+
+
+def set_validators(response, etag, last_modified):
+    response["ETag"] = etag
+    if last_modified is not None:
+        response["Last-Modified"] = http_date(int(last_modified.timestamp()))
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def not_modified(request, etag, last_modified, check_modified_since=True):
+    """
+    Return a 304 response if the request's validators match, otherwise None.
+
+    Lists pass ``check_modified_since=False``: deleting a row does not move
+    their Last-Modified date, so only the ETag (which includes the row count)
+    can tell that they changed.
+    """
+    timestamp = None
+    if check_modified_since and last_modified is not None:
+        timestamp = int(last_modified.timestamp())
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+class ConditionalListMixin:
+    """
+    ListView mixin adding ETag/Last-Modified validators and 304 responses.
+
+    Pages vary by user and query string, so both are part of the ETag and the
+    response is marked private. Templates get ``fragment_cache_timeout`` for
+    their per-row ``{% cache %}`` blocks, which are keyed on ``updated_at``.
+    """
+
+    conditional_related = ()
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["fragment_cache_timeout"] = getattr(
+            settings, "FRAGMENT_CACHE_TIMEOUT", 600
+        )
+        return context
+
+    def get_validators(self):
+        return queryset_validators(
+            self.get_queryset(),
+            related=self.conditional_related,
+            extra=(self.request.user.pk, self.request.GET.urlencode()),
+        )
+
+    def get(self, request, *args, **kwargs):
+        etag, last_modified = self.get_validators()
+        response = not_modified(
+            request, etag, last_modified, check_modified_since=False
+        )
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+        return set_validators(response, etag, last_modified)
+
+
+class PreconditionFailed(APIException):
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = "The resource has been modified since it was fetched."
+    default_code = "precondition_failed"
+
+
+class ConditionalViewSetMixin:
+    """
+    ModelViewSet mixin adding ETags, 304 responses and If-Match checks.
+
+    ``conditional_related`` names the relations nested in the serializer
+    output, so that e.g. renaming a location changes the ETag of the
+    instruments that embed it. Serializing lists and objects is measured for
+    profiled requests (see ``profiling.py``).
+    """
+
+    conditional_related = ()
+
+    def get_object_validators(self, instance):
+        if self.conditional_related:
+            return queryset_validators(
+                type(instance)._default_manager.filter(pk=instance.pk),
+                related=self.conditional_related,
+            )
+        return (
+            make_etag(instance._meta.label, instance.pk, instance.updated_at),
+            instance.updated_at,
+        )
+
+    def get_object(self):
+        instance = super().get_object()
+        if self.request.method not in ("GET", "HEAD", "OPTIONS"):
+            self.check_if_match(instance)
+        return instance
+
+    def check_if_match(self, instance):
+        """Refuse writes made against a stale representation."""
+        header = self.request.headers.get("If-Match")
+        if not header:
+            return
+        etag, _ = self.get_object_validators(instance)
+        etags = parse_etags(header)
+        if "*" not in etags and etag not in etags:
+            raise PreconditionFailed()
+
+    def list(self, request, *args, **kwargs):
+        etag, last_modified = queryset_validators(
+            self.filter_queryset(self.get_queryset()),
+            related=self.conditional_related,
+            extra=(request.user.pk, request.query_params.urlencode()),
+        )
+        response = not_modified(
+            request, etag, last_modified, check_modified_since=False
+        )
+        if response is None:
+            with measure("serialize"):
+                response = super().list(request, *args, **kwargs)
+        return set_validators(response, etag, last_modified)
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        etag, last_modified = self.get_object_validators(instance)
+        response = not_modified(request, etag, last_modified)
+        if response is None:
+            with measure("serialize"):
+                response = Response(self.get_serializer(instance).data)
+        return set_validators(response, etag, last_modified)
+
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        self.updated_instance = serializer.instance
+
+    def update(self, request, *args, **kwargs):
+        response = super().update(request, *args, **kwargs)
+        instance = getattr(self, "updated_instance", None)
+        if instance is not None:
+            set_validators(response, *self.get_object_validators(instance))
+        return response
@@ -0,0 +1,247 @@
+"""
+Broadcast of instrument, review and issue state transitions.
+
+Transitions are detected by the receivers in ``signals.py`` and published once
+the surrounding transaction commits. Subscribers (the server-sent event stream)
+receive them from an in-process broker, so connected dashboards generate no
+query load of their own.
+
+On PostgreSQL events are sent with ``NOTIFY`` rather than published directly.
+Every process runs a ``LISTEN`` thread that feeds its local broker, so a
+dashboard connected to any replica sees the changes committed on all of them.
+"""
+
+import asyncio
+import json
+import logging
+import select
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection, connections, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "asset_events"
+
+
+def use_pg_notify():
+    """
+    Return True if events should be relayed between processes with NOTIFY.
+    """
+    enabled = getattr(settings, "ASSET_EVENTS_PG_NOTIFY", None)
+    if enabled is None:
+        return connection.vendor == "postgresql"
+    return enabled
+
+
+class Subscription:
+    """
+    A single consumer of the event stream, bound to an asyncio event loop.
+
+    Events are handed over from publishing threads with
+    ``call_soon_threadsafe``. A subscriber that falls too far behind loses the
+    oldest pending events rather than holding back the publisher.
+    """
+
+    def __init__(self, loop, departments=None, max_pending=100):
+        self.loop = loop
+        self.departments = departments
+        self.queue = asyncio.Queue(maxsize=max_pending)
+        self.dropped = 0
+
+    def accepts(self, event):
+        if self.departments is None:
+            return True
+        return event.get("department_id") in self.departments
+
+    def deliver(self, event):
+        """Queue an event from any thread."""
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            # The loop has been closed; the broker will drop us on unsubscribe
+            pass
+
+    def _put(self, event):
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+    async def get(self):
+        return await self.queue.get()
+
+
+class EventBroker:
+    """
+    In-process fan-out of events to subscriptions.
+    """
+
+    def __init__(self):
+        self._subscriptions = set()
+        self._lock = threading.Lock()
+        self._listener = None
+
+    def subscribe(self, departments=None):
+        """
+        Register a subscription on the running event loop.
+
+        ``departments`` restricts the subscription to events for instruments
+        in those departments; None receives everything.
+        """
+        subscription = Subscription(
+            asyncio.get_running_loop(),
+            departments=departments,
+            max_pending=getattr(settings, "ASSET_EVENTS_MAX_PENDING", 100),
+        )
+        with self._lock:
+            self._subscriptions.add(subscription)
+            if use_pg_notify() and (
+                self._listener is None or not self._listener.is_alive()
+            ):
+                self._listener = PostgresListener(self)
+                self._listener.start()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def publish(self, event):
+        """Deliver an event to every matching subscription."""
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            if subscription.accepts(event):
+                subscription.deliver(event)
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscriptions)
+
+    @property
+    def pending_count(self):
+        """Events queued and not yet sent to subscribers."""
+        with self._lock:
+            return sum(s.queue.qsize() for s in self._subscriptions)
+
+
+class PostgresListener(threading.Thread):
+    """
+    Daemon thread relaying NOTIFY payloads on ``CHANNEL`` to a broker.
+
+    It holds one dedicated connection per process, regardless of the number
+    of subscribers, and reconnects after database errors.
+    """
+
+    poll_timeout = 5
+    retry_delay = 5
+
+    def __init__(self, broker, alias="default"):
+        super().__init__(name="asset-events-listener", daemon=True)
+        self.broker = broker
+        self.alias = alias
+
+    def run(self):
+        while True:
+            try:
+                self.listen()
+            except Exception:
+                logger.exception("Event listener lost its database connection")
+                time.sleep(self.retry_delay)
+
+    def listen(self):
+        wrapper = connections.create_connection(self.alias)
+        try:
+            wrapper.ensure_connection()
+            raw = wrapper.connection
+            raw.autocommit = True
+            with raw.cursor() as cursor:
+                cursor.execute(f"LISTEN {CHANNEL}")
+            while True:
+                if select.select([raw], [], [], self.poll_timeout) == ([], [], []):
+                    continue
+                raw.poll()
+                while raw.notifies:
+                    notify = raw.notifies.pop(0)
+                    try:
+                        event = json.loads(notify.payload)
+                    except ValueError:
+                        logger.warning("Ignoring malformed event payload")
+                        continue
+                    self.broker.publish(event)
+        finally:
+            wrapper.close()
+
+
+broker = EventBroker()
+
+
+def build_event(instance, field, old, new):
+    """
+    Build the payload for a change of ``field`` on a tracked model instance.
+
+    Reviews and issues carry their instrument's department, so no instrument
+    is loaded to label the event.
+    """
+    model_name = instance._meta.model_name
+    if model_name == "instrument":
+        instrument_id = instance.pk
+    else:
+        instrument_id = instance.instrument_id
+    return {
+        "type": f"{model_name}.{field}",
+        "id": instance.pk,
+        "instrument_id": instrument_id,
+        "department_id": instance.department_id,
+        "old": old,
+        "new": new,
+        "timestamp": timezone.now().isoformat(),
+    }
+
+
+def publish_on_commit(event, using="default"):
+    """
+    Publish an event once the current transaction commits.
+
+    With NOTIFY enabled the notification is queued inside the transaction
+    itself; PostgreSQL only delivers it on commit and discards it on rollback.
+    """
+    if use_pg_notify():
+        with connections[using].cursor() as cursor:
+            cursor.execute(
+                "SELECT pg_notify(%s, %s)", [CHANNEL, json.dumps(event, default=str)]
+            )
+    else:
+        transaction.on_commit(lambda: broker.publish(event), using=using)
+
+
+def format_sse(event):
+    """Encode an event as a server-sent event frame."""
+    return f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+
+
+async def stream_events(departments=None, heartbeat=None):
+    """
+    Yield server-sent event frames for a new subscription until disconnected.
+
+    A comment line is sent every ``heartbeat`` seconds without events so that
+    proxies keep the connection open.
+    """
+    if heartbeat is None:
+        heartbeat = getattr(settings, "ASSET_EVENTS_HEARTBEAT", 15)
+    subscription = broker.subscribe(departments=departments)
+    try:
+        yield "retry: 5000\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.get(), heartbeat)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            yield format_sse(event)
+    finally:
+        broker.unsubscribe(subscription)
@@ -0,0 +1,269 @@
+"""
+Read-path serialization of list responses from ``.values()`` rows.
+
+``FlatSerializer`` compiles the readable fields of an existing serializer
+into ``.values()`` lookups. Nested serializers and related primary keys are
+resolved from lookup maps built with one query per relation for a whole
+page, and every value is converted with the original field's
+``to_representation``, so the output is identical to the serializer's
+without creating a model instance or serializer per row.
+
+Serializers with fields that cannot be expressed this way (method fields,
+hyperlinks, files, properties) raise ``UnsupportedField``; ``FlatListMixin``
+then falls back to the regular serializer.
+"""
+
+from rest_framework import serializers
+from rest_framework.fields import SkipField, empty
+from rest_framework.relations import ManyRelatedField, PrimaryKeyRelatedField
+from rest_framework.response import Response
+
+from .profiling import measure
+
+
+class UnsupportedField(Exception):
+    """Raised when a serializer field has no ``.values()`` equivalent."""
+
+
+def _missing(field):
+    """Mirror ``Field.get_attribute`` for a null relation along the source."""
+    if field.default is not empty:
+        return field.get_default()
+    if field.allow_null:
+        return None
+    raise SkipField()
+
+
+class _Value:
+    """A model column, or a column reached through forward relations."""
+
+    def __init__(self, name, field, model):
+        self.name = name
+        self.field = field
+        self.relations = []
+        for attr in field.source_attrs[:-1]:
+            model_field = _model_field(model, attr)
+            if not (model_field.many_to_one or model_field.one_to_one):
+                raise UnsupportedField(name)
+            self.relations.append("__".join(self.relations[-1:] + [attr]))
+            model = model_field.related_model
+        model_field = _model_field(model, field.source_attrs[-1])
+        if model_field.is_relation and not isinstance(field, PrimaryKeyRelatedField):
+            raise UnsupportedField(name)
+        self.lookup = "__".join(field.source_attrs)
+        self.lookups = self.relations + [self.lookup]
+
+    def prepare(self, rows):
+        pass
+
+    def represent(self, row):
+        for relation in self.relations:
+            if row[relation] is None:
+                return _missing(self.field)
+        value = row[self.lookup]
+        if value is None:
+            return None
+        return self.convert(value)
+
+    def convert(self, value):
+        return self.field.to_representation(value)
+
+
+class _PrimaryKey(_Value):
+    """A forward relation rendered as its primary key."""
+
+    def convert(self, value):
+        return value
+
+
+class _Nested:
+    """A forward relation rendered by a nested serializer."""
+
+    def __init__(self, name, field, model):
+        if len(field.source_attrs) != 1:
+            raise UnsupportedField(name)
+        model_field = _model_field(model, field.source)
+        if not (model_field.many_to_one or model_field.one_to_one):
+            raise UnsupportedField(name)
+        self.name = name
+        self.lookup = field.source
+        self.lookups = [self.lookup]
+        self.flat = FlatSerializer(field)
+        self.objects = {}
+
+    def prepare(self, rows):
+        ids = {row[self.lookup] for row in rows} - {None}
+        self.objects = self.flat.fetch(ids)
+
+    def represent(self, row):
+        pk = row[self.lookup]
+        if pk is None:
+            return None
+        return self.objects[pk]
+
+
+class _Many:
+    """A many-to-many relation rendered as primary keys or nested objects."""
+
+    def __init__(self, name, field, model, flat=None):
+        if len(field.source_attrs) != 1:
+            raise UnsupportedField(name)
+        model_field = _model_field(model, field.source)
+        if not model_field.many_to_many or model_field.auto_created:
+            raise UnsupportedField(name)
+        self.name = name
+        self.model_field = model_field
+        self.lookups = []
+        self.flat = flat
+        self.related = {}
+
+    def prepare(self, rows):
+        through = self.model_field.remote_field.through
+        source = self.model_field.m2m_field_name()
+        target = self.model_field.m2m_reverse_field_name()
+        # Keep the related model's default ordering, as ``.all()`` would
+        ordering = []
+        for name in self.model_field.related_model._meta.ordering or ["pk"]:
+            if not isinstance(name, str):
+                raise UnsupportedField(self.name)
+            descending = name.startswith("-")
+            ordering.append(
+                "%s%s__%s" % ("-" if descending else "", target, name.lstrip("-"))
+            )
+        pairs = (
+            through._default_manager.filter(
+                **{f"{source}__in": [row["pk"] for row in rows]}
+            )
+            .order_by(*ordering)
+            .values_list(f"{source}_id", f"{target}_id")
+        )
+
+        self.related = {}
+        targets = set()
+        for owner, pk in pairs:
+            self.related.setdefault(owner, []).append(pk)
+            targets.add(pk)
+        if self.flat is not None:
+            objects = self.flat.fetch(targets)
+            for owner, pks in self.related.items():
+                self.related[owner] = [objects[pk] for pk in pks]
+
+    def represent(self, row):
+        return self.related.get(row["pk"], [])
+
+
+def _model_field(model, name):
+    try:
+        return model._meta.get_field(name)
+    except Exception:
+        raise UnsupportedField(name)
+
+
+class FlatSerializer:
+    """
+    Serialize ``.values()`` rows exactly as a model serializer would.
+
+    Build it from a serializer instance, apply ``values()`` to the queryset
+    and pass the evaluated rows to ``serialize()``.
+    """
+
+    def __init__(self, serializer):
+        if type(serializer).to_representation is not (
+            serializers.Serializer.to_representation
+        ):
+            raise UnsupportedField(type(serializer).__name__)
+        self.model = serializer.Meta.model
+        self.fields = []
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if field.source == "*":
+                raise UnsupportedField(name)
+            if isinstance(field, serializers.ListSerializer):
+                if not isinstance(field.child, serializers.ModelSerializer):
+                    raise UnsupportedField(name)
+                self.fields.append(
+                    _Many(name, field, self.model, FlatSerializer(field.child))
+                )
+            elif isinstance(field, serializers.ModelSerializer):
+                self.fields.append(_Nested(name, field, self.model))
+            elif isinstance(field, ManyRelatedField):
+                child = field.child_relation
+                if type(child) is not PrimaryKeyRelatedField or child.pk_field:
+                    raise UnsupportedField(name)
+                self.fields.append(_Many(name, field, self.model))
+            elif isinstance(field, PrimaryKeyRelatedField):
+                if type(field) is not PrimaryKeyRelatedField or field.pk_field:
+                    raise UnsupportedField(name)
+                self.fields.append(_PrimaryKey(name, field, self.model))
+            elif isinstance(
+                field,
+                (
+                    serializers.RelatedField,
+                    serializers.SerializerMethodField,
+                    serializers.FileField,
+                    serializers.Serializer,
+                ),
+            ):
+                raise UnsupportedField(name)
+            else:
+                self.fields.append(_Value(name, field, self.model))
+
+        self.lookups = ["pk"]
+        for field in self.fields:
+            for lookup in field.lookups:
+                if lookup not in self.lookups:
+                    self.lookups.append(lookup)
+
+    def values(self, queryset):
+        return queryset.values(*self.lookups)
+
+    def serialize(self, rows):
+        rows = list(rows)
+        if not rows:
+            return []
+        for field in self.fields:
+            field.prepare(rows)
+
+        data = []
+        for row in rows:
+            item = {}
+            for field in self.fields:
+                try:
+                    item[field.name] = field.represent(row)
+                except SkipField:
+                    pass
+            data.append(item)
+        return data
+
+    def fetch(self, pks):
+        """Return serialized objects for the given primary keys by pk."""
+        if not pks:
+            return {}
+        rows = list(self.values(self.model._default_manager.filter(pk__in=pks)))
+        return {row["pk"]: item for row, item in zip(rows, self.serialize(rows))}
+
+
+class FlatListMixin:
+    """
+    ModelViewSet mixin serving the list action through ``FlatSerializer``.
+
+    Only the list action is affected; detail and write actions keep using
+    the regular serializer.
+    """
+
+    def list(self, request, *args, **kwargs):
+        try:
+            flat = FlatSerializer(self.get_serializer())
+        except UnsupportedField:
+            return super().list(request, *args, **kwargs)
+
+        queryset = flat.values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            with measure("serialize"):
+                data = flat.serialize(page)
+            return self.get_paginated_response(data)
+        rows = list(queryset)
+        with measure("serialize"):
+            return Response(flat.serialize(rows))
@@ -0,0 +1,752 @@
+"""
+Synthetic fleets of sites, instruments and their history for scale testing.
+
+``FleetGenerator`` creates departments with users of every role, sites and
+their locations, sensor and measurement types, and instruments with years of
+history: calibrations and their certificates, maintenance, reviews and issues.
+It is meant for millions of rows:
+
+- instruments are generated in chunks, each written with ``bulk_create`` in
+  one transaction, so memory use stays flat and the chunks already written
+  are kept if a run is interrupted. On PostgreSQL, chunks can be written by
+  several processes at once;
+- every instrument draws its values from its own random generator, seeded
+  with the run's seed and the instrument's number, so a fleet made on a given
+  day is the same whatever the chunk and batch sizes;
+- rows carry the timestamps of their place in the history rather than the
+  time of the run, so ``created_at`` spreads over the years as it does in a
+  real database.
+
+The history respects the models' invariants. Certificates are issued in
+version chains in which every version but the last is superseded, and
+completed calibrations cite the last version. An instrument's status follows
+its open calibration or maintenance, its review status and dates follow its
+reviews, its history has the period of its current status, and it has its
+sensor and measurement types.
+
+Primary keys of bulk-created rows are needed to link them, so this requires a
+database that returns them (PostgreSQL, or SQLite 3.35 and later).
+"""
+
+import multiprocessing
+import random
+from collections import Counter
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection, connections, transaction
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from .models import (
+    CalibrationCertificate,
+    CalibrationRecord,
+    Department,
+    Instrument,
+    InstrumentHistory,
+    Issue,
+    Location,
+    MaintenanceRecord,
+    MeasurementType,
+    Review,
+    SensorType,
+    Site,
+)
+from .capabilities import refresh_capabilities
+from .read_models import refresh_instrument_summaries
+from .trees import invalidate_site_trees
+
+User = get_user_model()
+
+ROLES = [role for role, _ in User.ROLE_CHOICES]
+
+MANUFACTURERS = ["Fluke", "Keysight", "Vaisala", "Omega", "Yokogawa", "Druck"]
+PARAMETERS = ["temperature", "pressure", "humidity", "voltage", "flow", "ph"]
+CATEGORIES = [choice for choice, _ in Instrument.CATEGORY_CHOICES]
+PRIORITIES = [choice for choice, _ in Issue.PRIORITY_CHOICES]
+MAINTENANCE_TYPES = [choice for choice, _ in MaintenanceRecord.MAINTENANCE_TYPES]
+
+# Current states of instruments and how common they are
+STATES = ["active", "maintenance", "calibration", "inactive"]
+STATE_WEIGHTS = [80, 7, 8, 5]
+
+# Models of an instrument's history, in the order they are written
+SensorAssignment = Instrument.sensor_types.through
+MeasurementAssignment = Instrument.measurement_types.through
+HISTORY_MODELS = [
+    Instrument,
+    CalibrationCertificate,
+    CalibrationRecord,
+    MaintenanceRecord,
+    Review,
+    Issue,
+    SensorAssignment,
+    MeasurementAssignment,
+    InstrumentHistory,
+]
+# Those with created_at and updated_at
+DATED_MODELS = HISTORY_MODELS[:6]
+
+# The generator of the process, inherited by workers writing in parallel
+_generator = None
+
+
+def _write_chunk(chunk):
+    return _generator.write_chunk(*chunk)
+
+
+def _degrees(value):
+    return Decimal(value).quantize(Decimal("0.000001"))
+
+
+@contextmanager
+def historical_timestamps(models):
+    """Let ``created_at`` and ``updated_at`` be set explicitly on models."""
+    fields = [
+        model._meta.get_field(name)
+        for model in models
+        for name in ("created_at", "updated_at")
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Reference:
+    """Rows shared by all instruments, created before them."""
+
+    def __init__(self, departments, users, locations, sensor_types, measurement_types):
+        self.departments = list(departments)
+        self.locations = list(locations)
+        self.sensor_types = list(sensor_types)
+        self.measurement_types = list(measurement_types)
+        self.admins = [user for user in users if user.role == "admin"]
+        self.requesters = [
+            user for user in users if user.role in ("manager", "researcher")
+        ]
+        self.technicians = {}
+        for user in users:
+            if user.role == "technician":
+                self.technicians.setdefault(user.department_id, []).append(user)
+
+
+class FleetGenerator:
+    """
+    Create a reproducible fleet.
+
+    ``prefix`` is added to codes, serial numbers, usernames and certificate
+    numbers, so fleets with different prefixes can share a database. Each
+    department gets ``users_per_role`` users of every role, all with
+    ``password``. Instruments have up to ``years`` of history with a yearly
+    calibration, up to ``maintenance`` maintenance records, ``reviews``
+    completed reviews and ``issues`` issues, and certificates have up to
+    ``versions`` versions.
+    """
+
+    def __init__(
+        self,
+        seed=0,
+        prefix="LT",
+        departments=4,
+        users_per_role=2,
+        sites=5,
+        locations_per_site=10,
+        instruments=1000,
+        years=5,
+        versions=3,
+        maintenance=3,
+        reviews=2,
+        issues=2,
+        points=20,
+        password="loadtest",
+        chunk_size=1000,
+        batch_size=2000,
+        progress=None,
+    ):
+        self.seed = seed
+        self.prefix = prefix
+        self.counts = {
+            "departments": departments,
+            "users_per_role": users_per_role,
+            "sites": sites,
+            "locations_per_site": locations_per_site,
+            "instruments": instruments,
+        }
+        self.years = years
+        self.versions = versions
+        self.maintenance = maintenance
+        self.reviews = reviews
+        self.issues = issues
+        self.points = points
+        self.password = password
+        self.chunk_size = chunk_size
+        self.batch_size = batch_size
+        self.progress = progress
+        # Histories end at midnight, so fleets made the same day are the same
+        self.now = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
+
+    def random(self, key):
+        return random.Random(f"{self.seed}:{key}")
+
+    def create(self, model, objects):
+        """Insert objects in batches; they get their primary keys."""
+        return model.objects.bulk_create(objects, batch_size=self.batch_size)
+
+    def generate(self, workers=1):
+        """
+        Create the fleet and return the number of rows created per model.
+
+        On PostgreSQL, chunks can be written by several ``workers``, forked
+        processes with their own connections.
+        """
+        counts = Counter()
+        with transaction.atomic():
+            self.reference_data(counts)
+
+        total = self.counts["instruments"]
+        chunks = [
+            (start, min(start + self.chunk_size, total))
+            for start in range(0, total, self.chunk_size)
+        ]
+        if workers > 1 and connection.vendor == "postgresql":
+            results = self.write_in_parallel(chunks, workers)
+        else:
+            results = (self.write_chunk(*chunk) for chunk in chunks)
+        done = 0
+        for chunk_counts in results:
+            counts.update(chunk_counts)
+            done += chunk_counts[Instrument._meta.verbose_name_plural]
+            if self.progress:
+                self.progress(done, total)
+        invalidate_site_trees(
+            site_ids={location.site_id for location in self.reference.locations},
+            sites_changed=True,
+        )
+        return dict(counts)
+
+    def write_in_parallel(self, chunks, workers):
+        """Write chunks in forked processes, yielding their counts."""
+        global _generator
+        _generator = self
+        # Load the reference data once, and let each worker connect itself
+        self.reference
+        connections.close_all()
+        with multiprocessing.get_context("fork").Pool(workers) as pool:
+            yield from pool.imap_unordered(_write_chunk, chunks)
+
+    def write_chunk(self, start, stop):
+        """Create instruments ``start`` to ``stop`` in one transaction."""
+        rows = {model: [] for model in HISTORY_MODELS}
+        for number in range(start, stop):
+            self.instrument(number, rows)
+        counts = Counter()
+        with historical_timestamps(DATED_MODELS), transaction.atomic():
+            for model, objects in rows.items():
+                self.create(model, objects)
+                counts[model._meta.verbose_name_plural] += len(objects)
+            instrument_ids = [instrument.pk for instrument in rows[Instrument]]
+            refresh_instrument_summaries(instrument_ids)
+            refresh_capabilities(instrument_ids)
+        return counts
+
+    @cached_property
+    def reference(self):
+        """The rows created by ``reference_data``, in the order created."""
+        departments = list(
+            Department.objects.filter(code__in=self.department_codes).order_by("pk")
+        )
+        return Reference(
+            departments,
+            User.objects.filter(department__in=departments).order_by("pk"),
+            Location.objects.filter(site__code__in=self.site_codes).order_by("pk"),
+            SensorType.objects.filter(name__in=self.sensor_type_names).order_by("pk"),
+            MeasurementType.objects.filter(
+                name__in=self.measurement_type_names
+            ).order_by("pk"),
+        )
+
+    @property
+    def department_codes(self):
+        return [f"{self.prefix}D{n}" for n in range(self.counts["departments"])]
+
+    @property
+    def site_codes(self):
+        return [f"{self.prefix}S{n}" for n in range(self.counts["sites"])]
+
+    @property
+    def sensor_type_names(self):
+        return [f"{self.prefix} {name.title()} Sensor" for name in PARAMETERS]
+
+    @property
+    def measurement_type_names(self):
+        return [f"{self.prefix} {name.title()}" for name in PARAMETERS]
+
+    def reference_data(self, counts):
+        rng = self.random("reference")
+        departments = self.create(
+            Department,
+            [
+                Department(name=f"Department {n}", code=code)
+                for n, code in enumerate(self.department_codes)
+            ],
+        )
+
+        # Hashing is slow on purpose, so every user shares one hash
+        password = make_password(self.password)
+        users = self.create(
+            User,
+            [
+                User(
+                    username=f"{self.prefix.lower()}-{role}-{d}-{n}",
+                    email=f"{self.prefix.lower()}-{role}-{d}-{n}@example.com",
+                    first_name=role.title(),
+                    last_name=f"{department.code} {n}",
+                    password=password,
+                    role=role,
+                    is_staff=role == "admin",
+                    is_approved=True,
+                    department=department,
+                )
+                for d, department in enumerate(departments)
+                for role in ROLES
+                for n in range(self.counts["users_per_role"])
+            ],
+        )
+        managers = [user for user in users if user.role == "manager"]
+
+        sites = self.create(
+            Site,
+            [
+                Site(
+                    name=f"Site {n}",
+                    code=code,
+                    address=f"{n} Research Park",
+                    contact_person=rng.choice(managers),
+                    contact_email=f"site{n}@example.com",
+                    contact_phone=f"+44 1000 {n:06d}",
+                    latitude=_degrees(rng.uniform(50, 58)),
+                    longitude=_degrees(rng.uniform(-6, 2)),
+                )
+                for n, code in enumerate(self.site_codes)
+            ],
+        )
+        # The labs of a site are spread over a few hundred metres around it
+        locations = self.create(
+            Location,
+            [
+                Location(
+                    name=f"{site.name} Lab {n}",
+                    building=f"Building {n // 4}",
+                    room=f"{n:03d}",
+                    site=site,
+                    latitude=_degrees(
+                        float(site.latitude) + rng.uniform(-0.003, 0.003)
+                    ),
+                    longitude=_degrees(
+                        float(site.longitude) + rng.uniform(-0.005, 0.005)
+                    ),
+                )
+                for site in sites
+                for n in range(self.counts["locations_per_site"])
+            ],
+        )
+        sensor_types = self.create(
+            SensorType,
+            [
+                SensorType(
+                    name=name,
+                    unit=parameter[:3],
+                    min_range=Decimal("0"),
+                    max_range=Decimal("1000"),
+                    accuracy=Decimal("0.5"),
+                )
+                for parameter, name in zip(PARAMETERS, self.sensor_type_names)
+            ],
+        )
+        measurement_types = self.create(
+            MeasurementType,
+            [
+                MeasurementType(name=name, standard="ISO 17025")
+                for name in self.measurement_type_names
+            ],
+        )
+        for model, objects in [
+            (Department, departments),
+            (User, users),
+            (Site, sites),
+            (Location, locations),
+            (SensorType, sensor_types),
+            (MeasurementType, measurement_types),
+        ]:
+            counts[model._meta.verbose_name_plural] += len(objects)
+
+    def instrument(self, number, rows):
+        """Add an instrument and its history to ``rows``."""
+        reference = self.reference
+        rng = self.random(number)
+        department = rng.choice(reference.departments)
+        commissioned = self.now - timedelta(
+            days=rng.randint(90, 365 * self.years), minutes=rng.randint(0, 1439)
+        )
+        instrument = Instrument(
+            name=f"{rng.choice(PARAMETERS).title()} Sensor {number}",
+            serial_number=f"{self.prefix}-{number:08d}",
+            model=f"M{rng.randint(100, 999)}",
+            manufacturer=rng.choice(MANUFACTURERS),
+            category=rng.choice(CATEGORIES),
+            location=rng.choice(reference.locations),
+            department=department,
+            status=rng.choices(STATES, STATE_WEIGHTS)[0],
+            resolution=Decimal(rng.randint(1, 1000)) / 1000,
+            created_at=commissioned,
+            updated_at=commissioned,
+        )
+        rows[Instrument].append(instrument)
+        for sensor_type in rng.sample(reference.sensor_types, rng.randint(1, 3)):
+            rows[SensorAssignment].append(
+                SensorAssignment(instrument=instrument, sensortype=sensor_type)
+            )
+        for measurement_type in rng.sample(
+            reference.measurement_types, rng.randint(1, 3)
+        ):
+            rows[MeasurementAssignment].append(
+                MeasurementAssignment(
+                    instrument=instrument, measurementtype=measurement_type
+                )
+            )
+
+        technicians = reference.technicians.get(department.pk) or [
+            user for users in reference.technicians.values() for user in users
+        ]
+        history = History(self, rng, instrument, technicians, reference, rows)
+        history.calibrations()
+        history.maintenance()
+        history.reviews()
+        history.issues()
+        instrument.updated_at = history.latest
+
+        # Instruments were active until they entered their current status
+        since = history.status_since or history.latest
+        if instrument.status == "active" or since <= instrument.created_at:
+            since = instrument.created_at
+        else:
+            rows[InstrumentHistory].append(
+                self.period(instrument, "active", instrument.created_at, since)
+            )
+        rows[InstrumentHistory].append(
+            self.period(instrument, instrument.status, since, None)
+        )
+
+    def period(self, instrument, status, valid_from, valid_to):
+        return InstrumentHistory(
+            instrument=instrument,
+            location=instrument.location,
+            department=instrument.department,
+            status=status,
+            valid_from=valid_from,
+            valid_to=valid_to,
+        )
+
+    def calibration_data(self, rng):
+        data = {}
+        for parameter in rng.sample(PARAMETERS, rng.randint(1, 4)):
+            reference = [round(i * 10.0, 3) for i in range(self.points)]
+            data[parameter] = {
+                "reference_values": reference,
+                "measured_values": [
+                    round(value + rng.gauss(0, 0.05), 3) for value in reference
+                ],
+                "correlation_coefficient": round(rng.uniform(0.995, 1), 5),
+                "uncertainty": round(rng.uniform(0.01, 0.2), 3),
+            }
+        return data
+
+
+class History:
+    """The records of one instrument from its commissioning until now."""
+
+    def __init__(self, fleet, rng, instrument, technicians, reference, rows):
+        self.fleet = fleet
+        self.rng = rng
+        self.instrument = instrument
+        self.technicians = technicians
+        self.reference = reference
+        self.rows = rows
+        self.now = fleet.now
+        self.latest = instrument.created_at
+        # When an open calibration or maintenance began
+        self.status_since = None
+
+    def changed(self, when):
+        self.latest = max(self.latest, when)
+        return when
+
+    def between(self, start, end):
+        """Return a random time between two others."""
+        seconds = max(int((end - start).total_seconds()), 1)
+        return start + timedelta(seconds=self.rng.randint(0, seconds))
+
+    def calibrations(self):
+        """Yearly calibrations, then the open or scheduled one."""
+        rng = self.rng
+        instrument = self.instrument
+        performed = instrument.created_at + timedelta(days=rng.randint(0, 30))
+        last_performed = None
+        first = True
+        while performed < self.now - timedelta(days=3):
+            scheduled_at = performed - timedelta(days=rng.randint(7, 60))
+            if rng.random() < 0.03:
+                self.rows[CalibrationRecord].append(
+                    CalibrationRecord(
+                        instrument=instrument,
+                        performed_by=rng.choice(self.technicians),
+                        calibration_type="routine",
+                        description=f"Calibration of {instrument.serial_number}",
+                        status="cancelled",
+                        next_calibration_date=performed,
+                        created_at=scheduled_at,
+                        updated_at=self.changed(performed),
+                    )
+                )
+            else:
+                certificate = self.certificate_chain(performed, first)
+                self.rows[CalibrationRecord].append(
+                    CalibrationRecord(
+                        instrument=instrument,
+                        performed_by=certificate.created_by,
+                        calibration_type="routine",
+                        description=f"Calibration of {instrument.serial_number}",
+                        status="completed",
+                        date_performed=performed,
+                        next_calibration_date=performed + timedelta(days=365),
+                        certificate=certificate,
+                        created_at=scheduled_at,
+                        updated_at=self.changed(certificate.created_at),
+                    )
+                )
+                last_performed = performed
+                first = False
+            performed += timedelta(days=365 + rng.randint(-10, 10))
+
+        if instrument.status == "inactive":
+            return
+        due = (last_performed or instrument.created_at) + timedelta(days=365)
+        if instrument.status == "calibration":
+            started = self.changed(self.now - timedelta(hours=rng.randint(1, 72)))
+            self.status_since = started
+            self.rows[CalibrationRecord].append(
+                CalibrationRecord(
+                    instrument=instrument,
+                    performed_by=rng.choice(self.technicians),
+                    calibration_type="routine",
+                    description=f"Calibration of {instrument.serial_number}",
+                    status="in_progress",
+                    date_performed=started,
+                    next_calibration_date=started + timedelta(days=365),
+                    created_at=min(due, started) - timedelta(days=30),
+                    updated_at=started,
+                )
+            )
+        else:
+            # Overdue calibrations were scheduled a day ago at the latest
+            scheduled_at = self.changed(
+                min(due - timedelta(days=30), self.now - timedelta(days=1))
+            )
+            self.rows[CalibrationRecord].append(
+                CalibrationRecord(
+                    instrument=instrument,
+                    performed_by=rng.choice(self.technicians),
+                    calibration_type="routine",
+                    description=f"Calibration of {instrument.serial_number}",
+                    status="scheduled",
+                    next_calibration_date=due,
+                    created_at=scheduled_at,
+                    updated_at=scheduled_at,
+                )
+            )
+
+    def certificate_chain(self, performed, first):
+        """
+        Add the versions of one calibration's certificate and return the last.
+
+        Corrected versions are issued a few weeks apart, superseding the
+        previous one, and every version was approved when issued.
+        """
+        rng = self.rng
+        number = (
+            f"{self.instrument.serial_number}-"
+            f"{performed.year}{performed.month:02d}{performed.day:02d}"
+        )
+        versions = 1
+        while versions < self.fleet.versions and rng.random() < 0.15:
+            versions += 1
+        data = self.fleet.calibration_data(rng)
+        created_by = rng.choice(self.technicians)
+        issued = performed + timedelta(days=rng.randint(1, 5))
+        certificate = None
+        for version in range(1, versions + 1):
+            if version > 1:
+                issued = min(
+                    issued + timedelta(days=rng.randint(3, 30)),
+                    self.now - timedelta(hours=1),
+                )
+            reviewed = min(issued + timedelta(days=1), self.now)
+            certificate = CalibrationCertificate(
+                certificate_number=number,
+                version=version,
+                status=(
+                    CalibrationCertificate.APPROVED
+                    if version == versions
+                    else CalibrationCertificate.SUPERSEDED
+                ),
+                issue_date=issued.date(),
+                expiry_date=(performed + timedelta(days=365)).date(),
+                certificate_type="INITIAL" if first else "ROUTINE",
+                created_by=created_by,
+                calibration_data=data,
+                reviewer=rng.choice(self.reference.admins),
+                review_date=reviewed,
+                review_notes="Approved",
+                is_approved=True,
+                created_at=issued,
+                updated_at=reviewed,
+            )
+            self.rows[CalibrationCertificate].append(certificate)
+        return certificate
+
+    def maintenance(self):
+        rng = self.rng
+        instrument = self.instrument
+        for _ in range(rng.randint(0, self.fleet.maintenance)):
+            start = self.between(instrument.created_at, self.now - timedelta(days=2))
+            end = start + timedelta(hours=rng.randint(1, 48))
+            self.rows[MaintenanceRecord].append(
+                MaintenanceRecord(
+                    instrument=instrument,
+                    performed_by=rng.choice(self.technicians),
+                    maintenance_type=rng.choice(MAINTENANCE_TYPES),
+                    description=f"Service of {instrument.serial_number}",
+                    status="completed",
+                    start_date=start,
+                    end_date=end,
+                    created_at=start - timedelta(days=rng.randint(0, 14)),
+                    updated_at=self.changed(end),
+                )
+            )
+        if instrument.status == "maintenance":
+            start = self.changed(self.now - timedelta(hours=rng.randint(1, 240)))
+            self.status_since = start
+            self.rows[MaintenanceRecord].append(
+                MaintenanceRecord(
+                    instrument=instrument,
+                    performed_by=rng.choice(self.technicians),
+                    maintenance_type="corrective",
+                    description=f"Repair of {instrument.serial_number}",
+                    status="in_progress",
+                    start_date=start,
+                    created_at=start,
+                    updated_at=start,
+                )
+            )
+
+    def reviews(self):
+        """Completed reviews, then possibly an open one."""
+        rng = self.rng
+        instrument = self.instrument
+        for _ in range(rng.randint(0, self.fleet.reviews)):
+            requested = self.between(
+                instrument.created_at, self.now - timedelta(days=31)
+            )
+            closed = requested + timedelta(days=rng.randint(1, 30))
+            status = "cancelled" if rng.random() < 0.05 else "completed"
+            self.rows[Review].append(
+                Review(
+                    instrument=instrument,
+                    requested_by=rng.choice(self.reference.requesters),
+                    assigned_to=rng.choice(self.technicians),
+                    status=status,
+                    priority=rng.choice(PRIORITIES),
+                    reason=f"Periodic review of {instrument.serial_number}",
+                    created_at=requested,
+                    updated_at=self.changed(closed),
+                )
+            )
+            if status == "completed" and (
+                instrument.last_review_date is None
+                or closed > instrument.last_review_date
+            ):
+                instrument.last_review_date = closed
+                instrument.next_review_date = closed + timedelta(days=365)
+                instrument.review_status = "completed"
+
+        if rng.random() < 0.1:
+            status = rng.choice(["pending", "in_progress"])
+            requested = self.changed(self.now - timedelta(days=rng.randint(1, 30)))
+            self.rows[Review].append(
+                Review(
+                    instrument=instrument,
+                    requested_by=rng.choice(self.reference.requesters),
+                    assigned_to=(
+                        rng.choice(self.technicians)
+                        if status == "in_progress"
+                        else None
+                    ),
+                    status=status,
+                    priority=rng.choice(PRIORITIES),
+                    reason=f"Review of {instrument.serial_number} requested",
+                    created_at=requested,
+                    updated_at=requested,
+                )
+            )
+            instrument.review_status = status
+
+    def issues(self):
+        """Closed issues, then possibly an open one."""
+        rng = self.rng
+        instrument = self.instrument
+        reporters = self.technicians + self.reference.requesters
+        for _ in range(rng.randint(0, self.fleet.issues)):
+            reported = self.between(instrument.created_at, self.now - timedelta(days=2))
+            self.rows[Issue].append(
+                Issue(
+                    instrument=instrument,
+                    title=f"{rng.choice(PARAMETERS).title()} drift",
+                    description="Readings outside tolerance",
+                    priority=rng.choice(PRIORITIES),
+                    status=rng.choice(["resolved", "closed"]),
+                    reported_by=rng.choice(reporters),
+                    assigned_to=rng.choice(self.technicians),
+                    created_at=reported,
+                    updated_at=self.changed(
+                        min(reported + timedelta(days=rng.randint(1, 20)), self.now)
+                    ),
+                )
+            )
+        if rng.random() < 0.1:
+            status = rng.choice(["open", "in_progress"])
+            reported = self.changed(self.now - timedelta(hours=rng.randint(1, 500)))
+            self.rows[Issue].append(
+                Issue(
+                    instrument=instrument,
+                    title=f"{rng.choice(PARAMETERS).title()} drift",
+                    description="Readings outside tolerance",
+                    priority=rng.choice(PRIORITIES),
+                    status=status,
+                    reported_by=rng.choice(reporters),
+                    assigned_to=(
+                        rng.choice(self.technicians)
+                        if status == "in_progress"
+                        else None
+                    ),
+                    created_at=reported,
+                    updated_at=reported,
+                )
+            )
@@ -0,0 +1,251 @@
+"""
+Nearest-instrument search over the coordinates of locations.
+
+Instruments are where their location is, so a search ranks the locations by
+great-circle distance from a point and reads the matching instruments of the
+nearest ones first, in growing batches, until it has enough. Filters on the
+instruments (sensor type, status, calibration) are applied by the database to
+each batch, which returns its instruments already sorted and limited.
+
+On PostgreSQL with the PostGIS extension, the database ranks the locations
+through a GiST index on their geography. Elsewhere, as on SQLite, a k-d tree
+of the locations' points on the unit sphere is kept in memory: the straight
+line between two points grows with the great-circle distance between them,
+so the nearest points in the tree are the nearest on the globe. Each process
+checks the number of locations and their latest ``updated_at`` with one
+aggregate query per search and rebuilds its tree when either has changed, so
+every process sees new, moved and deleted locations without a shared cache.
+Writes that move locations with ``update()`` must set ``updated_at`` too.
+"""
+
+import heapq
+import itertools
+import math
+
+from django.db import connections
+from django.db.models import Case, Count, FloatField, Max, Value, When
+
+from .models import Location
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Must match the expression of the index created by migration 0015
+LOCATION_GEOGRAPHY = (
+    "geography(ST_SetSRID(ST_MakePoint("
+    "longitude::double precision, latitude::double precision), 4326))"
+)
+
+# Locations read per batch, doubling up to the maximum
+FIRST_BATCH = 16
+MAX_BATCH = 256
+
+_postgis = {}
+_tree = None
+
+
+def to_xyz(latitude, longitude):
+    """Return the point on the unit sphere at a latitude and longitude."""
+    phi = math.radians(latitude)
+    theta = math.radians(longitude)
+    return (
+        math.cos(phi) * math.cos(theta),
+        math.cos(phi) * math.sin(theta),
+        math.sin(phi),
+    )
+
+
+def chord_to_km(chord):
+    """Return the great-circle distance between points a chord apart."""
+    return 2 * EARTH_RADIUS_KM * math.asin(min(chord / 2, 1.0))
+
+
+def distance_km(latitude1, longitude1, latitude2, longitude2):
+    """Return the great-circle distance between two points in km."""
+    return chord_to_km(
+        math.dist(to_xyz(latitude1, longitude1), to_xyz(latitude2, longitude2))
+    )
+
+
+class _Node:
+    __slots__ = ("point", "item", "left", "right", "low", "high")
+
+    def __init__(self, point, item, left, right, low, high):
+        self.point = point
+        self.item = item
+        self.left = left
+        self.right = right
+        self.low = low
+        self.high = high
+
+
+class KDTree:
+    """
+    A k-d tree of points, each with an item.
+
+    ``nearest()`` walks the tree best first, so it yields every point in
+    order of distance and the caller stops when it has seen enough.
+    """
+
+    def __init__(self, points):
+        self.size = len(points)
+        self.root = self._build(list(points), 0)
+
+    def _build(self, points, depth):
+        if not points:
+            return None
+        axis = depth % 3
+        points.sort(key=lambda point: point[0][axis])
+        middle = len(points) // 2
+        point, item = points[middle]
+        coordinates = [point for point, _ in points]
+        return _Node(
+            point,
+            item,
+            self._build(points[:middle], depth + 1),
+            self._build(points[middle + 1:], depth + 1),
+            tuple(map(min, zip(*coordinates))),
+            tuple(map(max, zip(*coordinates))),
+        )
+
+    def nearest(self, point):
+        """Yield ``(distance, item)`` for every point, nearest first."""
+        counter = itertools.count()
+        heap = []
+        if self.root is not None:
+            heap.append((0.0, 0, next(counter), self.root))
+        while heap:
+            distance, is_point, _, value = heapq.heappop(heap)
+            if is_point:
+                yield distance, value
+                continue
+            heapq.heappush(
+                heap, (math.dist(point, value.point), 1, next(counter), value.item)
+            )
+            for child in (value.left, value.right):
+                if child is not None:
+                    bound = _box_distance(point, child.low, child.high)
+                    heapq.heappush(heap, (bound, 0, next(counter), child))
+
+
+def _box_distance(point, low, high):
+    return math.sqrt(
+        sum(
+            (lo - p) ** 2 if p < lo else (p - hi) ** 2 if p > hi else 0.0
+            for p, lo, hi in zip(point, low, high)
+        )
+    )
+
+
+def _version(using):
+    stats = Location.objects.using(using).aggregate(
+        count=Count("pk"), updated_at=Max("updated_at")
+    )
+    return (using, stats["count"], stats["updated_at"])
+
+
+def location_tree(using="default"):
+    """Return the k-d tree of the locations with coordinates."""
+    global _tree
+    version = _version(using)
+    if _tree is None or _tree[0] != version:
+        rows = (
+            Location.objects.using(using)
+            .exclude(latitude=None)
+            .exclude(longitude=None)
+            .values_list("pk", "latitude", "longitude")
+        )
+        _tree = (
+            version,
+            KDTree(
+                [
+                    (to_xyz(float(lat), float(lon)), pk)
+                    for pk, lat, lon in rows.iterator()
+                ]
+            ),
+        )
+    return _tree[1]
+
+
+def has_postgis(using="default"):
+    if using not in _postgis:
+        connection = connections[using]
+        found = False
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'postgis'")
+                found = cursor.fetchone() is not None
+        _postgis[using] = found
+    return _postgis[using]
+
+
+def nearest_locations(latitude, longitude, using="default"):
+    """Yield ``(distance_km, location_id)`` for located locations, nearest first."""
+    if has_postgis(using):
+        yield from _postgis_nearest_locations(latitude, longitude, using)
+        return
+    point = to_xyz(latitude, longitude)
+    for chord, pk in location_tree(using).nearest(point):
+        yield chord_to_km(chord), pk
+
+
+def _postgis_nearest_locations(latitude, longitude, using):
+    here = "geography(ST_SetSRID(ST_MakePoint(%s, %s), 4326))"
+    sql = (
+        f"SELECT ST_Distance({LOCATION_GEOGRAPHY}, {here}) / 1000, id "
+        "FROM assets_location "
+        "WHERE latitude IS NOT NULL AND longitude IS NOT NULL "
+        f"ORDER BY {LOCATION_GEOGRAPHY} <-> {here}, id "
+        "LIMIT %s OFFSET %s"
+    )
+    size = MAX_BATCH
+    offset = 0
+    while True:
+        with connections[using].cursor() as cursor:
+            cursor.execute(
+                sql, [longitude, latitude, longitude, latitude, size, offset]
+            )
+            rows = cursor.fetchall()
+        yield from rows
+        if len(rows) < size:
+            return
+        offset += size
+
+
+def _batches(iterable):
+    iterator = iter(iterable)
+    size = FIRST_BATCH
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+        size = min(size * 2, MAX_BATCH)
+
+
+def nearest_instruments(
+    instruments, latitude, longitude, limit=10, max_distance_km=None
+):
+    """
+    Return up to ``limit`` instruments of a queryset nearest to a point, as
+    ``(distance_km, instrument)`` pairs, nearest first.
+
+    Instruments at the same distance are ordered by name. Instruments of
+    locations without coordinates are never found.
+    """
+    locations = nearest_locations(latitude, longitude, using=instruments.db)
+    if max_distance_km is not None:
+        locations = itertools.takewhile(
+            lambda row: row[0] <= max_distance_km, locations
+        )
+    found = []
+    for batch in _batches(locations):
+        distance = Case(
+            *(When(location_id=pk, then=Value(km)) for km, pk in batch),
+            output_field=FloatField(),
+        )
+        rows = (
+            instruments.filter(location__in=[pk for _, pk in batch])
+            .annotate(distance_km=distance)
+            .order_by("distance_km", "name", "pk")[: limit - len(found)]
+        )
+        found.extend((row.distance_km, row) for row in rows)
+        if len(found) >= limit:
+            break
+    return found
@@ -0,0 +1,481 @@
+"""
+Bulk import of sites, departments, locations, capability types and instruments.
+
+Rows are streamed from CSV, JSON Lines, JSON or XLSX files and processed in
+chunks. Related rows are named by natural key (a site's code, a sensor type's
+name) and resolved through lookup maps loaded with one query per referenced
+table. Each chunk is validated field by field without touching the database,
+checked for duplicates with one query, and written with ``bulk_create`` plus
+bulk inserts into the many-to-many through tables. Created instruments are
+recorded in the audit trail, as they would be when saved one by one.
+
+Imports are all or nothing: when any row is invalid the whole import is rolled
+back and the report lists the errors. A dry run validates without writing.
+"""
+
+import codecs
+import csv
+import json
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import NON_FIELD_ERRORS, ValidationError
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+from . import audit
+from .models import (
+    AuditEvent,
+    Department,
+    Instrument,
+    Location,
+    MeasurementType,
+    SensorType,
+    Site,
+    start_periods,
+)
+from .capabilities import schedule_capability_refresh
+from .read_models import schedule_refresh
+from .trees import invalidate_site_trees
+
+FORMATS = ("csv", "jsonl", "json", "xlsx")
+
+# Errors listed in a report; further errors are only counted
+MAX_REPORTED_ERRORS = 100
+
+# Separator between several related keys in one cell
+MANY_SEPARATOR = ";"
+
+AMBIGUOUS = object()
+
+
+def detect_format(name):
+    """Return the import format implied by a file name's extension."""
+    extension = name.rsplit(".", 1)[-1].lower() if "." in name else ""
+    if extension == "ndjson":
+        extension = "jsonl"
+    if extension not in FORMATS:
+        raise ValueError(f"Cannot tell the format of {name}; use one of {FORMATS}")
+    return extension
+
+
+def read_rows(file, file_format):
+    """
+    Yield ``(row_number, row)`` pairs from a binary file.
+
+    CSV, JSON Lines and XLSX files are read a row at a time; a JSON file must
+    hold an array of objects and is loaded whole.
+    """
+    if file_format == "csv":
+        reader = csv.DictReader(codecs.iterdecode(file, "utf-8-sig"))
+        # Row 1 is the header
+        yield from enumerate(reader, start=2)
+    elif file_format == "jsonl":
+        for number, line in enumerate(file, start=1):
+            if line.strip():
+                yield number, json.loads(line)
+    elif file_format == "json":
+        rows = json.load(file)
+        if not isinstance(rows, list):
+            raise ValueError("A JSON import must be an array of objects")
+        yield from enumerate(rows, start=1)
+    elif file_format == "xlsx":
+        yield from _read_xlsx(file)
+    else:
+        raise ValueError(f"Unsupported format {file_format}; use one of {FORMATS}")
+
+
+def _read_xlsx(file):
+    try:
+        import openpyxl
+    except ImportError:
+        raise ValueError("Reading XLSX files requires openpyxl")
+
+    workbook = openpyxl.load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [
+            "" if value is None else str(value).strip() for value in next(rows, ())
+        ]
+        for number, values in enumerate(rows, start=2):
+            if any(value is not None for value in values):
+                yield number, dict(zip(header, values))
+    finally:
+        workbook.close()
+
+
+def _clean(value):
+    """Normalize a cell: blank means missing, floats keep their short form."""
+    if isinstance(value, str):
+        value = value.strip()
+        return value or None
+    if isinstance(value, float):
+        # Avoid binary float artefacts in decimal fields
+        return repr(value)
+    return value
+
+
+class Reference:
+    """
+    A related row named in the import by its natural key.
+
+    ``lookups`` are key fields of the related model and ``columns`` the import
+    columns holding their values, in the same order.
+    """
+
+    def __init__(self, model, lookups, columns, required=True):
+        self.model = model
+        self.lookups = lookups
+        self.columns = columns
+        self.required = required
+
+    def load(self):
+        """
+        Return the whole natural key to primary key map, with one query.
+
+        Keys shared by several rows map to ``AMBIGUOUS``.
+        """
+        pks = {}
+        for values in self.model._default_manager.values_list(*self.lookups, "pk"):
+            key = tuple(str(value) for value in values[:-1])
+            pks[key] = AMBIGUOUS if key in pks else values[-1]
+        return pks
+
+    def describe(self, key, pk=None):
+        name = self.model._meta.verbose_name
+        if pk is AMBIGUOUS:
+            return f"More than one {name} matches '{'/'.join(key)}'"
+        return f"No {name} matches '{'/'.join(key)}'"
+
+
+class ImportSpec:
+    """
+    How rows of one import kind map onto a model.
+
+    ``key`` names the fields identifying a row, used to reject duplicates.
+    ``fields`` are read from columns of the same name, ``references`` are
+    foreign keys and ``many`` many-to-many fields, keyed by model field.
+    """
+
+    def __init__(self, model, key, fields, references=None, many=None, on_created=None):
+        self.model = model
+        self.key = key
+        self.fields = fields
+        self.references = references or {}
+        self.many = many or {}
+        self.on_created = on_created
+
+
+def _instruments_created(instruments):
+    start_periods(
+        [(i.pk, i.location_id, i.department_id, i.status) for i in instruments],
+        when=timezone.now(),
+    )
+    schedule_refresh([instrument.pk for instrument in instruments])
+    schedule_capability_refresh([instrument.pk for instrument in instruments])
+    invalidate_site_trees(
+        location_ids=[instrument.location_id for instrument in instruments]
+    )
+
+
+def _sites_created(sites):
+    invalidate_site_trees(sites_changed=True)
+
+
+def _locations_created(locations):
+    invalidate_site_trees(site_ids=[location.site_id for location in locations])
+    # bulk_create skips Location.save, so take the site's coordinates here
+    site = Site.objects.filter(pk=OuterRef("site"))
+    Location.objects.filter(
+        pk__in=[location.pk for location in locations],
+        latitude=None,
+        longitude=None,
+    ).update(
+        latitude=Subquery(site.values("latitude")),
+        longitude=Subquery(site.values("longitude")),
+        updated_at=timezone.now(),
+    )
+
+
+SPECS = {
+    "sites": ImportSpec(
+        Site,
+        key=("code",),
+        fields=(
+            "name",
+            "code",
+            "address",
+            "contact_email",
+            "contact_phone",
+            "is_active",
+            "latitude",
+            "longitude",
+        ),
+        references={
+            "contact_person": Reference(
+                get_user_model(), ("email",), ("contact_person",), required=False
+            ),
+        },
+        on_created=_sites_created,
+    ),
+    "departments": ImportSpec(Department, key=("code",), fields=("name", "code")),
+    "locations": ImportSpec(
+        Location,
+        key=("site", "name"),
+        fields=("name", "building", "room", "latitude", "longitude"),
+        references={"site": Reference(Site, ("code",), ("site",))},
+        on_created=_locations_created,
+    ),
+    "sensor_types": ImportSpec(
+        SensorType,
+        key=("name",),
+        fields=("name", "description", "unit", "min_range", "max_range", "accuracy"),
+    ),
+    "measurement_types": ImportSpec(
+        MeasurementType,
+        key=("name",),
+        fields=("name", "description", "standard"),
+    ),
+    "instruments": ImportSpec(
+        Instrument,
+        key=("serial_number",),
+        fields=(
+            "name",
+            "serial_number",
+            "model",
+            "manufacturer",
+            "category",
+            "status",
+            "resolution",
+        ),
+        references={
+            # Location names are only unique within a site
+            "location": Reference(
+                Location, ("site__code", "name"), ("site", "location")
+            ),
+            "department": Reference(Department, ("code",), ("department",)),
+        },
+        many={
+            "sensor_types": Reference(SensorType, ("name",), ("sensor_types",)),
+            "measurement_types": Reference(
+                MeasurementType, ("name",), ("measurement_types",)
+            ),
+        },
+        on_created=_instruments_created,
+    ),
+}
+
+
+class ImportReport:
+    """Outcome of an import, listing at most ``MAX_REPORTED_ERRORS`` errors."""
+
+    def __init__(self, kind, dry_run):
+        self.kind = kind
+        self.dry_run = dry_run
+        self.rows = 0
+        self.invalid_rows = 0
+        self.created = 0
+        self.error_count = 0
+        self.errors = []
+
+    @property
+    def committed(self):
+        return not self.dry_run and not self.error_count
+
+    def add_errors(self, number, errors):
+        self.invalid_rows += 1
+        for field, messages in errors.items():
+            for message in messages:
+                self.error_count += 1
+                if len(self.errors) < MAX_REPORTED_ERRORS:
+                    self.errors.append(
+                        {"row": number, "field": field, "message": message}
+                    )
+
+    def as_dict(self):
+        return {
+            "kind": self.kind,
+            "dry_run": self.dry_run,
+            "committed": self.committed,
+            "rows": self.rows,
+            "invalid_rows": self.invalid_rows,
+            "created": self.created,
+            "error_count": self.error_count,
+            "errors": self.errors,
+        }
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Importer:
+    """
+    Validates and writes rows of one import kind in chunks.
+    """
+
+    def __init__(self, kind, chunk_size=1000, dry_run=False):
+        if kind not in SPECS:
+            raise ValueError(f"Unknown import kind {kind}; use one of {sorted(SPECS)}")
+        self.spec = SPECS[kind]
+        self.model = self.spec.model
+        self.chunk_size = chunk_size
+        self.report = ImportReport(kind, dry_run)
+        self.seen = {}
+        self.pks = {}
+
+    def run(self, rows):
+        for reference in (*self.spec.references.values(), *self.spec.many.values()):
+            self.pks[reference] = reference.load()
+
+        rows = iter(rows)
+        try:
+            with transaction.atomic():
+                while chunk := list(islice(rows, self.chunk_size)):
+                    self.import_chunk(chunk)
+                if not self.report.committed:
+                    raise _Rollback()
+        except _Rollback:
+            self.report.created = 0
+        return self.report
+
+    def import_chunk(self, chunk):
+        built = []
+        for number, row in chunk:
+            self.report.rows += 1
+            instance, related, errors = self.build(row)
+            if errors:
+                self.report.add_errors(number, errors)
+            else:
+                built.append((number, instance, related))
+
+        existing = self.existing_keys([self.key(instance) for _, instance, _ in built])
+        valid = []
+        for number, instance, related in built:
+            key = self.key(instance)
+            if key in existing:
+                message = "Already exists"
+            elif key in self.seen:
+                message = f"Duplicate of row {self.seen[key]}"
+            else:
+                self.seen[key] = number
+                valid.append((instance, related))
+                continue
+            self.report.add_errors(number, {NON_FIELD_ERRORS: [message]})
+
+        # Once any row is invalid nothing will be kept, so stop writing
+        if valid and self.report.committed:
+            self.write(valid)
+
+    def build(self, row):
+        """Return an unsaved instance, its related keys and any errors."""
+        if not isinstance(row, dict):
+            return None, None, {NON_FIELD_ERRORS: ["Expected an object of columns"]}
+
+        errors = {}
+        values = {}
+        for name in self.spec.fields:
+            value = _clean(row.get(name))
+            if value is not None:
+                values[name] = value
+
+        for name, reference in self.spec.references.items():
+            key = tuple(_clean(row.get(column)) for column in reference.columns)
+            if None in key:
+                if reference.required:
+                    errors[name] = ["This field is required."]
+                continue
+            key = tuple(str(part) for part in key)
+            pk = self.pks[reference].get(key)
+            if pk is None or pk is AMBIGUOUS:
+                errors[name] = [reference.describe(key, pk)]
+            else:
+                values[self.model._meta.get_field(name).attname] = pk
+
+        related = {}
+        for name, reference in self.spec.many.items():
+            related[name] = []
+            for key in self.split(row.get(name)):
+                pk = self.pks[reference].get((key,))
+                if pk is None or pk is AMBIGUOUS:
+                    errors.setdefault(name, []).append(reference.describe((key,), pk))
+                elif pk not in related[name]:
+                    related[name].append(pk)
+
+        instance = self.model(**values)
+        # Foreign keys were resolved from the lookup maps; validating them
+        # again would query each one
+        exclude = [*self.spec.references, *self.spec.many]
+        try:
+            instance.clean_fields(exclude=exclude)
+        except ValidationError as exc:
+            exc.update_error_dict(errors)
+        else:
+            try:
+                instance.clean()
+            except ValidationError as exc:
+                exc.update_error_dict(errors)
+        return instance, related, errors
+
+    def split(self, value):
+        if value is None:
+            return []
+        if isinstance(value, (list, tuple)):
+            parts = value
+        else:
+            parts = str(value).split(MANY_SEPARATOR)
+        return [str(part).strip() for part in parts if str(part).strip()]
+
+    def key(self, instance):
+        return tuple(
+            str(getattr(instance, self.model._meta.get_field(name).attname))
+            for name in self.spec.key
+        )
+
+    def existing_keys(self, keys):
+        """Return which keys already exist, with one query."""
+        if not keys:
+            return set()
+        attnames = [self.model._meta.get_field(name).attname for name in self.spec.key]
+        rows = self.model._default_manager.filter(
+            **{f"{attnames[0]}__in": {key[0] for key in keys}}
+        ).values_list(*attnames)
+        return {tuple(str(value) for value in row) for row in rows}
+
+    def write(self, valid):
+        instances = [instance for instance, _ in valid]
+        created = self.model._default_manager.bulk_create(instances)
+        self.report.created += len(created)
+        # bulk_create sends no signals, so audit the created objects here
+        if self.model in audit.AUDITED_MODELS:
+            audit.record_many(
+                self.model,
+                [
+                    (instance.pk, audit.diff({}, audit.snapshot(instance)))
+                    for instance in created
+                ],
+                AuditEvent.CREATE,
+            )
+
+        for name in self.spec.many:
+            field = self.model._meta.get_field(name)
+            through = field.remote_field.through
+            source = f"{field.m2m_field_name()}_id"
+            target = f"{field.m2m_reverse_field_name()}_id"
+            through._default_manager.bulk_create(
+                [
+                    through(**{source: instance.pk, target: pk})
+                    for instance, related in valid
+                    for pk in related[name]
+                ]
+            )
+
+        if self.spec.on_created:
+            self.spec.on_created(created)
+
+
+def import_file(kind, file, file_format, chunk_size=1000, dry_run=False):
+    """Import a binary file of the given kind and format, returning the report."""
+    importer = Importer(kind, chunk_size=chunk_size, dry_run=dry_run)
+    return importer.run(read_rows(file, file_format))
@@ -0,0 +1,436 @@
+"""
+High-volume ingestion of historical calibration records.
+
+Tens of millions of legacy rows cannot go through the ORM, so an ingestion
+works on a staging table in three phases, each of which commits its progress
+on a ``CalibrationIngestion`` and can be resumed after an interruption:
+
+1. Load: the source CSV is streamed into an unlogged staging table with
+   ``COPY FROM STDIN``. A load that fails part way is discarded and redone.
+2. Validate: instruments, users and certificates are resolved from their
+   natural keys and the model's rules (valid choices, the next calibration
+   after the date performed, a certificate for completed calibrations) are
+   checked set-wise in SQL, one range of staging rows per batch.
+3. Merge: valid rows are inserted into the calibration record table with
+   ``INSERT ... SELECT``, one range per transaction, so a restarted merge
+   continues after the last committed batch without duplicating rows. The
+   inserted records are read back by id and recorded in the audit trail, in
+   the same transaction, under the ``ingest`` action.
+
+On databases other than PostgreSQL the staging table is filled with plain
+inserts instead of ``COPY``, which is only meant for development and tests.
+"""
+
+import codecs
+import csv
+from datetime import timezone as dt_timezone
+
+from django.contrib.auth import get_user_model
+from django.db import connections, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import audit
+from .models import (
+    AuditEvent,
+    CalibrationCertificate,
+    CalibrationIngestion,
+    CalibrationRecord,
+    Instrument,
+)
+from .read_models import schedule_refresh
+
+# Columns of the source CSV. Instruments are named by serial number, users by
+# username and certificates by number, with the latest version unless one is
+# given. created_at defaults to the date performed, so that history is stored
+# in the partition for its year (see partitioning.py).
+COLUMNS = (
+    "instrument",
+    "performed_by",
+    "calibration_type",
+    "description",
+    "status",
+    "date_performed",
+    "next_calibration_date",
+    "certificate",
+    "certificate_version",
+    "created_at",
+)
+REQUIRED_COLUMNS = (
+    "instrument",
+    "performed_by",
+    "calibration_type",
+    "description",
+    "next_calibration_date",
+)
+
+_DATETIME_COLUMNS = ("date_performed", "next_calibration_date", "created_at")
+
+# Rows inserted per statement when COPY is not available
+_INSERT_CHUNK_SIZE = 1000
+
+
+class CalibrationIngestor:
+    """
+    Runs the phases of one ``CalibrationIngestion``.
+
+    ``progress`` is called as ``progress(phase, done, total)`` after each
+    committed batch.
+    """
+
+    def __init__(self, ingestion, using="default", progress=None):
+        self.ingestion = ingestion
+        self.using = using
+        self.connection = connections[using]
+        self.progress = progress or (lambda phase, done, total: None)
+        self.table = self.quote(ingestion.staging_table)
+
+    def quote(self, name):
+        return self.connection.ops.quote_name(name)
+
+    def execute(self, sql, params=()):
+        with self.connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.rowcount
+
+    def fetch(self, sql, params=()):
+        with self.connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+    def save(self, *fields):
+        self.ingestion.save(using=self.using, update_fields=[*fields, "updated_at"])
+
+    @property
+    def postgresql(self):
+        return self.connection.vendor == "postgresql"
+
+    # Load
+
+    def load(self, file):
+        """
+        Stream a binary CSV file into a new staging table.
+
+        The header names the columns present, in any order. Does nothing if
+        the ingestion has already been loaded.
+        """
+        if self.ingestion.status != CalibrationIngestion.LOADING:
+            return
+
+        header = next(csv.reader([codecs.decode(file.readline(), "utf-8-sig")]), [])
+        header = [column.strip() for column in header]
+        unknown = set(header) - set(COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown columns: {', '.join(sorted(unknown))}")
+        missing = set(REQUIRED_COLUMNS) - set(header)
+        if missing:
+            raise ValueError(f"Missing columns: {', '.join(sorted(missing))}")
+
+        with transaction.atomic(using=self.using):
+            self.execute(f"DROP TABLE IF EXISTS {self.table}")
+            self.create_staging_table()
+            if self.postgresql:
+                self.copy(file, header)
+            else:
+                self.insert(file, header)
+            self.ingestion.staged_rows = self.fetch(
+                f"SELECT COUNT(*) FROM {self.table}"
+            )[0][0]
+            self.ingestion.status = CalibrationIngestion.LOADED
+            self.save("staged_rows", "status")
+        if self.postgresql:
+            self.execute(f"ANALYZE {self.table}")
+        self.progress("load", self.ingestion.staged_rows, self.ingestion.staged_rows)
+
+    def create_staging_table(self):
+        if self.postgresql:
+            # The primary key is added after the load, which is faster than
+            # maintaining it during COPY
+            create, id_column, datetime_type = (
+                "CREATE UNLOGGED TABLE",
+                "id bigserial",
+                "timestamp with time zone",
+            )
+        else:
+            create, id_column, datetime_type = (
+                "CREATE TABLE",
+                "id integer PRIMARY KEY AUTOINCREMENT",
+                "datetime",
+            )
+        self.execute(f"""
+            {create} {self.table} (
+                {id_column},
+                instrument text,
+                performed_by text,
+                calibration_type text,
+                description text,
+                status text,
+                date_performed {datetime_type},
+                next_calibration_date {datetime_type},
+                certificate text,
+                certificate_version integer,
+                created_at {datetime_type},
+                instrument_id bigint,
+                performed_by_id bigint,
+                certificate_id bigint,
+                error text
+            )
+            """)
+
+    def copy(self, file, header):
+        columns = ", ".join(self.quote(column) for column in header)
+        with self.connection.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY {self.table} ({columns}) FROM STDIN WITH (FORMAT csv)", file
+            )
+            cursor.execute(f"ALTER TABLE {self.table} ADD PRIMARY KEY (id)")
+
+    def insert(self, file, header):
+        columns = ", ".join(self.quote(column) for column in header)
+        placeholders = ", ".join(["%s"] * len(header))
+        sql = f"INSERT INTO {self.table} ({columns}) VALUES ({placeholders})"
+        reader = csv.reader(codecs.iterdecode(file, "utf-8"))
+        with self.connection.cursor() as cursor:
+            chunk = []
+            for values in reader:
+                chunk.append(
+                    [self.adapt(column, value) for column, value in zip(header, values)]
+                )
+                if len(chunk) == _INSERT_CHUNK_SIZE:
+                    cursor.executemany(sql, chunk)
+                    chunk = []
+            if chunk:
+                cursor.executemany(sql, chunk)
+
+    def adapt(self, column, value):
+        # Match COPY's CSV handling, where an empty field is NULL
+        if value == "":
+            return None
+        if column in _DATETIME_COLUMNS:
+            parsed = parse_datetime(value)
+            if parsed is None:
+                raise ValueError(f"Invalid {column}: {value}")
+            if timezone.is_naive(parsed):
+                parsed = timezone.make_aware(parsed, dt_timezone.utc)
+            return self.connection.ops.adapt_datetimefield_value(parsed)
+        return value
+
+    def check_staging(self):
+        """
+        Raise ValueError if the staged rows have been lost.
+
+        Crash recovery empties unlogged tables. The ingestion is then reset to
+        be loaded again from the same file; staging ids follow the file's row
+        order, so rows merged before the crash are not merged twice.
+        """
+        ingestion = self.ingestion
+        if ingestion.staging_table in self.connection.introspection.table_names():
+            last_id = self.fetch(f"SELECT MAX(id) FROM {self.table}")[0][0] or 0
+            if last_id >= ingestion.staged_rows:
+                return
+        ingestion.status = CalibrationIngestion.LOADING
+        ingestion.validated_id = 0
+        ingestion.invalid_rows = 0
+        self.save("status", "validated_id", "invalid_rows")
+        raise ValueError(
+            f"The staged rows of ingestion {ingestion.name} were lost; "
+            f"load the same file again to resume"
+        )
+
+    # Validate
+
+    def validate(self, batch_size=50000):
+        """
+        Resolve and check the staged rows in batches, recording any error.
+
+        Returns the number of invalid rows.
+        """
+        ingestion = self.ingestion
+        if ingestion.status == CalibrationIngestion.LOADING:
+            raise ValueError(f"Ingestion {ingestion.name} has not been loaded")
+        self.check_staging()
+
+        while ingestion.validated_id < ingestion.staged_rows:
+            low = ingestion.validated_id
+            high = low + batch_size
+            with transaction.atomic(using=self.using):
+                for sql in self.validation_statements():
+                    self.execute(sql, [low, high])
+                ingestion.invalid_rows += self.fetch(
+                    f"SELECT COUNT(*) FROM {self.table} "
+                    f"WHERE error IS NOT NULL AND id > %s AND id <= %s",
+                    [low, high],
+                )[0][0]
+                ingestion.validated_id = min(high, ingestion.staged_rows)
+                self.save("invalid_rows", "validated_id")
+            self.progress("validate", ingestion.validated_id, ingestion.staged_rows)
+
+        if ingestion.status == CalibrationIngestion.LOADED:
+            ingestion.status = CalibrationIngestion.VALIDATED
+            self.save("status")
+        return ingestion.invalid_rows
+
+    def validation_statements(self):
+        """Return the statements validating one id range, in order."""
+        staging = self.table
+        in_range = f"{staging}.id > %s AND {staging}.id <= %s"
+        instrument_table = self.quote(Instrument._meta.db_table)
+        user_model = get_user_model()
+        user_table = self.quote(user_model._meta.db_table)
+        username = self.quote(
+            user_model._meta.get_field(user_model.USERNAME_FIELD).column
+        )
+        certificate_table = self.quote(CalibrationCertificate._meta.db_table)
+
+        def choices(values):
+            return ", ".join(f"'{value}'" for value, _ in values)
+
+        return [
+            f"""
+            UPDATE {staging} SET instrument_id = i.id
+            FROM {instrument_table} i
+            WHERE i.serial_number = {staging}.instrument AND {in_range}
+            """,
+            f"""
+            UPDATE {staging} SET performed_by_id = u.id
+            FROM {user_table} u
+            WHERE u.{username} = {staging}.performed_by AND {in_range}
+            """,
+            f"""
+            UPDATE {staging} SET certificate_id = c.id
+            FROM {certificate_table} c
+            WHERE c.certificate_number = {staging}.certificate
+              AND c.version = COALESCE(
+                  {staging}.certificate_version,
+                  (
+                      SELECT MAX(latest.version) FROM {certificate_table} latest
+                      WHERE latest.certificate_number = {staging}.certificate
+                  )
+              )
+              AND {in_range}
+            """,
+            f"""
+            UPDATE {staging} SET error = CASE
+                WHEN instrument_id IS NULL THEN 'Unknown instrument'
+                WHEN performed_by_id IS NULL THEN 'Unknown user'
+                WHEN calibration_type IS NULL
+                    OR calibration_type NOT IN (
+                        {choices(CalibrationRecord.CALIBRATION_TYPES)}
+                    )
+                    THEN 'Invalid calibration type'
+                WHEN status NOT IN ({choices(CalibrationRecord.STATUS_CHOICES)})
+                    THEN 'Invalid status'
+                WHEN description IS NULL THEN 'Missing description'
+                WHEN next_calibration_date IS NULL
+                    THEN 'Missing next calibration date'
+                WHEN next_calibration_date <= date_performed
+                    THEN 'Next calibration date must be after the date performed'
+                WHEN certificate IS NOT NULL AND certificate_id IS NULL
+                    THEN 'Unknown certificate'
+                WHEN status = 'completed' AND certificate_id IS NULL
+                    THEN 'A completed calibration must have an associated certificate'
+            END
+            WHERE {in_range}
+            """,
+        ]
+
+    def errors(self, limit=100):
+        """
+        Return ``(row, error)`` pairs for the first invalid staged rows.
+
+        Rows are numbered from 1 after the header.
+        """
+        return self.fetch(
+            f"SELECT id, error FROM {self.table} "
+            f"WHERE error IS NOT NULL ORDER BY id LIMIT %s",
+            [limit],
+        )
+
+    # Merge
+
+    def record_merged(self, record_ids, chunk_size=1000):
+        """Record the creation of merged calibration records, as saves would."""
+        records = CalibrationRecord.objects.using(self.using).order_by("pk")
+        for start in range(0, len(record_ids), chunk_size):
+            chunk = records.filter(pk__in=record_ids[start:start + chunk_size])
+            with audit.action("ingest"):
+                audit.record_many(
+                    CalibrationRecord,
+                    [
+                        (record.pk, audit.diff({}, audit.snapshot(record)))
+                        for record in chunk
+                    ],
+                    AuditEvent.CREATE,
+                    using=self.using,
+                )
+
+    def merge(self, batch_size=50000, skip_invalid=False):
+        """
+        Insert the valid staged rows into the calibration records in batches.
+
+        Refuses to start while rows are invalid unless ``skip_invalid`` is
+        set. The staging table is dropped once every batch is merged. Returns
+        the number of records merged.
+        """
+        ingestion = self.ingestion
+        if ingestion.status == CalibrationIngestion.MERGED:
+            return ingestion.merged_rows
+        if ingestion.status != CalibrationIngestion.VALIDATED:
+            raise ValueError(f"Ingestion {ingestion.name} has not been validated")
+        self.check_staging()
+        if ingestion.invalid_rows and not skip_invalid:
+            raise ValueError(
+                f"{ingestion.invalid_rows} of {ingestion.staged_rows} rows are "
+                f"invalid; fix the source or skip them"
+            )
+
+        record_table = self.quote(CalibrationRecord._meta.db_table)
+        instrument_table = self.quote(Instrument._meta.db_table)
+        # A missing status takes the model's default, as an omitted field would
+        insert = f"""
+            INSERT INTO {record_table} (
+                instrument_id, department_id, performed_by_id,
+                calibration_type, description, status, date_performed,
+                next_calibration_date, certificate_id, created_at, updated_at
+            )
+            SELECT
+                s.instrument_id, i.department_id, s.performed_by_id,
+                s.calibration_type, s.description, COALESCE(s.status, %s),
+                s.date_performed, s.next_calibration_date, s.certificate_id,
+                COALESCE(s.created_at, s.date_performed, %s), %s
+            FROM {self.table} s
+            JOIN {instrument_table} i ON i.id = s.instrument_id
+            WHERE s.error IS NULL AND s.id > %s AND s.id <= %s
+            ORDER BY s.id
+            RETURNING id
+        """
+        default_status = CalibrationRecord._meta.get_field("status").default
+        now = self.connection.ops.adapt_datetimefield_value(timezone.now())
+
+        while ingestion.merged_id < ingestion.staged_rows:
+            low = ingestion.merged_id
+            high = low + batch_size
+            with transaction.atomic(using=self.using):
+                record_ids = [
+                    row[0]
+                    for row in self.fetch(insert, [default_status, now, now, low, high])
+                ]
+                ingestion.merged_rows += len(record_ids)
+                self.record_merged(record_ids)
+                # Summaries show the latest completed calibration
+                instrument_ids = self.fetch(
+                    f"SELECT DISTINCT instrument_id FROM {self.table} "
+                    f"WHERE error IS NULL AND status = 'completed' "
+                    f"AND id > %s AND id <= %s",
+                    [low, high],
+                )
+                schedule_refresh([row[0] for row in instrument_ids], using=self.using)
+                ingestion.merged_id = min(high, ingestion.staged_rows)
+                self.save("merged_rows", "merged_id")
+            self.progress("merge", ingestion.merged_id, ingestion.staged_rows)
+
+        with transaction.atomic(using=self.using):
+            self.execute(f"DROP TABLE IF EXISTS {self.table}")
+            ingestion.status = CalibrationIngestion.MERGED
+            self.save("status")
+        return ingestion.merged_rows
@@ -0,0 +1,56 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from asset_management.assets.archive import POLICIES, archive_records, retention_cutoff
+
+
+class Command(BaseCommand):
+    help = (
+        "Move superseded certificates, closed issues and completed reviews "
+        "older than the retention window into the archive. Meant to be run "
+        "on a schedule."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--kind",
+            choices=sorted(POLICIES),
+            action="append",
+            help="Limit to this kind of record; may be repeated",
+        )
+        parser.add_argument(
+            "--older-than",
+            type=int,
+            metavar="DAYS",
+            help="Retention window in days; defaults to ARCHIVE_RETENTION_DAYS",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of rows archived per transaction",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Count the rows that would be archived without moving them",
+        )
+
+    def handle(self, *args, **options):
+        if options["older_than"] is None:
+            cutoff = retention_cutoff()
+        else:
+            cutoff = timezone.now() - timedelta(days=options["older_than"])
+
+        for kind in options["kind"] or sorted(POLICIES):
+            count = archive_records(
+                kind,
+                cutoff=cutoff,
+                batch_size=options["batch_size"],
+                dry_run=options["dry_run"],
+            )
+            verb = "Would archive" if options["dry_run"] else "Archived"
+            self.stdout.write(f"{verb} {count} {kind} rows")
+        self.stdout.write(self.style.SUCCESS("Archival finished"))
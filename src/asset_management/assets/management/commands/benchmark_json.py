@@ -0,0 +1,123 @@
+import io
+import random
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from asset_management.api.parsers import ORJSONParser
+from asset_management.api.renderers import ORJSONRenderer
+from asset_management.assets.models import CalibrationCertificate
+from asset_management.assets.serializers import CalibrationCertificateSerializer
+from asset_management.users.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare JSON rendering and parsing throughput of the stock DRF "
+        "renderer against the orjson renderer on a large certificate list."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--certificates",
+            type=int,
+            default=5000,
+            help="Number of certificates in the rendered list",
+        )
+        parser.add_argument(
+            "--points",
+            type=int,
+            default=50,
+            help="Measurement points in each certificate's calibration data",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=5,
+            help="Timed runs per renderer; the fastest is reported",
+        )
+
+    def build_certificates(self, count, points):
+        """Build unsaved certificates so no database is needed."""
+        rng = random.Random(0)
+        user = CustomUser(pk=1)
+        now = timezone.now()
+        certificates = []
+        for i in range(count):
+            issued = date(2024, 1, 1) + timedelta(days=i % 365)
+            certificates.append(
+                CalibrationCertificate(
+                    pk=i + 1,
+                    certificate_number=f"CERT-{i:06d}",
+                    status=CalibrationCertificate.APPROVED,
+                    issue_date=issued,
+                    expiry_date=issued + timedelta(days=365),
+                    certificate_type="ROUTINE",
+                    created_by=user,
+                    reviewer=user,
+                    review_date=now,
+                    created_at=now,
+                    updated_at=now,
+                    calibration_data={
+                        "points": [
+                            {
+                                "nominal": p * 10.0,
+                                "measured": p * 10.0 + rng.uniform(-0.05, 0.05),
+                                "uncertainty": rng.uniform(0.001, 0.01),
+                            }
+                            for p in range(points)
+                        ],
+                        "ambient": {"temperature": 20.1, "humidity": 45},
+                    },
+                )
+            )
+        return certificates
+
+    def best_of(self, repeat, func):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = func()
+            timings.append(time.perf_counter() - start)
+        return min(timings), result
+
+    def handle(self, *args, **options):
+        count = options["certificates"]
+        certificates = self.build_certificates(count, options["points"])
+
+        start = time.perf_counter()
+        data = CalibrationCertificateSerializer(certificates, many=True).data
+        serialize_time = time.perf_counter() - start
+        self.stdout.write(
+            f"Serialized {count} certificates in {serialize_time * 1000:.1f} ms"
+        )
+
+        results = {}
+        for label, renderer, parser in (
+            ("json", JSONRenderer(), JSONParser()),
+            ("orjson", ORJSONRenderer(), ORJSONParser()),
+        ):
+            render_time, body = self.best_of(
+                options["repeat"], lambda: renderer.render(data)
+            )
+            parse_time, _ = self.best_of(
+                options["repeat"], lambda: parser.parse(io.BytesIO(body))
+            )
+            results[label] = render_time
+            megabytes = len(body) / 1024 / 1024
+            self.stdout.write(
+                f"{label:>7}: render {render_time * 1000:8.1f} ms "
+                f"({count / render_time:,.0f} certificates/s, "
+                f"{megabytes / render_time:,.1f} MB/s), "
+                f"parse {parse_time * 1000:8.1f} ms, {megabytes:.1f} MB"
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"orjson renders {results['json'] / results['orjson']:.1f}x faster"
+            )
+        )
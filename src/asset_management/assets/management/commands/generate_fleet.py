@@ -0,0 +1,118 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from asset_management.assets.fleet import FleetGenerator
+
+
+class Command(BaseCommand):
+    help = (
+        "Create a reproducible synthetic fleet with years of calibration, "
+        "maintenance, review and issue history, for testing at scale."
+    )
+    # Arguments passed to FleetGenerator as they are
+    generator_options = [
+        "seed",
+        "prefix",
+        "departments",
+        "users_per_role",
+        "sites",
+        "locations_per_site",
+        "instruments",
+        "years",
+        "versions",
+        "maintenance",
+        "reviews",
+        "issues",
+        "points",
+        "chunk_size",
+        "batch_size",
+    ]
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--prefix",
+            default="LT",
+            help="Prefix of generated codes and usernames; must not be in use",
+        )
+        parser.add_argument("--departments", type=int, default=4)
+        parser.add_argument(
+            "--users-per-role",
+            type=int,
+            default=2,
+            help="Users of each role in each department",
+        )
+        parser.add_argument("--sites", type=int, default=5)
+        parser.add_argument("--locations-per-site", type=int, default=10)
+        parser.add_argument("--instruments", type=int, default=1000)
+        parser.add_argument(
+            "--years",
+            type=int,
+            default=5,
+            help="Longest history of an instrument, with a calibration a year",
+        )
+        parser.add_argument(
+            "--versions",
+            type=int,
+            default=3,
+            help="Most versions of a calibration certificate",
+        )
+        parser.add_argument(
+            "--maintenance",
+            type=int,
+            default=3,
+            help="Most completed maintenance records per instrument",
+        )
+        parser.add_argument(
+            "--reviews",
+            type=int,
+            default=2,
+            help="Most completed reviews per instrument",
+        )
+        parser.add_argument(
+            "--issues",
+            type=int,
+            default=2,
+            help="Most closed issues per instrument",
+        )
+        parser.add_argument(
+            "--points",
+            type=int,
+            default=20,
+            help="Measured values per parameter in each certificate",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="Instruments written per transaction",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=2000,
+            help="Rows per INSERT statement",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Processes writing chunks at once; PostgreSQL only",
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+
+        def progress(done, total):
+            elapsed = time.monotonic() - started
+            self.stdout.write(f"{done}/{total} instruments in {elapsed:.0f}s")
+
+        generator = FleetGenerator(
+            progress=progress,
+            **{name: options[name] for name in self.generator_options},
+        )
+        counts = generator.generate(workers=options["workers"])
+        for name, count in counts.items():
+            self.stdout.write(f"Created {count} {name}")
+        self.stdout.write(self.style.SUCCESS("Fleet created"))
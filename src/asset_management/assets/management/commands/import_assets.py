@@ -0,0 +1,66 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from asset_management.assets.importers import (
+    FORMATS,
+    SPECS,
+    detect_format,
+    import_file,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Import sites, departments, locations, sensor types, measurement types "
+        "or instruments from a CSV, XLSX, JSON or JSON Lines file. Nothing is "
+        "written unless every row is valid."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("kind", choices=sorted(SPECS))
+        parser.add_argument("path", help="File to import")
+        parser.add_argument(
+            "--format",
+            choices=FORMATS,
+            help="File format; by default taken from the file extension",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="Number of rows validated and inserted per batch",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Validate the file and report without writing anything",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            file_format = options["format"] or detect_format(options["path"])
+            with open(options["path"], "rb") as file:
+                report = import_file(
+                    options["kind"],
+                    file,
+                    file_format,
+                    chunk_size=options["chunk_size"],
+                    dry_run=options["dry_run"],
+                )
+        except (OSError, ValueError) as exc:
+            raise CommandError(exc)
+
+        for error in report.errors:
+            self.stderr.write(
+                f"Row {error['row']}: {error['field']}: {error['message']}"
+            )
+        if report.error_count:
+            raise CommandError(
+                f"{report.error_count} errors in {report.invalid_rows} of "
+                f"{report.rows} rows; nothing was imported"
+            )
+
+        if report.dry_run:
+            message = f"All {report.rows} {report.kind} rows are valid (dry run)"
+        else:
+            message = f"Imported {report.created} {report.kind}"
+        self.stdout.write(self.style.SUCCESS(message))
@@ -0,0 +1,74 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError
+
+from asset_management.assets.ingestion import CalibrationIngestor
+from asset_management.assets.models import CalibrationIngestion
+
+
+class Command(BaseCommand):
+    help = (
+        "Ingest historical calibration records from a CSV file through a "
+        "staging table. Run again with the same name to resume an interrupted "
+        "ingestion."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("name", help="Name identifying this ingestion")
+        parser.add_argument(
+            "path", nargs="?", help="CSV file to load; not needed when resuming"
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=50000,
+            help="Number of staged rows validated or merged per transaction",
+        )
+        parser.add_argument(
+            "--validate-only",
+            action="store_true",
+            help="Load and validate the file, then stop before merging",
+        )
+        parser.add_argument(
+            "--skip-invalid",
+            action="store_true",
+            help="Merge the valid rows even though some rows are invalid",
+        )
+
+    def handle(self, *args, **options):
+        ingestion, created = CalibrationIngestion.objects.get_or_create(
+            name=options["name"], defaults={"source": options["path"] or ""}
+        )
+        ingestor = CalibrationIngestor(ingestion, progress=self.report_progress)
+        batch_size = options["batch_size"]
+
+        try:
+            if ingestion.status == CalibrationIngestion.LOADING:
+                if not options["path"]:
+                    raise CommandError("A file is needed to load a new ingestion")
+                with open(options["path"], "rb") as file:
+                    ingestor.load(file)
+
+            if ingestor.validate(batch_size=batch_size):
+                for row, error in ingestor.errors(limit=20):
+                    self.stderr.write(f"Row {row}: {error}")
+                self.stderr.write(
+                    f"{ingestion.invalid_rows} of {ingestion.staged_rows} rows "
+                    f"are invalid"
+                )
+            if options["validate_only"]:
+                return
+
+            merged = ingestor.merge(
+                batch_size=batch_size, skip_invalid=options["skip_invalid"]
+            )
+        except (OSError, ValueError, DatabaseError) as exc:
+            raise CommandError(exc)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Merged {merged} calibration records from {ingestion.name}"
+            )
+        )
+
+    def report_progress(self, phase, done, total):
+        self.stdout.write(f"{phase}: {done}/{total} rows")
@@ -0,0 +1,118 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection
+
+from asset_management.assets import partitioning
+
+
+class Command(BaseCommand):
+    help = (
+        "Manage the yearly partitions of the calibration and maintenance record "
+        "tables on PostgreSQL: convert the tables, create upcoming partitions, "
+        "list partitions, or check that record queries are pruned."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "action",
+            choices=["create", "convert", "list", "check"],
+            help=(
+                "create: add partitions for the coming years (run regularly); "
+                "convert: partition the existing tables; "
+                "list: show partitions and their sizes; "
+                "check: explain the record viewsets' queries"
+            ),
+        )
+        parser.add_argument(
+            "--model",
+            choices=sorted(partitioning.MODELS),
+            action="append",
+            help="Limit to this model; may be repeated",
+        )
+        parser.add_argument(
+            "--ahead",
+            type=int,
+            default=1,
+            help="Number of years after the current one to create partitions for",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=50000,
+            help="Number of rows copied per transaction when converting",
+        )
+        parser.add_argument(
+            "--year", type=int, help="Year whose queries are checked for pruning"
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Table partitioning requires PostgreSQL")
+        models = [
+            partitioning.MODELS[name]
+            for name in options["model"] or sorted(partitioning.MODELS)
+        ]
+        try:
+            getattr(self, f"handle_{options['action']}")(models, options)
+        except (ValueError, DatabaseError) as exc:
+            raise CommandError(exc)
+
+    def partitioned(self, models):
+        for model in models:
+            if partitioning.is_partitioned(model):
+                yield model
+            else:
+                self.stderr.write(
+                    f"{model._meta.db_table} is not partitioned; run 'convert' first"
+                )
+
+    def handle_create(self, models, options):
+        for model in self.partitioned(models):
+            created = partitioning.maintain_partitions(model, ahead=options["ahead"])
+            for name in created:
+                self.stdout.write(f"Created {name}")
+        self.stdout.write(self.style.SUCCESS("Partitions are up to date"))
+
+    def handle_convert(self, models, options):
+        for model in models:
+            table = model._meta.db_table
+
+            def progress(done, total):
+                self.stdout.write(f"{table}: copied up to id {done} of {total}")
+
+            converter = partitioning.TableConverter(model, progress=progress)
+            rows = converter.convert(
+                batch_size=options["batch_size"], ahead=options["ahead"]
+            )
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Partitioned {table} ({rows} rows); the original table is "
+                    f"kept as {converter.old_table}"
+                )
+            )
+
+    def handle_list(self, models, options):
+        for model in self.partitioned(models):
+            self.stdout.write(model._meta.db_table)
+            for partition in partitioning.list_partitions(model):
+                self.stdout.write(
+                    f"  {partition.name}: {partition.bounds}, "
+                    f"~{max(partition.rows, 0)} rows, {partition.size // 1024} kB"
+                )
+
+    def handle_check(self, models, options):
+        failed = False
+        for model, scanned, expected in partitioning.check_pruning(options["year"]):
+            if model not in models:
+                continue
+            names = ", ".join(sorted(scanned)) or "none"
+            if scanned <= expected:
+                self.stdout.write(f"{model._meta.db_table}: scans {names}")
+            else:
+                failed = True
+                self.stderr.write(
+                    f"{model._meta.db_table}: scans {names}, expected only "
+                    f"{', '.join(sorted(expected))}"
+                )
+        if failed:
+            raise CommandError("Record queries are not pruned to one partition")
+        self.stdout.write(self.style.SUCCESS("Record queries are pruned"))
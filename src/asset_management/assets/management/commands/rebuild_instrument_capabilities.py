@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from asset_management.assets.capabilities import refresh_capabilities
+
+
+class Command(BaseCommand):
+    help = "Rebuild the capability index used by the instrument capability search."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of instruments read and rewritten per batch",
+        )
+
+    def handle(self, *args, **options):
+        written = refresh_capabilities(batch_size=options["batch_size"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt {written} instrument capabilities")
+        )
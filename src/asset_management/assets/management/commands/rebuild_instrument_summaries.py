@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from asset_management.assets.read_models import refresh_instrument_summaries
+
+
+class Command(BaseCommand):
+    help = "Rebuild the denormalized instrument summaries used by the HTML views."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of instruments read and upserted per query",
+        )
+
+    def handle(self, *args, **options):
+        written = refresh_instrument_summaries(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {written} instrument summaries"))
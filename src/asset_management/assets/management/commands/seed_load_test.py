@@ -0,0 +1,55 @@
+import json
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .generate_fleet import Command as GenerateFleetCommand
+
+User = get_user_model()
+
+
+class Command(GenerateFleetCommand):
+    help = (
+        "Create a synthetic fleet for load testing and write API tokens for its "
+        "users, for the harness in loadtest/."
+    )
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            "--tokens",
+            metavar="PATH",
+            help="Write access tokens of the generated users to this JSON file",
+        )
+        parser.add_argument(
+            "--token-hours",
+            type=int,
+            default=8,
+            help="Lifetime of the written tokens",
+        )
+
+    def handle(self, *args, **options):
+        super().handle(*args, **options)
+        if not options["tokens"]:
+            return
+
+        users = User.objects.filter(
+            username__startswith=f"{options['prefix'].lower()}-"
+        ).order_by("username")
+        tokens = []
+        for user in users:
+            token = AccessToken.for_user(user)
+            token.set_exp(lifetime=timedelta(hours=options["token_hours"]))
+            tokens.append(
+                {
+                    "id": user.pk,
+                    "username": user.username,
+                    "role": user.role,
+                    "department": user.department_id,
+                    "token": str(token),
+                }
+            )
+        with open(options["tokens"], "w") as f:
+            json.dump(tokens, f, indent=2)
+        self.stdout.write(f"Wrote {len(tokens)} tokens to {options['tokens']}")
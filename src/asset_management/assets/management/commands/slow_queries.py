@@ -0,0 +1,123 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Avg, Count, Max, Sum
+from django.utils import timezone
+
+from asset_management.assets.models import SlowQuery
+
+
+def plan_lines(plan):
+    """Return a readable outline of a plan captured by ``slow_queries.explain``."""
+    if plan and isinstance(plan[0], dict) and "Plan" in plan[0]:
+        lines = []
+
+        def walk(node, depth):
+            relation = node.get("Relation Name") or node.get("Index Name")
+            label = node["Node Type"] + (f" on {relation}" if relation else "")
+            actual = ""
+            if "Actual Total Time" in node:
+                actual = (
+                    f" (actual {node['Actual Total Time']} ms, "
+                    f"{node['Actual Rows']} rows, "
+                    f"{node.get('Shared Read Blocks', 0)} blocks read)"
+                )
+            lines.append("  " * depth + label + actual)
+            for child in node.get("Plans", []):
+                walk(child, depth + 1)
+
+        walk(plan[0]["Plan"], 0)
+        return lines
+    # Other databases return rows whose last column describes a step
+    return [str(row[-1]) for row in plan or []]
+
+
+class Command(BaseCommand):
+    help = (
+        "Summarize the slow queries captured by SlowQueryMiddleware, ranked by "
+        "the total time they took."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=7,
+            help="Only consider queries captured in this many days",
+        )
+        parser.add_argument(
+            "--limit", type=int, default=10, help="Number of queries to show"
+        )
+        parser.add_argument(
+            "--view", help="Only consider queries run by this view, e.g. Class.action"
+        )
+        parser.add_argument(
+            "--plans",
+            action="store_true",
+            help="Show the latest captured plan of each query",
+        )
+        parser.add_argument(
+            "--prune",
+            type=int,
+            metavar="DAYS",
+            help="Delete captures older than this many days instead",
+        )
+
+    def handle(self, *args, **options):
+        if options["prune"] is not None:
+            cutoff = timezone.now() - timedelta(days=options["prune"])
+            deleted, _ = SlowQuery.objects.filter(captured_at__lt=cutoff).delete()
+            self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} captures"))
+            return
+
+        captures = SlowQuery.objects.filter(
+            captured_at__gte=timezone.now() - timedelta(days=options["days"])
+        )
+        if options["view"]:
+            captures = captures.filter(view=options["view"])
+        offenders = list(
+            captures.values("fingerprint")
+            .annotate(
+                count=Count("id"),
+                total=Sum("duration_ms"),
+                mean=Avg("duration_ms"),
+                slowest=Max("duration_ms"),
+            )
+            .order_by("-total")[: options["limit"]]
+        )
+        if not offenders:
+            self.stdout.write("No slow queries captured")
+            return
+
+        views = {}
+        for row in (
+            captures.filter(fingerprint__in=[o["fingerprint"] for o in offenders])
+            .values("fingerprint", "view")
+            .annotate(count=Count("id"))
+            .order_by("-count")
+        ):
+            views.setdefault(row["fingerprint"], []).append(row["view"])
+
+        for rank, offender in enumerate(offenders, 1):
+            key = offender["fingerprint"]
+            latest = captures.filter(fingerprint=key).first()
+            self.stdout.write(
+                self.style.MIGRATE_HEADING(
+                    f"{rank}. {key}: {offender['count']} captures, "
+                    f"{offender['total'] / 1000:.1f} s in total, "
+                    f"mean {offender['mean']:.1f} ms, max {offender['slowest']:.1f} ms"
+                )
+            )
+            self.stdout.write(f"   Views: {', '.join(views[key])}")
+            self.stdout.write(f"   {latest.sql[:300]}")
+            for line in latest.stack.splitlines()[-3:]:
+                self.stdout.write(f"   at {line}")
+            if options["plans"]:
+                explained = (
+                    captures.filter(fingerprint=key).exclude(plan__isnull=True).first()
+                )
+                if explained is None:
+                    self.stdout.write("   No plan captured")
+                    continue
+                for line in plan_lines(explained.plan):
+                    self.stdout.write(f"   | {line}")
@@ -0,0 +1,185 @@
+# Generated by Django 5.0.2 on 2026-10-19 09:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+BATCH_SIZE = 1000
+
+
+def fill_summaries(apps, schema_editor):
+    # As read_models.refresh_instrument_summaries, with the models of this
+    # migration
+    Instrument = apps.get_model("assets", "Instrument")
+    CalibrationRecord = apps.get_model("assets", "CalibrationRecord")
+    Issue = apps.get_model("assets", "Issue")
+    InstrumentSummary = apps.get_model("assets", "InstrumentSummary")
+    latest_calibration = CalibrationRecord.objects.filter(
+        instrument=OuterRef("pk"), status="completed"
+    ).order_by("-date_performed", "-pk")
+    open_issues = (
+        Issue.objects.filter(
+            instrument=OuterRef("pk"), status__in=("open", "in_progress")
+        )
+        .order_by()
+        .values("instrument")
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+    instruments = (
+        Instrument.objects.select_related("location__site", "department")
+        .annotate(
+            latest_calibration_date=Subquery(
+                latest_calibration.values("date_performed")[:1]
+            ),
+            next_calibration_date=Subquery(
+                latest_calibration.values("next_calibration_date")[:1]
+            ),
+            open_issue_count=Coalesce(
+                Subquery(open_issues, output_field=IntegerField()), Value(0)
+            ),
+        )
+        .order_by("pk")
+    )
+    last = 0
+    while batch := list(instruments.filter(pk__gt=last)[:BATCH_SIZE]):
+        InstrumentSummary.objects.bulk_create(
+            InstrumentSummary(
+                instrument=instrument,
+                name=instrument.name,
+                serial_number=instrument.serial_number,
+                model=instrument.model,
+                manufacturer=instrument.manufacturer,
+                category=instrument.category,
+                status=instrument.status,
+                review_status=instrument.review_status,
+                last_review_date=instrument.last_review_date,
+                location=instrument.location,
+                location_name=instrument.location.name,
+                site_name=instrument.location.site.name,
+                department=instrument.department,
+                department_name=instrument.department.name,
+                latest_calibration_date=instrument.latest_calibration_date,
+                next_calibration_date=instrument.next_calibration_date,
+                open_issue_count=instrument.open_issue_count,
+            )
+            for instrument in batch
+        )
+        last = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("assets", "0004_measurementtype_sensortype_instrument_resolution_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="InstrumentSummary",
+            fields=[
+                (
+                    "instrument",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="summary",
+                        serialize=False,
+                        to="assets.instrument",
+                    ),
+                ),
+                ("name", models.CharField(max_length=200)),
+                ("serial_number", models.CharField(max_length=100)),
+                ("model", models.CharField(max_length=100)),
+                ("manufacturer", models.CharField(max_length=100)),
+                (
+                    "category",
+                    models.CharField(
+                        choices=[
+                            ("measurement", "Measurement"),
+                            ("testing", "Testing"),
+                            ("analysis", "Analysis"),
+                            ("calibration", "Calibration"),
+                            ("other", "Other"),
+                        ],
+                        max_length=50,
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("active", "Active"),
+                            ("inactive", "Inactive"),
+                            ("maintenance", "Under Maintenance"),
+                            ("calibration", "Under Calibration"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "review_status",
+                    models.CharField(
+                        choices=[
+                            ("none", "No Review Required"),
+                            ("pending", "Review Pending"),
+                            ("in_progress", "Review In Progress"),
+                            ("completed", "Review Completed"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("last_review_date", models.DateTimeField(blank=True, null=True)),
+                ("location_name", models.CharField(max_length=100)),
+                ("site_name", models.CharField(max_length=100)),
+                ("department_name", models.CharField(max_length=100)),
+                (
+                    "latest_calibration_date",
+                    models.DateTimeField(blank=True, null=True),
+                ),
+                ("next_calibration_date", models.DateTimeField(blank=True, null=True)),
+                ("open_issue_count", models.PositiveIntegerField(default=0)),
+                ("refreshed_at", models.DateTimeField(auto_now=True)),
+                (
+                    "department",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="assets.department",
+                    ),
+                ),
+                (
+                    "location",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="assets.location",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["name", "instrument"],
+                "indexes": [
+                    models.Index(
+                        fields=["name", "instrument"],
+                        name="assets_inst_name_4efe6e_idx",
+                    ),
+                    models.Index(
+                        fields=["status", "name"], name="assets_inst_status_afec8a_idx"
+                    ),
+                    models.Index(
+                        fields=["location", "name"],
+                        name="assets_inst_locatio_36e64c_idx",
+                    ),
+                    models.Index(
+                        fields=["department", "name"],
+                        name="assets_inst_departm_930d80_idx",
+                    ),
+                ],
+            },
+        ),
+        migrations.RunPython(fill_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.0.2 on 2026-10-19 09:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("assets", "0005_instrumentsummary"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CalibrationIngestion",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=100, unique=True)),
+                ("source", models.CharField(max_length=500)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("loading", "Loading"),
+                            ("loaded", "Loaded"),
+                            ("validated", "Validated"),
+                            ("merged", "Merged"),
+                        ],
+                        default="loading",
+                        max_length=20,
+                    ),
+                ),
+                ("staged_rows", models.PositiveBigIntegerField(default=0)),
+                ("invalid_rows", models.PositiveBigIntegerField(default=0)),
+                ("validated_id", models.BigIntegerField(default=0)),
+                ("merged_id", models.BigIntegerField(default=0)),
+                ("merged_rows", models.PositiveBigIntegerField(default=0)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
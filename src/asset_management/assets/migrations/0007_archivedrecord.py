@@ -0,0 +1,85 @@
+# Generated by Django 5.0.2 on 2026-10-19 09:56
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def compress_archive(apps, schema_editor):
+    # Compress archived rows once they exceed 128 bytes rather than the
+    # default of about 2 kB, which would leave most rows uncompressed
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(
+            "ALTER TABLE assets_archivedrecord SET (toast_tuple_target = 128)"
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("assets", "0006_calibrationingestion"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArchivedRecord",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("certificate", "Calibration Certificate"),
+                            ("issue", "Issue"),
+                            ("review", "Review"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("object_id", models.BigIntegerField()),
+                ("closed_at", models.DateTimeField()),
+                ("archived_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "data",
+                    models.JSONField(
+                        encoder=django.core.serializers.json.DjangoJSONEncoder
+                    ),
+                ),
+                (
+                    "instrument",
+                    models.ForeignKey(
+                        blank=True,
+                        db_constraint=False,
+                        null=True,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        related_name="+",
+                        to="assets.instrument",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-closed_at", "-pk"],
+                "indexes": [
+                    models.Index(
+                        fields=["kind", "-closed_at"],
+                        name="assets_arch_kind_61ec0d_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="archivedrecord",
+            constraint=models.UniqueConstraint(
+                fields=("kind", "object_id"), name="unique_archived_object"
+            ),
+        ),
+        migrations.RunPython(compress_archive, migrations.RunPython.noop),
+    ]
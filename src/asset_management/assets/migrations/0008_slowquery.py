@@ -0,0 +1,45 @@
+# Generated by Django 5.0.2 on 2026-10-19 10:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("assets", "0007_archivedrecord"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SlowQuery",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("fingerprint", models.CharField(max_length=12)),
+                ("view", models.CharField(max_length=200)),
+                ("sql", models.TextField()),
+                ("duration_ms", models.FloatField()),
+                ("stack", models.TextField(blank=True)),
+                ("plan", models.JSONField(blank=True, null=True)),
+                ("plan_error", models.TextField(blank=True)),
+                ("captured_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "verbose_name_plural": "slow queries",
+                "ordering": ["-captured_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["captured_at", "fingerprint"],
+                        name="assets_slow_capture_8fdd48_idx",
+                    )
+                ],
+            },
+        ),
+    ]
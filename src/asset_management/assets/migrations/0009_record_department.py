@@ -0,0 +1,62 @@
+# Generated by Django 5.0.2 on 2026-10-19 10:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("assets", "0008_slowquery"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="calibrationrecord",
+            name="department",
+            field=models.ForeignKey(
+                db_index=False,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to="assets.department",
+            ),
+        ),
+        migrations.AddField(
+            model_name="issue",
+            name="department",
+            field=models.ForeignKey(
+                db_index=False,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to="assets.department",
+            ),
+        ),
+        migrations.AddField(
+            model_name="maintenancerecord",
+            name="department",
+            field=models.ForeignKey(
+                db_index=False,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to="assets.department",
+            ),
+        ),
+        migrations.AddField(
+            model_name="review",
+            name="department",
+            field=models.ForeignKey(
+                db_index=False,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to="assets.department",
+            ),
+        ),
+    ]
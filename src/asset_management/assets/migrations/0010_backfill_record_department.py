@@ -0,0 +1,38 @@
+from django.db import migrations
+
+BATCH_SIZE = 10000
+
+RECORD_MODELS = ["calibrationrecord", "issue", "maintenancerecord", "review"]
+
+
+def copy_instrument_departments(apps, schema_editor):
+    # Fill in batches of instruments so that no single statement locks or
+    # rewrites a whole table
+    Instrument = apps.get_model("assets", "Instrument")
+    instruments = Instrument.objects.order_by("pk").values_list("pk", "department_id")
+    last = 0
+    while True:
+        batch = list(instruments.filter(pk__gt=last)[:BATCH_SIZE])
+        if not batch:
+            break
+        by_department = {}
+        for pk, department_id in batch:
+            by_department.setdefault(department_id, []).append(pk)
+        for name in RECORD_MODELS:
+            model = apps.get_model("assets", name)
+            for department_id, pks in by_department.items():
+                model.objects.filter(instrument_id__in=pks).update(
+                    department_id=department_id
+                )
+        last = batch[-1][0]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("assets", "0009_record_department"),
+    ]
+
+    operations = [
+        migrations.RunPython(copy_instrument_departments, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,86 @@
+# Generated by Django 5.0.2 on 2026-10-19 10:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("assets", "0010_backfill_record_department"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="calibrationrecord",
+            name="department",
+            field=models.ForeignKey(
+                db_index=False,
+                editable=False,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to="assets.department",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="issue",
+            name="department",
+            field=models.ForeignKey(
+                db_index=False,
+                editable=False,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to="assets.department",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="maintenancerecord",
+            name="department",
+            field=models.ForeignKey(
+                db_index=False,
+                editable=False,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to="assets.department",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="review",
+            name="department",
+            field=models.ForeignKey(
+                db_index=False,
+                editable=False,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to="assets.department",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="calibrationrecord",
+            index=models.Index(
+                fields=["department", "created_at"],
+                name="assets_cali_departm_25b976_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="issue",
+            index=models.Index(
+                fields=["department", "created_at"],
+                name="assets_issu_departm_e47701_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="maintenancerecord",
+            index=models.Index(
+                fields=["department", "created_at"],
+                name="assets_main_departm_5316b4_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="review",
+            index=models.Index(
+                fields=["department", "created_at"],
+                name="assets_revi_departm_39296f_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,137 @@
+# Generated by Django 5.0.2 on 2026-10-19 10:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+BATCH_SIZE = 10000
+
+
+def open_first_periods(apps, schema_editor):
+    # Existing instruments have been where they are, in their current status,
+    # since they were created, as far as anything recorded says
+    Instrument = apps.get_model("assets", "Instrument")
+    InstrumentHistory = apps.get_model("assets", "InstrumentHistory")
+    instruments = Instrument.objects.order_by("pk").values_list(
+        "pk", "location_id", "department_id", "status", "created_at"
+    )
+    last = 0
+    while True:
+        batch = list(instruments.filter(pk__gt=last)[:BATCH_SIZE])
+        if not batch:
+            break
+        InstrumentHistory.objects.bulk_create(
+            InstrumentHistory(
+                instrument_id=pk,
+                location_id=location_id,
+                department_id=department_id,
+                status=status,
+                valid_from=created_at,
+            )
+            for pk, location_id, department_id, status, created_at in batch
+        )
+        last = batch[-1][0]
+
+
+def index_periods(apps, schema_editor):
+    # Answer "as of" queries from a GiST index on the validity range
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(
+            "CREATE INDEX assets_instrumenthistory_period_gist "
+            "ON assets_instrumenthistory "
+            "USING gist (tstzrange(valid_from, valid_to))"
+        )
+
+
+def drop_period_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute("DROP INDEX assets_instrumenthistory_period_gist")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("assets", "0012_instrumenttransfer"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="InstrumentHistory",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("active", "Active"),
+                            ("inactive", "Inactive"),
+                            ("maintenance", "Under Maintenance"),
+                            ("calibration", "Under Calibration"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("valid_from", models.DateTimeField()),
+                ("valid_to", models.DateTimeField(blank=True, null=True)),
+                (
+                    "department",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="+",
+                        to="assets.department",
+                    ),
+                ),
+                (
+                    "instrument",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="history",
+                        to="assets.instrument",
+                    ),
+                ),
+                (
+                    "location",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="+",
+                        to="assets.location",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "instrument history",
+                "ordering": ["instrument", "valid_from"],
+                "indexes": [
+                    models.Index(
+                        fields=["instrument", "valid_from"],
+                        name="assets_inst_instrum_d507a6_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="instrumenthistory",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("valid_to__isnull", True)),
+                fields=("instrument",),
+                name="one_current_period_per_instrument",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="instrumenthistory",
+            constraint=models.CheckConstraint(
+                check=models.Q(("valid_to__gte", models.F("valid_from"))),
+                name="period_ends_after_start",
+            ),
+        ),
+        migrations.RunPython(open_first_periods, migrations.RunPython.noop),
+        migrations.RunPython(index_periods, drop_period_index),
+    ]
@@ -0,0 +1,103 @@
+# Generated by Django 5.0.2 on 2026-10-19 10:35
+
+import django.core.validators
+from django.db import migrations, models
+
+# Must match LOCATION_GEOGRAPHY in assets/geo.py for the index to be used
+LOCATION_GEOGRAPHY = (
+    "geography(ST_SetSRID(ST_MakePoint("
+    "longitude::double precision, latitude::double precision), 4326))"
+)
+
+
+def has_postgis(schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return False
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'postgis'")
+        return cursor.fetchone() is not None
+
+
+def create_geography_index(apps, schema_editor):
+    if has_postgis(schema_editor):
+        schema_editor.execute(
+            "CREATE INDEX assets_location_geography_gist "
+            f"ON assets_location USING gist (({LOCATION_GEOGRAPHY})) "
+            "WHERE latitude IS NOT NULL AND longitude IS NOT NULL"
+        )
+
+
+def drop_geography_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS assets_location_geography_gist")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("assets", "0014_auditevent"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="location",
+            name="latitude",
+            field=models.DecimalField(
+                blank=True,
+                decimal_places=6,
+                help_text="Latitude in decimal degrees (WGS 84)",
+                max_digits=9,
+                null=True,
+                validators=[
+                    django.core.validators.MinValueValidator(-90),
+                    django.core.validators.MaxValueValidator(90),
+                ],
+            ),
+        ),
+        migrations.AddField(
+            model_name="location",
+            name="longitude",
+            field=models.DecimalField(
+                blank=True,
+                decimal_places=6,
+                help_text="Longitude in decimal degrees (WGS 84)",
+                max_digits=9,
+                null=True,
+                validators=[
+                    django.core.validators.MinValueValidator(-180),
+                    django.core.validators.MaxValueValidator(180),
+                ],
+            ),
+        ),
+        migrations.AddField(
+            model_name="site",
+            name="latitude",
+            field=models.DecimalField(
+                blank=True,
+                decimal_places=6,
+                help_text="Latitude in decimal degrees (WGS 84)",
+                max_digits=9,
+                null=True,
+                validators=[
+                    django.core.validators.MinValueValidator(-90),
+                    django.core.validators.MaxValueValidator(90),
+                ],
+            ),
+        ),
+        migrations.AddField(
+            model_name="site",
+            name="longitude",
+            field=models.DecimalField(
+                blank=True,
+                decimal_places=6,
+                help_text="Longitude in decimal degrees (WGS 84)",
+                max_digits=9,
+                null=True,
+                validators=[
+                    django.core.validators.MinValueValidator(-180),
+                    django.core.validators.MaxValueValidator(180),
+                ],
+            ),
+        ),
+        migrations.RunPython(create_geography_index, drop_geography_index),
+    ]
@@ -0,0 +1,141 @@
+# Generated by Django 5.0.2 on 2026-10-19 10:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from asset_management.assets.capabilities import merge_ranges
+
+BATCH_SIZE = 10000
+
+
+def index_capabilities(apps, schema_editor):
+    Instrument = apps.get_model("assets", "Instrument")
+    InstrumentCapability = apps.get_model("assets", "InstrumentCapability")
+    assignments = Instrument.sensor_types.through.objects.order_by("instrument")
+    instruments = Instrument.objects.order_by("pk").values_list("pk", "resolution")
+    last = 0
+    while True:
+        batch = dict(instruments.filter(pk__gt=last)[:BATCH_SIZE])
+        if not batch:
+            break
+        sensors = {}
+        rows = assignments.filter(instrument__in=batch).values_list(
+            "instrument",
+            "sensortype__unit",
+            "sensortype__min_range",
+            "sensortype__max_range",
+            "sensortype__accuracy",
+        )
+        for instrument_id, *sensor in rows:
+            sensors.setdefault(instrument_id, []).append(sensor)
+        InstrumentCapability.objects.bulk_create(
+            InstrumentCapability(
+                instrument_id=instrument_id,
+                unit=unit,
+                range_min=low,
+                range_max=high,
+                best_accuracy=accuracy,
+                resolution=batch[instrument_id],
+            )
+            for instrument_id, instrument_sensors in sensors.items()
+            for unit, low, high, accuracy in merge_ranges(instrument_sensors)
+        )
+        last = max(batch)
+
+
+def create_range_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(
+            "CREATE INDEX assets_instrumentcapability_range_gist "
+            "ON assets_instrumentcapability "
+            "USING gist (numrange(range_min, range_max, '[]')) "
+            "WHERE range_min IS NOT NULL AND range_max IS NOT NULL"
+        )
+
+
+def drop_range_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute("DROP INDEX assets_instrumentcapability_range_gist")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("assets", "0015_site_location_coordinates"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="InstrumentCapability",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("unit", models.CharField(max_length=20)),
+                (
+                    "range_min",
+                    models.DecimalField(
+                        blank=True,
+                        decimal_places=3,
+                        help_text="Lower end of the range; null when the sensors give no range",
+                        max_digits=10,
+                        null=True,
+                    ),
+                ),
+                (
+                    "range_max",
+                    models.DecimalField(
+                        blank=True,
+                        decimal_places=3,
+                        help_text="Upper end of the range; null when the sensors give no range",
+                        max_digits=10,
+                        null=True,
+                    ),
+                ),
+                (
+                    "best_accuracy",
+                    models.DecimalField(
+                        blank=True,
+                        decimal_places=2,
+                        help_text="Best accuracy, as a percentage, of the sensors covering the range",
+                        max_digits=5,
+                        null=True,
+                    ),
+                ),
+                (
+                    "resolution",
+                    models.DecimalField(
+                        blank=True,
+                        decimal_places=3,
+                        help_text="Resolution of the instrument",
+                        max_digits=10,
+                        null=True,
+                    ),
+                ),
+                (
+                    "instrument",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="capabilities",
+                        to="assets.instrument",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "instrument capabilities",
+                "indexes": [
+                    models.Index(
+                        fields=["unit", "range_min"], name="assets_inst_unit_d91536_idx"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(index_capabilities, migrations.RunPython.noop),
+        migrations.RunPython(create_range_index, drop_range_index),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.0.2 on 2026-10-19 11:03
+
+from importlib import import_module
+
+from django.db import migrations, models
+
+initial = import_module("asset_management.assets.migrations.0016_instrumentcapability")
+
+
+def reindex_capabilities(apps, schema_editor):
+    # Merged ranges used to take the best accuracy of any of their sensors
+    apps.get_model("assets", "InstrumentCapability").objects.all().delete()
+    initial.index_capabilities(apps, schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("assets", "0016_instrumentcapability"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="instrumentcapability",
+            name="best_accuracy",
+            field=models.DecimalField(
+                blank=True,
+                decimal_places=2,
+                help_text="Accuracy, as a percentage, over all of the range",
+                max_digits=5,
+                null=True,
+            ),
+        ),
+        migrations.RunPython(reindex_capabilities, migrations.RunPython.noop),
+    ]
@@ -1,12 +1,49 @@
-from django.db import models
+from django.db import connections, models
+from django.db.models.expressions import RawSQL
 from django.conf import settings
 from django.utils import timezone
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
+from django.core.validators import MaxValueValidator, MinValueValidator
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .scoping import (
+    ArchivedRecordQuerySet,
+    DepartmentScopedQuerySet,
+    InstrumentRecordQuerySet,
+    ReviewQuerySet,
+)
 
 User = get_user_model()
 
 
+def latitude_field():
+    return models.DecimalField(
+        max_digits=9,
+        decimal_places=6,
+        null=True,
+        blank=True,
+        validators=[MinValueValidator(-90), MaxValueValidator(90)],
+        help_text="Latitude in decimal degrees (WGS 84)",
+    )
+
+
+def longitude_field():
+    return models.DecimalField(
+        max_digits=9,
+        decimal_places=6,
+        null=True,
+        blank=True,
+        validators=[MinValueValidator(-180), MaxValueValidator(180)],
+        help_text="Longitude in decimal degrees (WGS 84)",
+    )
+
+
+def validate_coordinates(instance):
+    if (instance.latitude is None) != (instance.longitude is None):
+        raise ValidationError("Latitude and longitude must be given together")
+
+
 class Site(models.Model):
     """
     Represents a physical location where instruments are used or stored.
@@ -24,24 +61,50 @@ class Site(models.Model):
     contact_email = models.EmailField()
     contact_phone = models.CharField(max_length=20)
     is_active = models.BooleanField(default=True)
+    latitude = latitude_field()
+    longitude = longitude_field()
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.name} ({self.code})"
 
+    def clean(self):
+        validate_coordinates(self)
+        super().clean()
+
 
 class Location(models.Model):
+    """
+    A room or area of a site.
+
+    A location saved without coordinates takes its site's, and keeps
+    following them while they are the same (see ``signals.py``), so that the
+    nearest-instrument search only has to read the locations.
+    """
+
     name = models.CharField(max_length=100)
     building = models.CharField(max_length=100)
     room = models.CharField(max_length=100)
     site = models.ForeignKey(Site, on_delete=models.PROTECT, related_name="locations")
+    latitude = latitude_field()
+    longitude = longitude_field()
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.name} ({self.building}, {self.room})"
 
+    def clean(self):
+        validate_coordinates(self)
+        super().clean()
+
+    def save(self, *args, **kwargs):
+        if self.latitude is None and self.longitude is None and self.site_id:
+            self.latitude = self.site.latitude
+            self.longitude = self.site.longitude
+        super().save(*args, **kwargs)
+
 
 class Department(models.Model):
     name = models.CharField(max_length=100)
@@ -117,7 +180,39 @@ class MeasurementType(models.Model):
         return self.name
 
 
-class Issue(models.Model):
+class InstrumentRecord(models.Model):
+    """
+    Base of the records kept about an instrument.
+
+    The instrument's department is copied onto each record, so listings
+    scoped to a department filter and sort on the record's own table through
+    its ``(department, created_at)`` index instead of joining the instruments.
+    The copy is taken on save and updated when the instrument moves, by
+    ``update_record_departments``.
+    """
+
+    department = models.ForeignKey(
+        "Department",
+        on_delete=models.PROTECT,
+        related_name="+",
+        editable=False,
+        db_index=False,
+    )
+
+    department_field = "department"
+    objects = InstrumentRecordQuerySet.as_manager()
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or "department" in update_fields:
+            self.department_id = self.instrument.department_id
+        super().save(*args, **kwargs)
+
+
+class Issue(InstrumentRecord):
     """
     Represents an issue or problem with an instrument.
     """
@@ -160,6 +255,9 @@ class Issue(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [models.Index(fields=["department", "created_at"])]
+
     def __str__(self):
         return f"{self.title} - {self.get_status_display()}"
 
@@ -224,6 +322,9 @@ class Instrument(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    department_field = "department"
+    objects = DepartmentScopedQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.name} ({self.serial_number})"
 
@@ -416,7 +517,7 @@ class CalibrationCertificate(models.Model):
         return new_version
 
 
-class CalibrationRecord(models.Model):
+class CalibrationRecord(InstrumentRecord):
     CALIBRATION_TYPES = [
         ("routine", "Routine"),
         ("after_repair", "After Repair"),
@@ -451,6 +552,9 @@ class CalibrationRecord(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [models.Index(fields=["department", "created_at"])]
+
     def __str__(self):
         return (
             f"{self.get_calibration_type_display()} calibration for {self.instrument}"
@@ -475,7 +579,7 @@ class CalibrationRecord(models.Model):
         super().clean()
 
 
-class Review(models.Model):
+class Review(InstrumentRecord):
     STATUS_CHOICES = [
         ("pending", "Pending"),
         ("in_progress", "In Progress"),
@@ -515,11 +619,16 @@ class Review(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ReviewQuerySet.as_manager()
+
+    class Meta:
+        indexes = [models.Index(fields=["department", "created_at"])]
+
     def __str__(self):
         return f"Review for {self.instrument} - {self.status}"
 
 
-class MaintenanceRecord(models.Model):
+class MaintenanceRecord(InstrumentRecord):
     MAINTENANCE_TYPES = [
         ("preventive", "Preventive"),
         ("corrective", "Corrective"),
@@ -547,7 +656,481 @@ class MaintenanceRecord(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [models.Index(fields=["department", "created_at"])]
+
     def __str__(self):
         return (
             f"{self.get_maintenance_type_display()} maintenance for {self.instrument}"
         )
+
+
+# Models with a copy of their instrument's department
+RECORD_MODELS = [CalibrationRecord, MaintenanceRecord, Review, Issue]
+
+
+def update_record_departments(instrument_ids, using="default"):
+    """
+    Copy the current department of instruments onto their records.
+
+    Called when instruments move to another department. The records'
+    ``updated_at`` moves on too, as their representation changes.
+    """
+    department = models.Subquery(
+        Instrument.objects.filter(pk=models.OuterRef("instrument_id")).values(
+            "department_id"
+        )
+    )
+    now = timezone.now()
+    for model in RECORD_MODELS:
+        model.objects.using(using).filter(instrument_id__in=instrument_ids).update(
+            department_id=department, updated_at=now
+        )
+
+
+def _range_contains(queryset, column_range, value, params):
+    """
+    Filter a PostgreSQL queryset on a range of its columns containing a
+    value, written as a range containment so the GiST index on the range
+    serves it. ``{table}`` in ``column_range`` is the quoted table name.
+    """
+    connection = connections[queryset.db]
+    table = connection.ops.quote_name(queryset.model._meta.db_table)
+    return queryset.filter(
+        RawSQL(
+            f"{column_range.format(table=table)} @> {value}",
+            params,
+            output_field=models.BooleanField(),
+        )
+    )
+
+
+class InstrumentHistoryQuerySet(DepartmentScopedQuerySet):
+    def as_of(self, when):
+        """The periods in force at ``when``: where each instrument was then."""
+        if connections[self.db].vendor == "postgresql":
+            return _range_contains(
+                self, "tstzrange({table}.valid_from, {table}.valid_to)", "%s", [when]
+            )
+        return self.filter(
+            models.Q(valid_to__isnull=True) | models.Q(valid_to__gt=when),
+            valid_from__lte=when,
+        )
+
+
+class InstrumentHistory(models.Model):
+    """
+    A period during which an instrument kept its location, department and
+    status.
+
+    Each change of one of them closes the instrument's current period, whose
+    ``valid_to`` is null, and opens the next, so the periods of an instrument
+    follow each other without gaps. On PostgreSQL ``tstzrange(valid_from,
+    valid_to)`` has a GiST index, so the state of the fleet at any moment is
+    one index scan.
+    """
+
+    instrument = models.ForeignKey(
+        Instrument, on_delete=models.CASCADE, related_name="history"
+    )
+    location = models.ForeignKey(Location, on_delete=models.PROTECT, related_name="+")
+    department = models.ForeignKey(
+        Department, on_delete=models.PROTECT, related_name="+", db_index=False
+    )
+    status = models.CharField(max_length=20, choices=Instrument.STATUS_CHOICES)
+    valid_from = models.DateTimeField()
+    valid_to = models.DateTimeField(null=True, blank=True)
+
+    department_field = "department"
+    objects = InstrumentHistoryQuerySet.as_manager()
+
+    class Meta:
+        ordering = ["instrument", "valid_from"]
+        verbose_name_plural = "instrument history"
+        indexes = [models.Index(fields=["instrument", "valid_from"])]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["instrument"],
+                condition=models.Q(valid_to__isnull=True),
+                name="one_current_period_per_instrument",
+            ),
+            models.CheckConstraint(
+                check=models.Q(valid_to__gte=models.F("valid_from")),
+                name="period_ends_after_start",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.instrument_id} from {self.valid_from}"
+
+
+def start_periods(placements, when, using="default"):
+    """
+    Close the current period of instruments and open the next at ``when``.
+
+    ``placements`` are ``(instrument_id, location_id, department_id, status)``
+    tuples of the instruments' new values.
+    """
+    placements = list(placements)
+    history = InstrumentHistory.objects.using(using)
+    history.filter(
+        instrument_id__in=[placement[0] for placement in placements],
+        valid_to__isnull=True,
+    ).update(valid_to=when)
+    history.bulk_create(
+        InstrumentHistory(
+            instrument_id=instrument_id,
+            location_id=location_id,
+            department_id=department_id,
+            status=status,
+            valid_from=when,
+        )
+        for instrument_id, location_id, department_id, status in placements
+    )
+
+
+class InstrumentTransfer(models.Model):
+    """
+    A batch of instruments moved to another location or department.
+
+    ``moved`` lists each instrument moved with where it came from, as
+    ``[id, location_id, department_id]``, so a lab move of hundreds of
+    instruments is logged in one row.
+    """
+
+    location = models.ForeignKey(
+        Location, on_delete=models.PROTECT, null=True, blank=True, related_name="+"
+    )
+    department = models.ForeignKey(
+        Department, on_delete=models.PROTECT, null=True, blank=True, related_name="+"
+    )
+    reason = models.TextField(blank=True)
+    moved = models.JSONField(default=list)
+    instrument_count = models.PositiveIntegerField(default=0)
+    transferred_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.PROTECT, related_name="+"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"Transfer of {self.instrument_count} instruments"
+
+
+class AuditEvent(models.Model):
+    """
+    A change to an instrument, certificate or record, written by ``audit.py``.
+
+    ``changes`` maps each field that changed to ``[old, new]``, with foreign
+    keys as ids; a created object's fields have no old value and a deletion
+    records none. ``action`` names the custom action, such as ``review``,
+    that made the change, if any.
+    """
+
+    CREATE = "create"
+    UPDATE = "update"
+    DELETE = "delete"
+
+    OPERATION_CHOICES = [
+        (CREATE, "Created"),
+        (UPDATE, "Updated"),
+        (DELETE, "Deleted"),
+    ]
+
+    object_type = models.CharField(max_length=100)
+    object_id = models.BigIntegerField()
+    operation = models.CharField(max_length=10, choices=OPERATION_CHOICES)
+    action = models.CharField(max_length=50, blank=True)
+    # Events outlive the users and objects they mention
+    actor = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+    changes = models.JSONField(encoder=DjangoJSONEncoder, default=dict)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ["-created_at", "-pk"]
+        indexes = [
+            models.Index(fields=["object_type", "object_id", "-created_at"]),
+            models.Index(fields=["actor", "-created_at"]),
+            models.Index(fields=["-created_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.operation} {self.object_type} {self.object_id}"
+
+
+class InstrumentSummary(models.Model):
+    """
+    Denormalized read model of an instrument for the HTML list and detail views.
+
+    Rows are kept in sync by ``read_models.refresh_instrument_summaries`` when
+    instruments or their related records change, and should not be edited
+    directly.
+    """
+
+    instrument = models.OneToOneField(
+        Instrument,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="summary",
+    )
+    name = models.CharField(max_length=200)
+    serial_number = models.CharField(max_length=100)
+    model = models.CharField(max_length=100)
+    manufacturer = models.CharField(max_length=100)
+    category = models.CharField(max_length=50, choices=Instrument.CATEGORY_CHOICES)
+    status = models.CharField(max_length=20, choices=Instrument.STATUS_CHOICES)
+    review_status = models.CharField(
+        max_length=20, choices=Instrument.REVIEW_STATUS_CHOICES
+    )
+    last_review_date = models.DateTimeField(null=True, blank=True)
+    location = models.ForeignKey(
+        Location, on_delete=models.CASCADE, related_name="+", db_index=False
+    )
+    location_name = models.CharField(max_length=100)
+    site_name = models.CharField(max_length=100)
+    department = models.ForeignKey(
+        Department, on_delete=models.CASCADE, related_name="+", db_index=False
+    )
+    department_name = models.CharField(max_length=100)
+    latest_calibration_date = models.DateTimeField(null=True, blank=True)
+    next_calibration_date = models.DateTimeField(null=True, blank=True)
+    open_issue_count = models.PositiveIntegerField(default=0)
+    refreshed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["name", "instrument"]
+        indexes = [
+            models.Index(fields=["name", "instrument"]),
+            models.Index(fields=["status", "name"]),
+            models.Index(fields=["location", "name"]),
+            models.Index(fields=["department", "name"]),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.serial_number})"
+
+
+class InstrumentCapabilityQuerySet(DepartmentScopedQuerySet):
+    def covering(self, low, high):
+        """The capabilities whose range includes all of ``low`` to ``high``."""
+        bounded = self.filter(range_min__isnull=False, range_max__isnull=False)
+        if connections[self.db].vendor == "postgresql":
+            return _range_contains(
+                bounded,
+                "numrange({table}.range_min, {table}.range_max, '[]')",
+                "numrange(%s, %s, '[]')",
+                [low, high],
+            )
+        return bounded.filter(range_min__lte=low, range_max__gte=high)
+
+    def ranked(self):
+        """
+        Best matches first: the most accurate, then the finest resolution,
+        then the narrowest range, as a sensor made for the range usually
+        measures it best.
+        """
+        return self.annotate(
+            width=models.F("range_max") - models.F("range_min")
+        ).order_by(
+            models.F("best_accuracy").asc(nulls_last=True),
+            models.F("resolution").asc(nulls_last=True),
+            models.F("width").asc(nulls_last=True),
+            "instrument__name",
+            "instrument",
+        )
+
+    def best(self, limit):
+        """
+        Return the best match of up to ``limit`` instruments, best first.
+
+        An instrument can match with several rows, one inside the other, so
+        ranked rows are read until enough instruments are found.
+        """
+        found = {}
+        for capability in self.ranked().iterator(chunk_size=limit):
+            found.setdefault(capability.instrument_id, capability)
+            if len(found) == limit:
+                break
+        return list(found.values())
+
+
+class InstrumentCapability(models.Model):
+    """
+    A range an instrument can measure over, in one unit.
+
+    The ranges of the instrument's sensor types are merged per unit, and the
+    stretches of a merged range more accurate than the whole are rows of
+    their own, inside it; ``best_accuracy`` holds for all of a row's range.
+    Rows are kept in sync by ``capabilities.refresh_capabilities`` and should
+    not be edited directly.
+    """
+
+    instrument = models.ForeignKey(
+        Instrument, on_delete=models.CASCADE, related_name="capabilities"
+    )
+    unit = models.CharField(max_length=20)
+    range_min = models.DecimalField(
+        max_digits=10,
+        decimal_places=3,
+        null=True,
+        blank=True,
+        help_text="Lower end of the range; null when the sensors give no range",
+    )
+    range_max = models.DecimalField(
+        max_digits=10,
+        decimal_places=3,
+        null=True,
+        blank=True,
+        help_text="Upper end of the range; null when the sensors give no range",
+    )
+    best_accuracy = models.DecimalField(
+        max_digits=5,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        help_text="Accuracy, as a percentage, over all of the range",
+    )
+    resolution = models.DecimalField(
+        max_digits=10,
+        decimal_places=3,
+        null=True,
+        blank=True,
+        help_text="Resolution of the instrument",
+    )
+
+    department_field = "instrument__department"
+    objects = InstrumentCapabilityQuerySet.as_manager()
+
+    class Meta:
+        verbose_name_plural = "instrument capabilities"
+        indexes = [models.Index(fields=["unit", "range_min"])]
+
+    def __str__(self):
+        return f"{self.instrument_id}: {self.range_min} to {self.range_max} {self.unit}"
+
+
+class CalibrationIngestion(models.Model):
+    """
+    Progress of a bulk ingestion of historical calibration records.
+
+    Each phase run by ``ingestion.CalibrationIngestor`` commits its progress
+    here, so an interrupted ingestion resumes where it stopped when run again
+    under the same name.
+    """
+
+    LOADING = "loading"
+    LOADED = "loaded"
+    VALIDATED = "validated"
+    MERGED = "merged"
+
+    STATUS_CHOICES = [
+        (LOADING, "Loading"),
+        (LOADED, "Loaded"),
+        (VALIDATED, "Validated"),
+        (MERGED, "Merged"),
+    ]
+
+    name = models.CharField(max_length=100, unique=True)
+    source = models.CharField(max_length=500)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=LOADING)
+    staged_rows = models.PositiveBigIntegerField(default=0)
+    invalid_rows = models.PositiveBigIntegerField(default=0)
+    validated_id = models.BigIntegerField(default=0)
+    merged_id = models.BigIntegerField(default=0)
+    merged_rows = models.PositiveBigIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.get_status_display()})"
+
+    @property
+    def staging_table(self):
+        return f"assets_calibrationstaging_{self.pk}"
+
+
+class ArchivedRecord(models.Model):
+    """
+    A certificate, issue or review moved out of its live table by ``archive.py``.
+
+    ``data`` holds the row's fields as they were when it was archived, keyed
+    by field name with foreign keys as ids. Archived rows are never changed.
+    """
+
+    CERTIFICATE = "certificate"
+    ISSUE = "issue"
+    REVIEW = "review"
+
+    KIND_CHOICES = [
+        (CERTIFICATE, "Calibration Certificate"),
+        (ISSUE, "Issue"),
+        (REVIEW, "Review"),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    # Archived rows outlive their instrument, so no constraint is enforced
+    instrument = models.ForeignKey(
+        Instrument,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+    closed_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+    data = models.JSONField(encoder=DjangoJSONEncoder)
+
+    department_field = "instrument__department"
+    objects = ArchivedRecordQuerySet.as_manager()
+
+    class Meta:
+        ordering = ["-closed_at", "-pk"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["kind", "object_id"], name="unique_archived_object"
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["kind", "-closed_at"]),
+        ]
+
+    def __str__(self):
+        return f"Archived {self.get_kind_display()} {self.object_id}"
+
+
+class SlowQuery(models.Model):
+    """
+    A query that took longer than ``SLOW_QUERY_THRESHOLD_MS``, captured by
+    ``slow_queries.SlowQueryMiddleware`` with the view that ran it.
+
+    ``plan`` holds the output of ``EXPLAIN`` for the sampled captures.
+    """
+
+    fingerprint = models.CharField(max_length=12)
+    view = models.CharField(max_length=200)
+    sql = models.TextField()
+    duration_ms = models.FloatField()
+    stack = models.TextField(blank=True)
+    plan = models.JSONField(null=True, blank=True)
+    plan_error = models.TextField(blank=True)
+    captured_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-captured_at"]
+        verbose_name_plural = "slow queries"
+        indexes = [
+            models.Index(fields=["captured_at", "fingerprint"]),
+        ]
+
+    def __str__(self):
+        return f"{self.fingerprint} in {self.view} ({self.duration_ms:.0f} ms)"
@@ -0,0 +1,176 @@
+"""
+Saturation metrics and readiness checks.
+
+``/metrics`` exposes the request metrics recorded by ``profiling.py`` together
+with gauges read at scrape time:
+
+- connections to the database by state, against ``max_connections``
+  (PostgreSQL only; Django keeps one connection per worker thread, so this is
+  the pool the replicas share);
+- reviews still waiting for their external ticket, the backlog left behind
+  when the ticket system is slow or down;
+- event stream subscribers and the events queued for them in this process;
+- the configured worker capacity, against which the
+  ``asset_requests_in_progress`` gauge gives worker saturation.
+
+Cache lookups are counted by the metered backends in ``caches.py``, from which
+the hit ratio is ``rate(asset_cache_requests_total{result="hit"})`` over the rate
+of all lookups.
+
+With several gunicorn workers, set ``PROMETHEUS_MULTIPROC_DIR`` so that the
+request metrics of all workers are aggregated in every scrape.
+
+Metrics describe the deployment, so they are only served to scrapers sending
+``METRICS_TOKEN`` or, when no token is set, to clients reaching the process
+directly from a private address (see ``is_internal_request``). With ``DEBUG``
+anyone may read them.
+"""
+
+import ipaddress
+import logging
+import os
+import time
+from collections import namedtuple
+
+from django.conf import settings
+from django.db import DatabaseError, connections, transaction
+
+from .events import broker
+from .models import Review
+from .services import TicketService
+
+try:
+    import prometheus_client
+    from prometheus_client.core import GaugeMetricFamily
+    from prometheus_client.multiprocess import MultiProcessCollector
+except ImportError:  # pragma: no cover
+    prometheus_client = None
+
+logger = logging.getLogger(__name__)
+
+DatabaseCheck = namedtuple("DatabaseCheck", ["ok", "ms", "error"])
+
+
+def check_database(timeout_ms=None, using="default"):
+    """
+    Run a trivial query and time it.
+
+    The check fails if the query errors or takes longer than ``timeout_ms``
+    (``READINESS_DB_TIMEOUT_MS`` by default). PostgreSQL also cancels the
+    query at that point rather than letting the probe wait on a stalled
+    server.
+    """
+    if timeout_ms is None:
+        timeout_ms = getattr(settings, "READINESS_DB_TIMEOUT_MS", 500)
+    connection = connections[using]
+    started = time.perf_counter()
+    try:
+        with transaction.atomic(using=using), connection.cursor() as cursor:
+            if connection.vendor == "postgresql":
+                cursor.execute("SET LOCAL statement_timeout = %s", [int(timeout_ms)])
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+    except DatabaseError as exc:
+        ms = (time.perf_counter() - started) * 1000
+        return DatabaseCheck(False, round(ms, 1), str(exc).strip())
+    ms = (time.perf_counter() - started) * 1000
+    if ms > timeout_ms:
+        return DatabaseCheck(False, round(ms, 1), f"slower than {timeout_ms} ms")
+    return DatabaseCheck(True, round(ms, 1), None)
+
+
+class SaturationCollector:
+    """Gauges computed when ``/metrics`` is scraped."""
+
+    def collect(self):
+        capacity = GaugeMetricFamily(
+            "asset_worker_capacity",
+            "Requests the workers of this instance can handle at once",
+        )
+        capacity.add_metric([], getattr(settings, "METRICS_WORKER_CAPACITY", 1))
+        yield capacity
+
+        events = GaugeMetricFamily(
+            "asset_event_subscribers", "Event stream subscribers in this process"
+        )
+        events.add_metric([], broker.subscriber_count)
+        yield events
+        pending = GaugeMetricFamily(
+            "asset_event_queue_depth",
+            "Events queued for event stream subscribers in this process",
+        )
+        pending.add_metric([], broker.pending_count)
+        yield pending
+
+        try:
+            yield from self.database()
+            yield from self.tickets()
+        except DatabaseError:
+            logger.warning("Could not read database gauges", exc_info=True)
+
+    def database(self):
+        connection = connections["default"]
+        if connection.vendor != "postgresql":
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT coalesce(state, 'unknown'), count(*) FROM pg_stat_activity "
+                "WHERE datname = current_database() GROUP BY 1"
+            )
+            states = cursor.fetchall()
+            cursor.execute("SHOW max_connections")
+            (max_connections,) = cursor.fetchone()
+        gauge = GaugeMetricFamily(
+            "asset_db_connections",
+            "Connections to the application database, by state",
+            labels=["state"],
+        )
+        for state, count in states:
+            gauge.add_metric([state], count)
+        yield gauge
+        yield GaugeMetricFamily(
+            "asset_db_max_connections",
+            "Connections the database server accepts",
+            value=int(max_connections),
+        )
+
+    def tickets(self):
+        if not TicketService().enabled:
+            return
+        backlog = Review.objects.filter(
+            status__in=["pending", "in_progress"], external_ticket_id__isnull=True
+        ).count()
+        yield GaugeMetricFamily(
+            "asset_ticket_backlog",
+            "Open reviews without an external ticket",
+            value=backlog,
+        )
+
+
+def is_internal_request(request):
+    """
+    Whether a request comes straight from a private or loopback address.
+
+    Requests relayed by a proxy or load balancer carry a forwarding header
+    and come from the proxy's own private address, so they never count.
+    """
+    if "X-Forwarded-For" in request.headers or "Forwarded" in request.headers:
+        return False
+    try:
+        address = ipaddress.ip_address(request.META.get("REMOTE_ADDR", ""))
+    except ValueError:
+        return False
+    return address.is_private or address.is_loopback
+
+
+def render_metrics():
+    """Return the exposition of all metrics and its content type."""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = prometheus_client.CollectorRegistry()
+        MultiProcessCollector(registry)
+    else:
+        registry = prometheus_client.REGISTRY
+    gauges = prometheus_client.CollectorRegistry(auto_describe=False)
+    gauges.register(SaturationCollector())
+    output = b"".join(prometheus_client.generate_latest(r) for r in (registry, gauges))
+    return output, prometheus_client.CONTENT_TYPE_LATEST
@@ -0,0 +1,65 @@
+"""
+Pagination for large tables without ``COUNT(*)`` over every row.
+
+An unfiltered listing is counted from the planner's row estimate in
+``pg_class``, summed over the partitions of partitioned tables, once the
+table is large enough for the estimate to be the cheaper and sufficiently
+accurate answer. Filtered listings are counted with a bounded ``COUNT`` over
+at most ``ADMIN_COUNT_LIMIT`` rows, so a broad filter never scans the whole
+table just to number the pages.
+"""
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+def estimated_count(model, using="default"):
+    """
+    Return the planner's estimate of the rows in a model's table.
+
+    A partitioned table holds no rows of its own, so its estimate is the sum
+    of those of its partitions, at any depth. Returns None when no estimate
+    is available: on databases other than PostgreSQL, or for tables none of
+    whose partitions have been analyzed.
+    """
+    connection = connections[using]
+    if connection.vendor != "postgresql":
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "WITH RECURSIVE tables(oid) AS ("
+            "  SELECT to_regclass(%s)::oid"
+            "  UNION ALL"
+            "  SELECT inhrelid FROM pg_inherits JOIN tables ON inhparent = tables.oid"
+            ") "
+            "SELECT (sum(reltuples) FILTER (WHERE reltuples >= 0))::bigint "
+            "FROM pg_class JOIN tables USING (oid) WHERE relkind <> 'p'",
+            [connection.ops.quote_name(model._meta.db_table)],
+        )
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that estimates or bounds the count of large querysets.
+
+    ``ModelAdmin`` classes using it should also set
+    ``show_full_result_count = False``, which otherwise counts the whole
+    table a second time.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        query = queryset.query
+        threshold = getattr(settings, "ADMIN_ESTIMATED_COUNT_THRESHOLD", 100000)
+        if not query.where and not query.distinct:
+            estimate = estimated_count(queryset.model, using=queryset.db)
+            if estimate is not None and estimate >= threshold:
+                return estimate
+
+        limit = getattr(settings, "ADMIN_COUNT_LIMIT", 10000)
+        return queryset.order_by()[:limit].count()
@@ -0,0 +1,438 @@
+"""
+Yearly range partitioning of the calibration and maintenance history.
+
+On PostgreSQL the calibration and maintenance record tables can be converted
+into tables partitioned by the year of ``created_at``. ``created_at`` is set
+once and never null, so rows never move between partitions, and each year of
+history keeps its own heap and indexes: index sizes and vacuum times stay
+bounded however long the history grows.
+
+A partitioned table needs the partition key in its primary key, so converted
+tables have a primary key of ``(id, created_at)``. ``id`` is still drawn from
+a sequence and Django keeps treating it as the primary key.
+
+Queries are pruned to the partitions they can match when they filter on
+``created_at``, which the record viewsets accept as ``created_at__gte`` and
+``created_at__lt``. ``check_pruning`` explains the viewsets' queries and
+reports which partitions they scan.
+"""
+
+import json
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from django.db import connections, transaction
+from django.utils import timezone
+
+from .models import CalibrationRecord, MaintenanceRecord
+
+PARTITION_KEY = "created_at"
+
+MODELS = {
+    "calibrationrecord": CalibrationRecord,
+    "maintenancerecord": MaintenanceRecord,
+}
+
+# Rows changed this long before a conversion started are also re-copied, to
+# allow for clock differences between application servers and the database
+RESYNC_MARGIN = timedelta(hours=1)
+
+Partition = namedtuple("Partition", ["name", "bounds", "rows", "size"])
+
+
+def _connection(using):
+    connection = connections[using]
+    if connection.vendor != "postgresql":
+        raise ValueError("Table partitioning requires PostgreSQL")
+    return connection
+
+
+def _fetch(connection, sql, params=()):
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def _execute(connection, sql, params=()):
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+def partition_name(model, year):
+    return f"{model._meta.db_table}_y{year}"
+
+
+def default_partition_name(model):
+    return f"{model._meta.db_table}_default"
+
+
+def year_bounds(year):
+    """Return the ``FROM`` and ``TO`` bounds of a year's partition."""
+    return f"{year}-01-01 00:00:00+00", f"{year + 1}-01-01 00:00:00+00"
+
+
+def is_partitioned(model, using="default"):
+    connection = connections[using]
+    if connection.vendor != "postgresql":
+        return False
+    return _fetch(
+        connection,
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table "
+        "WHERE partrelid = to_regclass(%s))",
+        [connection.ops.quote_name(model._meta.db_table)],
+    )[0][0]
+
+
+def list_partitions(model, using="default", table=None):
+    """Return the partitions of a model's table with their estimated size."""
+    connection = _connection(using)
+    rows = _fetch(
+        connection,
+        """
+        SELECT c.relname, pg_get_expr(c.relpartbound, c.oid),
+               c.reltuples::bigint, pg_total_relation_size(c.oid)
+        FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = to_regclass(%s)
+        ORDER BY c.relname
+        """,
+        [connection.ops.quote_name(table or model._meta.db_table)],
+    )
+    return [Partition(*row) for row in rows]
+
+
+def create_partitions(model, years, using="default", table=None):
+    """
+    Create the yearly partitions that are missing, and the default partition.
+
+    ``table`` overrides the model's table, for a table being converted.
+
+    Rows that were stored in the default partition for want of a partition
+    for their year are moved into the new partition. Returns the names of
+    the partitions created.
+    """
+    connection = _connection(using)
+    quote = connection.ops.quote_name
+    table = table or model._meta.db_table
+    default = quote(default_partition_name(model))
+    existing = {
+        partition.name for partition in list_partitions(model, using, table=table)
+    }
+    created = []
+
+    table = quote(table)
+    with transaction.atomic(using=using):
+        _execute(
+            connection,
+            f"CREATE TABLE IF NOT EXISTS {default} PARTITION OF {table} DEFAULT",
+        )
+        for year in sorted(set(years)):
+            name = partition_name(model, year)
+            if name in existing:
+                continue
+            low, high = year_bounds(year)
+            stranded = _fetch(
+                connection,
+                f"SELECT EXISTS (SELECT 1 FROM {default} "
+                f"WHERE {PARTITION_KEY} >= %s AND {PARTITION_KEY} < %s)",
+                [low, high],
+            )[0][0]
+            if stranded:
+                # A partition cannot be created over rows in the default
+                # partition, so it is filled first and then attached
+                _execute(
+                    connection,
+                    f"CREATE TABLE {quote(name)} (LIKE {table} "
+                    f"INCLUDING DEFAULTS INCLUDING CONSTRAINTS)",
+                )
+                _execute(
+                    connection,
+                    f"""
+                    WITH moved AS (
+                        DELETE FROM {default}
+                        WHERE {PARTITION_KEY} >= %s AND {PARTITION_KEY} < %s
+                        RETURNING *
+                    )
+                    INSERT INTO {quote(name)} SELECT * FROM moved
+                    """,
+                    [low, high],
+                )
+                _execute(
+                    connection,
+                    f"ALTER TABLE {table} ATTACH PARTITION {quote(name)} "
+                    f"FOR VALUES FROM (%s) TO (%s)",
+                    [low, high],
+                )
+            else:
+                _execute(
+                    connection,
+                    f"CREATE TABLE {quote(name)} PARTITION OF {table} "
+                    f"FOR VALUES FROM (%s) TO (%s)",
+                    [low, high],
+                )
+            created.append(name)
+    return created
+
+
+def maintain_partitions(model, ahead=1, using="default"):
+    """
+    Create partitions up to ``ahead`` years from now, and for any years found
+    in the default partition.
+    """
+    connection = _connection(using)
+    default = connection.ops.quote_name(default_partition_name(model))
+    stranded = _fetch(
+        connection,
+        f"SELECT DISTINCT EXTRACT(YEAR FROM {PARTITION_KEY} AT TIME ZONE 'UTC')::int "
+        f"FROM {default}",
+    )
+    this_year = timezone.now().year
+    years = [row[0] for row in stranded] + list(range(this_year, this_year + ahead + 1))
+    return create_partitions(model, years, using=using)
+
+
+class TableConverter:
+    """
+    Converts a model's table into a partitioned table while it stays in use.
+
+    Rows are copied into a new partitioned table in batches, each committed on
+    its own. The tables are then swapped under a short exclusive lock, during
+    which rows written since the copy started are synchronized. The original
+    table is kept as ``<table>_unpartitioned`` until it is dropped by hand.
+
+    An interrupted conversion resumes copying after the last copied row.
+    Writes made during the copy without updating ``updated_at`` are not
+    synchronized, so bulk updates should be paused while converting.
+    """
+
+    def __init__(self, model, using="default", progress=None):
+        self.model = model
+        self.using = using
+        self.connection = _connection(using)
+        self.progress = progress or (lambda done, total: None)
+        self.table = model._meta.db_table
+        self.new_table = f"{self.table}_partitioned"
+        self.old_table = f"{self.table}_unpartitioned"
+
+    def quote(self, name):
+        return self.connection.ops.quote_name(name)
+
+    def fetch(self, sql, params=()):
+        return _fetch(self.connection, sql, params)
+
+    def execute(self, sql, params=()):
+        _execute(self.connection, sql, params)
+
+    def convert(self, batch_size=50000, ahead=1):
+        """Convert the table, returning the number of rows copied."""
+        if is_partitioned(self.model, self.using):
+            raise ValueError(f"{self.table} is already partitioned")
+
+        started = self.create_table(ahead)
+        last_id = self.fetch(
+            f"SELECT COALESCE(MAX(id), 0) FROM {self.quote(self.new_table)}"
+        )[0][0]
+        high = self.fetch(f"SELECT COALESCE(MAX(id), 0) FROM {self.quote(self.table)}")[
+            0
+        ][0]
+        while last_id < high:
+            with transaction.atomic(using=self.using):
+                self.copy_rows("id > %s AND id <= %s", [last_id, last_id + batch_size])
+            last_id = min(last_id + batch_size, high)
+            self.progress(last_id, high)
+
+        renamed_indexes = self.create_indexes()
+        with transaction.atomic(using=self.using):
+            self.swap(high, started, renamed_indexes)
+        return self.fetch(f"SELECT COUNT(*) FROM {self.quote(self.table)}")[0][0]
+
+    def create_table(self, ahead):
+        """
+        Create the partitioned table unless a previous run did; return the
+        time the conversion started.
+        """
+        new = self.quote(self.new_table)
+        if self.fetch("SELECT to_regclass(%s) IS NOT NULL", [new])[0][0]:
+            comment = self.fetch("SELECT obj_description(%s::regclass)", [new])[0][0]
+            return datetime.fromisoformat(json.loads(comment)["started"])
+
+        started = timezone.now()
+        table = self.quote(self.table)
+        sequence = self.quote(f"{self.new_table}_id_seq")
+        years = [
+            int(row[0])
+            for row in self.fetch(
+                f"SELECT DISTINCT EXTRACT(YEAR FROM {PARTITION_KEY} AT TIME ZONE 'UTC') "
+                f"FROM {table}"
+            )
+        ]
+        this_year = started.year
+        years += range(this_year, this_year + ahead + 1)
+
+        with transaction.atomic(using=self.using):
+            # Identity columns are not carried over; ids come from a plain
+            # sequence that continues the original one when the tables swap
+            self.execute(
+                f"CREATE TABLE {new} (LIKE {table} INCLUDING DEFAULTS "
+                f"INCLUDING CONSTRAINTS) PARTITION BY RANGE ({PARTITION_KEY})"
+            )
+            self.execute(f"ALTER TABLE {new} ADD PRIMARY KEY (id, {PARTITION_KEY})")
+            self.execute(f"CREATE SEQUENCE {sequence} OWNED BY {new}.id")
+            self.execute(
+                f"ALTER TABLE {new} ALTER COLUMN id SET DEFAULT nextval(%s)",
+                [sequence],
+            )
+            self.execute(
+                f"COMMENT ON TABLE {new} IS %s",
+                [json.dumps({"started": started.isoformat()})],
+            )
+            create_partitions(self.model, years, using=self.using, table=self.new_table)
+        return started
+
+    def copy_rows(self, where, params):
+        self.execute(
+            f"INSERT INTO {self.quote(self.new_table)} "
+            f"SELECT * FROM {self.quote(self.table)} WHERE {where}",
+            params,
+        )
+
+    def create_indexes(self):
+        """
+        Create the model's foreign keys and indexes on the partitioned table.
+
+        Indexes named in the model's ``Meta.indexes`` are created under a
+        temporary name, as the original table still holds theirs. Returns
+        ``(temporary, final)`` name pairs to rename at the swap.
+        """
+        new = self.quote(self.new_table)
+        existing = {
+            row[0]
+            for row in self.fetch(
+                "SELECT indexname FROM pg_indexes WHERE tablename = %s",
+                [self.new_table],
+            )
+        }
+        constraints = {
+            row[0]
+            for row in self.fetch(
+                "SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass",
+                [new],
+            )
+        }
+        for field in self.model._meta.concrete_fields:
+            if not field.remote_field:
+                continue
+            index = f"{self.new_table}_{field.column}_idx"
+            if field.db_index and index not in existing:
+                self.execute(
+                    f"CREATE INDEX {self.quote(index)} ON {new} ({field.column})"
+                )
+            constraint = f"{self.new_table}_{field.column}_fk"
+            if field.db_constraint and constraint not in constraints:
+                target = field.target_field
+                self.execute(
+                    f"ALTER TABLE {new} ADD CONSTRAINT {self.quote(constraint)} "
+                    f"FOREIGN KEY ({field.column}) REFERENCES "
+                    f"{self.quote(target.model._meta.db_table)} ({target.column}) "
+                    f"DEFERRABLE INITIALLY DEFERRED"
+                )
+
+        renamed = []
+        with self.connection.schema_editor(atomic=False) as editor:
+            for index in self.model._meta.indexes:
+                temporary = index.clone()
+                temporary.name = f"{index.name}_p"
+                if temporary.name not in existing:
+                    statement = temporary.create_sql(self.model, editor)
+                    statement.rename_table_references(self.table, self.new_table)
+                    self.execute(str(statement))
+                renamed.append((temporary.name, index.name))
+        return renamed
+
+    def swap(self, copied_id, started, renamed_indexes):
+        table = self.quote(self.table)
+        new = self.quote(self.new_table)
+        self.execute(f"LOCK TABLE {table} IN ACCESS EXCLUSIVE MODE")
+
+        # Rows changed or deleted during the copy, then rows added since
+        since = started - RESYNC_MARGIN
+        self.execute(
+            f"DELETE FROM {new} n USING {table} o "
+            f"WHERE o.id = n.id AND o.updated_at >= %s",
+            [since],
+        )
+        self.execute(
+            f"DELETE FROM {new} n WHERE NOT EXISTS "
+            f"(SELECT 1 FROM {table} o WHERE o.id = n.id)"
+        )
+        self.copy_rows("updated_at >= %s AND id <= %s", [since, copied_id])
+        self.copy_rows("id > %s", [copied_id])
+
+        self.execute(
+            "SELECT setval(%s, (SELECT COALESCE(MAX(id), 0) + 1 FROM {}), false)".format(
+                table
+            ),
+            [self.quote(f"{self.new_table}_id_seq")],
+        )
+        for temporary, final in renamed_indexes:
+            self.execute(
+                f"ALTER INDEX {self.quote(final)} RENAME TO {self.quote(final + '_u')}"
+            )
+            self.execute(
+                f"ALTER INDEX {self.quote(temporary)} RENAME TO {self.quote(final)}"
+            )
+        self.execute(f"COMMENT ON TABLE {new} IS NULL")
+        self.execute(f"ALTER TABLE {table} RENAME TO {self.quote(self.old_table)}")
+        self.execute(f"ALTER TABLE {new} RENAME TO {table}")
+
+
+def scanned_partitions(queryset):
+    """Return the tables a queryset's plan reads, from ``EXPLAIN``."""
+    connection = _connection(queryset.db)
+    sql, params = queryset.query.sql_with_params()
+    plan = _fetch(connection, f"EXPLAIN (FORMAT JSON) {sql}", params)[0][0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+
+    relations = set()
+
+    def walk(node):
+        if "Relation Name" in node:
+            relations.add(node["Relation Name"])
+        for child in node.get("Plans", []):
+            walk(child)
+
+    walk(plan[0]["Plan"])
+    return relations
+
+
+def check_pruning(year=None, using="default"):
+    """
+    Explain the record viewsets' list queries filtered to one year.
+
+    Returns ``(model, scanned, expected)`` for each partitioned model, where
+    ``scanned`` are the model's partitions the plan reads and ``expected``
+    the one it should.
+    """
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+
+    from .views import CalibrationRecordViewSet, MaintenanceRecordViewSet
+
+    year = year or timezone.now().year
+    low, high = year_bounds(year)
+    request = Request(
+        APIRequestFactory().get(
+            "/", {f"{PARTITION_KEY}__gte": low, f"{PARTITION_KEY}__lt": high}
+        )
+    )
+    results = []
+    for viewset in (CalibrationRecordViewSet, MaintenanceRecordViewSet):
+        model = viewset.queryset.model
+        if not is_partitioned(model, using):
+            continue
+        view = viewset(request=request, action="list", format_kwarg=None, kwargs={})
+        queryset = view.filter_queryset(view.get_queryset()).using(using)
+        partitions = {partition.name for partition in list_partitions(model, using)}
+        scanned = scanned_partitions(queryset) & partitions
+        results.append((model, scanned, {partition_name(model, year)}))
+    return results
@@ -0,0 +1,274 @@
+"""
+Per-request profiling of SQL, serialization and rendering.
+
+``RequestProfilingMiddleware`` counts every request and its duration, labelled
+by view and action (``InstrumentViewSet.list``). A sample of requests, set by
+``REQUEST_PROFILING_SAMPLE_RATE``, is also profiled in detail:
+
+- every query is timed through the connections' execute wrappers and reduced
+  to a fingerprint, so that the slowest statements can be recognized across
+  requests whatever their parameters;
+- the time spent serializing, in the list and retrieve actions of the
+  viewsets (``ConditionalViewSetMixin`` and ``FlatListMixin``), and rendering
+  the response is measured separately. Queries run while serializing count
+  as database time only.
+
+Profiled requests report these timings in Prometheus histograms when
+``prometheus_client`` is installed and, if ``REQUEST_PROFILING_SERVER_TIMING``
+is set (by default only with ``DEBUG``), in a ``Server-Timing`` header, which
+browsers show in their network panel. Requests slower than
+``REQUEST_PROFILING_LOG_THRESHOLD_MS`` are logged with their slowest queries.
+
+Requests that are not sampled only pay for a random draw and two metric
+updates, so the middleware can stay enabled in production.
+"""
+
+import contextvars
+import hashlib
+import logging
+import random
+import re
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+try:
+    import prometheus_client
+except ImportError:  # pragma: no cover
+    prometheus_client = None
+
+logger = logging.getLogger(__name__)
+
+_profile = contextvars.ContextVar("request_profile", default=None)
+
+_NORMALIZERS = [
+    # String and numeric literals, and placeholders
+    (re.compile(r"'(?:[^']|'')*'"), "?"),
+    (re.compile(r"\b\d+(?:\.\d+)?\b"), "?"),
+    (re.compile(r"%s"), "?"),
+    # IN lists of any length
+    (re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)"), "(...)"),
+    (re.compile(r"\s+"), " "),
+]
+
+
+def normalize_sql(sql):
+    """Return SQL with its literals and parameters replaced by ``?``."""
+    for pattern, replacement in _NORMALIZERS:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+def fingerprint(sql):
+    """Return a short stable identifier of a statement's normalized form."""
+    return hashlib.md5(normalize_sql(sql).encode()).hexdigest()[:12]
+
+
+if prometheus_client is not None:
+    REQUESTS = prometheus_client.Counter(
+        "asset_requests",
+        "Requests handled, by view and action",
+        ["view", "method", "status"],
+    )
+    IN_PROGRESS = prometheus_client.Gauge(
+        "asset_requests_in_progress",
+        "Requests being handled",
+        multiprocess_mode="livesum",
+    )
+    REQUEST_SECONDS = prometheus_client.Histogram(
+        "asset_request_seconds", "Time to handle a request", ["view"]
+    )
+    PROFILED_QUERIES = prometheus_client.Histogram(
+        "asset_request_queries",
+        "Queries per profiled request",
+        ["view"],
+        buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500),
+    )
+    PROFILED_SECONDS = prometheus_client.Histogram(
+        "asset_request_phase_seconds",
+        "Time per profiled request spent in the database, serializing and rendering",
+        ["view", "phase"],
+    )
+
+
+class RequestProfile:
+    """Timings collected while handling one sampled request."""
+
+    def __init__(self, slow_query_count=3):
+        self.started = time.perf_counter()
+        self.duration = None
+        self.view = "unresolved"
+        self.query_count = 0
+        self.phases = {"db": 0.0, "serialize": 0.0, "render": 0.0}
+        self.slowest = []
+        self.slow_query_count = slow_query_count
+        self._depth = 0
+
+    def record_query(self, sql, duration):
+        self.query_count += 1
+        self.phases["db"] += duration
+        if len(self.slowest) < self.slow_query_count:
+            self.slowest.append((duration, sql))
+        elif duration > self.slowest[-1][0]:
+            self.slowest[-1] = (duration, sql)
+        else:
+            return
+        self.slowest.sort(key=lambda query: query[0], reverse=True)
+
+    @contextmanager
+    def measure(self, phase):
+        # Nested measurements (a serializer inside another) count once, and
+        # queries run in the block are database time
+        self._depth += 1
+        started = time.perf_counter()
+        db_started = self.phases["db"]
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            if not self._depth:
+                elapsed = time.perf_counter() - started
+                self.phases[phase] += elapsed - (self.phases["db"] - db_started)
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.record_query(sql, time.perf_counter() - started)
+
+    def slow_queries(self):
+        """Return the slowest queries as dicts with their fingerprints."""
+        return [
+            {
+                "fingerprint": fingerprint(sql),
+                "ms": round(duration * 1000, 2),
+                "sql": normalize_sql(sql),
+            }
+            for duration, sql in self.slowest
+        ]
+
+    def server_timing(self):
+        entries = [
+            f'db;dur={self.phases["db"] * 1000:.1f};desc="{self.query_count} queries"',
+            f'serialize;dur={self.phases["serialize"] * 1000:.1f}',
+            f'render;dur={self.phases["render"] * 1000:.1f}',
+            f"total;dur={self.duration * 1000:.1f}",
+        ]
+        return ", ".join(entries)
+
+
+def current_profile():
+    """Return the profile of the request being handled, if it is sampled."""
+    return _profile.get()
+
+
+@contextmanager
+def measure(phase):
+    """Add the time spent in the block to a phase of a profiled request."""
+    profile = _profile.get()
+    if profile is None:
+        yield
+    else:
+        with profile.measure(phase):
+            yield
+
+
+def view_label(request, view_func):
+    """Return ``Class.action`` for class-based views, the name otherwise."""
+    view_class = getattr(view_func, "cls", None) or getattr(
+        view_func, "view_class", None
+    )
+    if view_class is None:
+        return getattr(view_func, "__name__", "unknown")
+    method = request.method.lower()
+    # Viewsets map methods to actions such as list and retrieve
+    action = (getattr(view_func, "actions", None) or {}).get(method, method)
+    return f"{view_class.__name__}.{action}"
+
+
+class RequestProfilingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        rate = getattr(settings, "REQUEST_PROFILING_SAMPLE_RATE", 0.0)
+        profile = None
+        if rate and random.random() < rate:
+            profile = RequestProfile(
+                getattr(settings, "REQUEST_PROFILING_SLOW_QUERIES", 3)
+            )
+        request.profile = profile
+        request.profile_view = "unresolved"
+
+        if prometheus_client is not None:
+            IN_PROGRESS.inc()
+        try:
+            response = self.handle(request, profile)
+        finally:
+            if prometheus_client is not None:
+                IN_PROGRESS.dec()
+
+        duration = time.perf_counter() - started
+        view = request.profile_view
+        if prometheus_client is not None:
+            REQUESTS.labels(view, request.method, response.status_code).inc()
+            REQUEST_SECONDS.labels(view).observe(duration)
+        if profile is not None:
+            profile.duration = duration
+            profile.view = view
+            self.report(profile, response)
+        return response
+
+    def handle(self, request, profile):
+        if profile is None:
+            return self.get_response(request)
+        token = _profile.set(profile)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(profile))
+                return self.get_response(request)
+        finally:
+            _profile.reset(token)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.profile_view = view_label(request, view_func)
+
+    def process_template_response(self, request, response):
+        profile = request.profile
+        if profile is None:
+            return response
+        # Responses are rendered after this hook returns
+        started = time.perf_counter()
+
+        def rendered(response):
+            profile.phases["render"] += time.perf_counter() - started
+
+        response.add_post_render_callback(rendered)
+        return response
+
+    def report(self, profile, response):
+        if getattr(settings, "REQUEST_PROFILING_SERVER_TIMING", settings.DEBUG):
+            response["Server-Timing"] = profile.server_timing()
+
+        if prometheus_client is not None:
+            PROFILED_QUERIES.labels(profile.view).observe(profile.query_count)
+            for phase, seconds in profile.phases.items():
+                PROFILED_SECONDS.labels(profile.view, phase).observe(seconds)
+
+        threshold = getattr(settings, "REQUEST_PROFILING_LOG_THRESHOLD_MS", 500)
+        if profile.duration * 1000 >= threshold:
+            slow_queries = profile.slow_queries()
+            logger.warning(
+                "Slow request %s: %.1f ms, %d queries in %.1f ms; slowest: %s",
+                profile.view,
+                profile.duration * 1000,
+                profile.query_count,
+                profile.phases["db"] * 1000,
+                ", ".join(f"{q['fingerprint']} ({q['ms']} ms)" for q in slow_queries),
+                extra={"slow_queries": slow_queries},
+            )
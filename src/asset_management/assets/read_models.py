@@ -0,0 +1,155 @@
+"""
+Maintenance of the denormalized ``InstrumentSummary`` read model.
+
+Writes that affect a summary call ``schedule_refresh`` (see ``signals.py``).
+Refreshes are deferred until the transaction commits and coalesced, so an
+instrument saved several times in one request is only recomputed once.
+"""
+
+import threading
+from functools import partial
+
+from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .models import CalibrationRecord, Instrument, InstrumentSummary, Issue
+
+OPEN_ISSUE_STATUSES = ("open", "in_progress")
+
+SUMMARY_FIELDS = [
+    "name",
+    "serial_number",
+    "model",
+    "manufacturer",
+    "category",
+    "status",
+    "review_status",
+    "last_review_date",
+    "location",
+    "location_name",
+    "site_name",
+    "department",
+    "department_name",
+    "latest_calibration_date",
+    "next_calibration_date",
+    "open_issue_count",
+    "refreshed_at",
+]
+
+
+class DeferredRefresh:
+    """
+    Instruments to refresh once the transaction on their database commits.
+
+    Calls of ``schedule()`` within a transaction are coalesced, so an
+    instrument saved several times in one request is only refreshed once, by
+    ``refresh(instrument_ids, using=...)``.
+    """
+
+    def __init__(self, refresh):
+        self.refresh = refresh
+        self._local = threading.local()
+
+    def pending(self):
+        if not hasattr(self._local, "by_database"):
+            self._local.by_database = {}
+        return self._local.by_database
+
+    def schedule(self, instrument_ids, using="default"):
+        self.pending().setdefault(using, set()).update(instrument_ids)
+        transaction.on_commit(partial(self.flush, using), using=using)
+
+    def flush(self, using):
+        # Every scheduled callback runs this; the first one refreshes everything
+        # queued so far and the rest find nothing left to do.
+        instrument_ids = self.pending().pop(using, None)
+        if instrument_ids:
+            self.refresh(instrument_ids, using=using)
+
+
+def schedule_refresh(instrument_ids, using="default"):
+    """
+    Refresh the summaries of the given instruments once the transaction commits.
+    """
+    _pending.schedule(instrument_ids, using=using)
+
+
+def summary_source_queryset():
+    """
+    Return instruments annotated with everything needed to build summaries.
+    """
+    latest_calibration = CalibrationRecord.objects.filter(
+        instrument=OuterRef("pk"), status="completed"
+    ).order_by("-date_performed", "-pk")
+    open_issues = (
+        Issue.objects.filter(instrument=OuterRef("pk"), status__in=OPEN_ISSUE_STATUSES)
+        .order_by()
+        .values("instrument")
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+    return Instrument.objects.select_related("location__site", "department").annotate(
+        latest_calibration_date=Subquery(
+            latest_calibration.values("date_performed")[:1]
+        ),
+        next_calibration_date=Subquery(
+            latest_calibration.values("next_calibration_date")[:1]
+        ),
+        open_issue_count=Coalesce(
+            Subquery(open_issues, output_field=IntegerField()), Value(0)
+        ),
+    )
+
+
+def build_summary(instrument):
+    return InstrumentSummary(
+        instrument=instrument,
+        name=instrument.name,
+        serial_number=instrument.serial_number,
+        model=instrument.model,
+        manufacturer=instrument.manufacturer,
+        category=instrument.category,
+        status=instrument.status,
+        review_status=instrument.review_status,
+        last_review_date=instrument.last_review_date,
+        location=instrument.location,
+        location_name=instrument.location.name,
+        site_name=instrument.location.site.name,
+        department=instrument.department,
+        department_name=instrument.department.name,
+        latest_calibration_date=instrument.latest_calibration_date,
+        next_calibration_date=instrument.next_calibration_date,
+        open_issue_count=instrument.open_issue_count,
+    )
+
+
+def refresh_instrument_summaries(instrument_ids=None, batch_size=1000, using="default"):
+    """
+    Recompute summaries for the given instruments, or all of them if None.
+
+    Each batch is read with one query and written with one upsert. Returns the
+    number of summaries written.
+    """
+    queryset = summary_source_queryset().using(using).order_by("pk")
+    if instrument_ids is not None:
+        queryset = queryset.filter(pk__in=list(instrument_ids))
+
+    written = 0
+    last_pk = 0
+    while True:
+        batch = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            break
+        InstrumentSummary.objects.using(using).bulk_create(
+            [build_summary(instrument) for instrument in batch],
+            update_conflicts=True,
+            unique_fields=["instrument"],
+            update_fields=SUMMARY_FIELDS,
+        )
+        written += len(batch)
+        last_pk = batch[-1].pk
+    return written
+
+
+_pending = DeferredRefresh(refresh_instrument_summaries)
@@ -0,0 +1,90 @@
+"""
+Department scoping of instruments and their records.
+
+Staff and auditors see every department. Other users see the instruments of
+their own department and the calibration and maintenance records, reviews and
+issues of those instruments; users without a department see none of them.
+
+The rule is applied by the querysets of these models, through
+``Model.objects.visible_to(user)``, so the views of the ``api`` and ``assets``
+apps scope rows the same way with one predicate on the department.
+"""
+
+from django.db import models
+
+
+def sees_all_departments(user):
+    return user.is_staff or user.role == "auditor"
+
+
+class DepartmentScopedQuerySet(models.QuerySet):
+    """
+    Queryset of a model belonging to a department.
+
+    The model's ``department_field`` is the lookup of its department, such as
+    ``"department"`` or ``"instrument__department"``.
+    """
+
+    def visible_to(self, user):
+        if sees_all_departments(user):
+            return self
+        condition = self.shared_with(user)
+        if user.department_id is not None:
+            department = models.Q(
+                **{f"{self.model.department_field}_id": user.department_id}
+            )
+            condition = department if condition is None else department | condition
+        if condition is None:
+            return self.none()
+        return self.filter(condition)
+
+    def shared_with(self, user):
+        """Condition on the rows a user sees outside their department, if any."""
+        return None
+
+
+class InstrumentRecordQuerySet(DepartmentScopedQuerySet):
+    """
+    Queryset of records carrying a copy of their instrument's department.
+
+    ``save`` copies the department, so ``bulk_create`` fills it in as well:
+    from the instrument when it is loaded, or else with one query.
+    """
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        instrument = self.model._meta.get_field("instrument")
+        missing = set()
+        for obj in objs:
+            if obj.department_id is None:
+                if instrument.is_cached(obj):
+                    obj.department_id = obj.instrument.department_id
+                else:
+                    missing.add(obj.instrument_id)
+        if missing:
+            departments = dict(
+                instrument.related_model._base_manager.using(self.db)
+                .filter(pk__in=missing)
+                .values_list("pk", "department_id")
+            )
+            for obj in objs:
+                if obj.department_id is None:
+                    obj.department_id = departments.get(obj.instrument_id)
+        return super().bulk_create(objs, *args, **kwargs)
+
+
+class ReviewQuerySet(InstrumentRecordQuerySet):
+    """Reviews are also visible to the users who requested or were assigned them."""
+
+    def shared_with(self, user):
+        return models.Q(requested_by=user) | models.Q(assigned_to=user)
+
+
+class ArchivedRecordQuerySet(DepartmentScopedQuerySet):
+    """
+    Archived issues and reviews are scoped like live ones, by their
+    instrument's department; archived certificates, like live ones, are not.
+    """
+
+    def shared_with(self, user):
+        return models.Q(kind="certificate")
@@ -12,8 +12,9 @@ from .models import (
     Issue,
     SensorType,
     MeasurementType,
+    ArchivedRecord,
 )
-from .services import TicketService
+from .services import ReviewWorkflowService
 
 CustomUser = get_user_model()
 
@@ -91,44 +92,11 @@ class ReviewSerializer(serializers.ModelSerializer):
         )
 
     def create(self, validated_data):
-        # Set the requesting user
         validated_data["requested_by"] = self.context["request"].user
-
-        # Create the review
-        review = super().create(validated_data)
-
-        # Update instrument review status
-        review.instrument.review_status = "pending"
-        review.instrument.save()
-
-        # Create external ticket if configured
-        ticket_service = TicketService()
-        ticket_data = ticket_service.create_ticket(review)
-        if ticket_data:
-            review.external_ticket_id = ticket_data["ticket_id"]
-            review.external_ticket_url = ticket_data["ticket_url"]
-            review.save()
-
-        return review
+        return ReviewWorkflowService().request_review(**validated_data)
 
     def update(self, instance, validated_data):
-        # Update the review
-        review = super().update(instance, validated_data)
-
-        # Update instrument review status based on review status
-        if review.status == "completed":
-            review.instrument.review_status = "completed"
-            review.instrument.last_review_date = review.updated_at
-            review.instrument.save()
-        elif review.status == "in_progress":
-            review.instrument.review_status = "in_progress"
-            review.instrument.save()
-
-        # Update external ticket if configured
-        ticket_service = TicketService()
-        ticket_service.update_ticket(review)
-
-        return review
+        return ReviewWorkflowService().update_review(instance, **validated_data)
 
 
 class MaintenanceRecordSerializer(serializers.ModelSerializer):
@@ -350,3 +318,9 @@ class MeasurementTypeSerializer(serializers.ModelSerializer):
     class Meta:
         model = MeasurementType
         fields = "__all__"
+
+
+class ArchivedRecordSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ArchivedRecord
+        fields = "__all__"
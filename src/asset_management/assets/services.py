@@ -1,7 +1,20 @@
 from typing import Optional
 from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
 import requests
-from .models import Review
+from . import audit
+from .events import build_event, publish_on_commit
+from .models import (
+    AuditEvent,
+    Instrument,
+    InstrumentTransfer,
+    Review,
+    start_periods,
+    update_record_departments,
+)
+from .read_models import schedule_refresh
+from .trees import invalidate_site_trees
 
 
 class TicketService:
@@ -71,3 +84,205 @@ class TicketService:
             return response.json()
         except requests.RequestException:
             return None
+
+
+class ReviewWorkflowService:
+    """
+    Applies review state changes and their effect on the reviewed instrument.
+
+    Each change runs in one transaction that writes only the changed review
+    columns and updates the instrument with a single ``UPDATE ... WHERE``
+    rather than a full-row save, so reviews of a busy instrument hold its row
+    lock only briefly. The ticket system is called after commit, outside the
+    transaction.
+    """
+
+    # Review fields mirrored on the external ticket
+    TICKET_FIELDS = ("status", "assigned_to")
+
+    def request_review(self, **fields) -> Review:
+        """
+        Create a review and mark its instrument as pending review.
+        """
+        with transaction.atomic():
+            review = Review.objects.create(**fields)
+            self._set_instrument_review_status(review.instrument, "pending")
+            transaction.on_commit(lambda: self._create_ticket(review), robust=True)
+        return review
+
+    def update_review(self, review: Review, **changes) -> Review:
+        """
+        Apply changes to a review, moving the instrument along with its status.
+        """
+        changed = [
+            name for name, value in changes.items() if _differs(review, name, value)
+        ]
+        if not changed:
+            return review
+
+        with transaction.atomic():
+            for name in changed:
+                setattr(review, name, changes[name])
+            review.save(update_fields=[*changed, "updated_at"])
+
+            if "status" in changed:
+                if review.status == "completed":
+                    self._set_instrument_review_status(
+                        review.instrument,
+                        "completed",
+                        last_review_date=review.updated_at,
+                    )
+                elif review.status == "in_progress":
+                    self._set_instrument_review_status(review.instrument, "in_progress")
+
+            if review.external_ticket_id and set(changed) & set(self.TICKET_FIELDS):
+                transaction.on_commit(
+                    lambda: TicketService().update_ticket(review), robust=True
+                )
+        return review
+
+    def attach_ticket(self, review: Review, ticket: dict) -> Review:
+        """
+        Record the external ticket created for a review.
+        """
+        review.external_ticket_id = ticket["ticket_id"]
+        review.external_ticket_url = ticket["ticket_url"]
+        review.save(
+            update_fields=["external_ticket_id", "external_ticket_url", "updated_at"]
+        )
+        return review
+
+    def _create_ticket(self, review):
+        ticket = TicketService().create_ticket(review)
+        if ticket:
+            self.attach_ticket(review, ticket)
+
+    def _set_instrument_review_status(self, instrument, review_status, **extra):
+        """
+        Update the instrument's review fields without a full-row save.
+
+        Without extra fields the row is only written (and locked) when its
+        review status actually changes. Queryset updates skip ``post_save``,
+        so the status event, audit event and summary refresh are scheduled
+        here.
+        """
+        values = {"review_status": review_status, **extra}
+        instruments = Instrument.objects.filter(pk=instrument.pk)
+        if not extra:
+            instruments = instruments.exclude(review_status=review_status)
+        now = timezone.now()
+        if not instruments.update(updated_at=now, **values):
+            return
+
+        old = instrument.review_status
+        changes = {}
+        for name, value in values.items():
+            if getattr(instrument, name) != value:
+                changes[name] = [getattr(instrument, name), value]
+            setattr(instrument, name, value)
+        instrument.updated_at = now
+        if changes:
+            audit.record(Instrument, instrument.pk, AuditEvent.UPDATE, changes)
+            instrument._loaded_state.update(
+                (name, new) for name, (_, new) in changes.items()
+            )
+        if old != review_status:
+            publish_on_commit(
+                build_event(instrument, "review_status", old, review_status)
+            )
+            instrument._loaded_state["review_status"] = review_status
+        schedule_refresh([instrument.pk])
+
+
+class InstrumentTransferService:
+    """
+    Moves instruments to another location or department in one batch.
+
+    The instruments are locked and their current placement read with one
+    query, then moved with ``UPDATE ... WHERE id IN`` statements instead of a
+    full-row save each. The instruments' history and the records of those
+    changing department follow in the same transaction, the moves are logged
+    as one ``InstrumentTransfer`` and in the audit trail, and the instrument
+    summaries are refreshed once after commit.
+    """
+
+    # Instruments per UPDATE statement
+    BATCH_SIZE = 1000
+
+    def transfer(
+        self, instruments, user, location=None, department=None, reason=""
+    ) -> InstrumentTransfer:
+        """
+        Move a queryset of instruments and return the transfer logged.
+
+        Instruments already at the destination are left alone.
+        """
+        if location is None and department is None:
+            raise ValueError("A transfer needs a location or a department")
+        values = {}
+        if location is not None:
+            values["location"] = location
+        if department is not None:
+            values["department"] = department
+
+        with transaction.atomic():
+            placements = instruments.select_for_update(of=("self",)).order_by("pk")
+            rows = [
+                row
+                for row in placements.values_list(
+                    "pk", "location_id", "department_id", "status"
+                )
+                if (location is not None and row[1] != location.pk)
+                or (department is not None and row[2] != department.pk)
+            ]
+            now = timezone.now()
+            for start in range(0, len(rows), self.BATCH_SIZE):
+                batch = rows[start:start + self.BATCH_SIZE]
+                ids = [row[0] for row in batch]
+                Instrument.objects.filter(pk__in=ids).update(updated_at=now, **values)
+                start_periods(
+                    [
+                        (
+                            pk,
+                            location.pk if location else location_id,
+                            department.pk if department else department_id,
+                            status,
+                        )
+                        for pk, location_id, department_id, status in batch
+                    ],
+                    when=now,
+                )
+                if department is not None:
+                    update_record_departments(
+                        [row[0] for row in batch if row[2] != department.pk]
+                    )
+            changes = []
+            for pk, location_id, department_id, _ in rows:
+                instrument_changes = {}
+                if location is not None and location_id != location.pk:
+                    instrument_changes["location"] = [location_id, location.pk]
+                if department is not None and department_id != department.pk:
+                    instrument_changes["department"] = [department_id, department.pk]
+                changes.append((pk, instrument_changes))
+            audit.record_many(Instrument, changes, AuditEvent.UPDATE)
+            moved = [list(row[:3]) for row in rows]
+            schedule_refresh([row[0] for row in rows])
+            # The sites the instruments left, and the one they went to
+            invalidate_site_trees(
+                location_ids=[row[1] for row in rows] + [location and location.pk]
+            )
+            return InstrumentTransfer.objects.create(
+                location=location,
+                department=department,
+                reason=reason,
+                moved=moved,
+                instrument_count=len(moved),
+                transferred_by=user,
+            )
+
+
+def _differs(instance, name, value):
+    field = instance._meta.get_field(name)
+    if field.is_relation:
+        return getattr(instance, field.attname) != getattr(value, "pk", value)
+    return getattr(instance, name) != value
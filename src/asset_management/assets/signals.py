@@ -0,0 +1,282 @@
+from django.db.models import Q
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_init,
+    post_save,
+    pre_delete,
+)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import audit
+from .capabilities import schedule_capability_refresh
+from .events import build_event, publish_on_commit
+from .models import (
+    AuditEvent,
+    CalibrationRecord,
+    Department,
+    Instrument,
+    InstrumentSummary,
+    Issue,
+    Location,
+    Review,
+    SensorType,
+    Site,
+    start_periods,
+    update_record_departments,
+)
+from .read_models import schedule_refresh
+from .trees import invalidate_site_trees
+
+# Fields whose loaded values post_save receivers compare with the saved ones,
+# by model, as {name: attname}. Only these are copied as instances load.
+REMEMBERED_FIELDS = {}
+
+
+def remember(model, *names):
+    """Keep the values of a model's fields as loaded until the next save."""
+    fields = REMEMBERED_FIELDS.setdefault(model, {})
+    for name in names:
+        fields[name] = model._meta.get_field(name).attname
+    post_init.connect(remember_loaded_state, sender=model)
+
+
+def _remembered_state(instance):
+    # Read from __dict__ so that deferred fields are never fetched
+    values = instance.__dict__
+    return {
+        name: values[attname]
+        for name, attname in REMEMBERED_FIELDS[type(instance)].items()
+        if attname in values
+    }
+
+
+def remember_loaded_state(sender, instance, **kwargs):
+    instance._loaded_state = _remembered_state(instance)
+
+
+def remember_saved_state(sender, instance, **kwargs):
+    # Connected after every other post_save receiver, which compare the saved
+    # values with those loaded
+    instance._loaded_state = _remembered_state(instance)
+
+
+def _loaded(instance, *names):
+    return tuple(instance._loaded_state.get(name) for name in names)
+
+
+def _saved(instance, *names):
+    fields = REMEMBERED_FIELDS[type(instance)]
+    return tuple(getattr(instance, fields[name]) for name in names)
+
+
+# Fields whose transitions are broadcast to event stream subscribers
+TRACKED_FIELDS = {
+    Instrument: ("status", "review_status"),
+    Review: ("status",),
+    Issue: ("status",),
+}
+
+for model, fields in TRACKED_FIELDS.items():
+    remember(model, *fields)
+
+
+@receiver(post_save)
+def publish_state_transitions(sender, instance, created, using, **kwargs):
+    fields = TRACKED_FIELDS.get(sender)
+    if not fields:
+        return
+    previous = (None,) * len(fields) if created else _loaded(instance, *fields)
+    for field, old, new in zip(fields, previous, _saved(instance, *fields)):
+        if new is not None and old != new:
+            publish_on_commit(build_event(instance, field, old, new), using=using)
+
+
+def record_audit_event(sender, instance, created, using, **kwargs):
+    current = audit.snapshot(instance)
+    changes = audit.diff({} if created else instance._loaded_state, current)
+    if created or changes:
+        operation = AuditEvent.CREATE if created else AuditEvent.UPDATE
+        audit.record(sender, instance.pk, operation, changes, using=using)
+
+
+def record_audit_deletion(sender, instance, using, **kwargs):
+    audit.record(sender, instance.pk, AuditEvent.DELETE, {}, using=using)
+
+
+# Connected per model, as a delete receiver for all models would keep Django
+# from deleting the rows of any other model without loading them first
+for model in audit.AUDITED_MODELS:
+    remember(model, *audit.audited_fields(model))
+    post_save.connect(record_audit_event, sender=model)
+    post_delete.connect(record_audit_deletion, sender=model)
+
+
+@receiver(post_save, sender=Instrument)
+def refresh_instrument_summary(sender, instance, using, **kwargs):
+    schedule_refresh([instance.pk], using=using)
+
+
+# Instrument fields whose values are kept in InstrumentHistory
+PLACEMENT_FIELDS = ("location", "department", "status")
+
+remember(Instrument, *PLACEMENT_FIELDS)
+
+
+@receiver(post_save, sender=Instrument)
+def follow_instrument_placement(sender, instance, created, using, **kwargs):
+    previous = _loaded(instance, *PLACEMENT_FIELDS)
+    current = _saved(instance, *PLACEMENT_FIELDS)
+    if created or current != previous:
+        start_periods(
+            [(instance.pk, *current)],
+            when=instance.created_at if created else timezone.now(),
+            using=using,
+        )
+        invalidate_site_trees(location_ids=[previous[0], current[0]])
+    if not created and current[1] != previous[1]:
+        update_record_departments([instance.pk], using=using)
+
+
+@receiver(post_save, sender=CalibrationRecord)
+@receiver(post_delete, sender=CalibrationRecord)
+@receiver(post_save, sender=Issue)
+@receiver(post_delete, sender=Issue)
+def refresh_related_instrument_summary(sender, instance, using, **kwargs):
+    schedule_refresh([instance.instrument_id], using=using)
+
+
+@receiver(post_delete, sender=Instrument)
+def invalidate_instrument_site_tree(sender, instance, **kwargs):
+    invalidate_site_trees(location_ids=[instance.location_id])
+
+
+remember(Location, "site")
+
+
+@receiver(post_save, sender=Location)
+def invalidate_location_site_trees(sender, instance, **kwargs):
+    invalidate_site_trees(site_ids=[*_loaded(instance, "site"), instance.site_id])
+
+
+@receiver(post_delete, sender=Location)
+def invalidate_deleted_location_site_tree(sender, instance, **kwargs):
+    invalidate_site_trees(site_ids=[instance.site_id])
+
+
+@receiver(post_save, sender=Site)
+@receiver(post_delete, sender=Site)
+def invalidate_site_tree(sender, instance, **kwargs):
+    invalidate_site_trees(site_ids=[instance.pk], sites_changed=True)
+
+
+remember(Site, "latitude", "longitude")
+
+
+@receiver(post_save, sender=Site)
+def move_site_locations(sender, instance, created, using, **kwargs):
+    """Move the locations that share the site's coordinates along with it."""
+    previous = _loaded(instance, "latitude", "longitude")
+    coordinates = (instance.latitude, instance.longitude)
+    if not created and coordinates != previous:
+        # updated_at tells the location trees of geo.py to rebuild
+        Location.objects.using(using).filter(site=instance).filter(
+            Q(latitude=None, longitude=None)
+            | Q(latitude=previous[0], longitude=previous[1])
+        ).update(
+            latitude=coordinates[0],
+            longitude=coordinates[1],
+            updated_at=timezone.now(),
+        )
+
+
+@receiver(post_save, sender=Location)
+def update_summary_location_name(sender, instance, created, using, **kwargs):
+    if not created:
+        # The location may also have moved to another site
+        InstrumentSummary.objects.using(using).filter(location=instance).update(
+            location_name=instance.name, site_name=instance.site.name
+        )
+
+
+@receiver(post_save, sender=Site)
+def update_summary_site_name(sender, instance, created, using, **kwargs):
+    if not created:
+        InstrumentSummary.objects.using(using).filter(location__site=instance).update(
+            site_name=instance.name
+        )
+
+
+@receiver(post_save, sender=Department)
+def update_summary_department_name(sender, instance, created, using, **kwargs):
+    if not created:
+        InstrumentSummary.objects.using(using).filter(department=instance).update(
+            department_name=instance.name
+        )
+
+
+@receiver(m2m_changed, sender=Instrument.sensor_types.through)
+@receiver(m2m_changed, sender=Instrument.measurement_types.through)
+def touch_instrument_capabilities(sender, instance, action, reverse, pk_set, **kwargs):
+    # Capability changes alter the API representation, so move updated_at on
+    # for the instruments involved to invalidate their ETags
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if reverse:
+        instruments = Instrument.objects.filter(pk__in=pk_set or ())
+    else:
+        instruments = Instrument.objects.filter(pk=instance.pk)
+    instruments.update(updated_at=timezone.now())
+
+
+remember(Instrument, "resolution")
+
+
+@receiver(post_save, sender=Instrument)
+def refresh_resolution_capabilities(sender, instance, created, using, **kwargs):
+    # New instruments have no sensor types yet; adding them refreshes
+    if not created and _saved(instance, "resolution") != _loaded(
+        instance, "resolution"
+    ):
+        schedule_capability_refresh([instance.pk], using=using)
+
+
+@receiver(m2m_changed, sender=Instrument.sensor_types.through)
+def refresh_assigned_capabilities(
+    sender, instance, action, reverse, pk_set, using, **kwargs
+):
+    if reverse and action == "pre_clear":
+        # Clearing a sensor type's instruments does not say which they were
+        instance._cleared_instrument_ids = list(
+            instance.instruments.values_list("pk", flat=True)
+        )
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        instrument_ids = [instance.pk]
+    elif action == "post_clear":
+        instrument_ids = instance.__dict__.pop("_cleared_instrument_ids", [])
+    else:
+        instrument_ids = pk_set or ()
+    schedule_capability_refresh(instrument_ids, using=using)
+
+
+@receiver(post_save, sender=SensorType)
+def refresh_sensor_type_capabilities(sender, instance, created, using, **kwargs):
+    if not created:
+        schedule_capability_refresh(
+            instance.instruments.values_list("pk", flat=True), using=using
+        )
+
+
+@receiver(pre_delete, sender=SensorType)
+def refresh_deleted_sensor_type_capabilities(sender, instance, using, **kwargs):
+    # Read before the assignments are deleted; the refresh runs after
+    schedule_capability_refresh(
+        instance.instruments.values_list("pk", flat=True), using=using
+    )
+
+
+for model in REMEMBERED_FIELDS:
+    post_save.connect(remember_saved_state, sender=model)
@@ -0,0 +1,211 @@
+"""
+Capture of slow queries with their plans and the code that ran them.
+
+When ``SLOW_QUERY_CAPTURE`` is enabled, ``SlowQueryMiddleware`` times every
+query run while handling a request. Queries slower than
+``SLOW_QUERY_THRESHOLD_MS`` are stored as ``SlowQuery`` rows with their
+fingerprint (see ``profiling.py``), the view and action that ran them and the
+application frames of the stack, which point at the ``get_queryset`` or
+serializer responsible.
+
+Captures are handed to a ``SlowQueryWriter`` thread, so storing and
+explaining them never delays the response. When the writer falls behind by
+``SLOW_QUERY_QUEUE_SIZE`` requests, further captures are dropped and logged.
+
+A sample of them, ``SLOW_QUERY_EXPLAIN_RATE``, is explained again with their
+original parameters. On PostgreSQL this is ``EXPLAIN (ANALYZE, BUFFERS)``, run
+in a transaction that is rolled back and cancelled after
+``SLOW_QUERY_EXPLAIN_TIMEOUT_MS``; only ``SELECT`` statements are explained.
+The ``slow_queries`` command summarizes the captures.
+"""
+
+import logging
+import os
+import queue
+import random
+import threading
+import time
+import traceback
+from collections import namedtuple
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DatabaseError, close_old_connections, connections, transaction
+
+from .models import SlowQuery
+from .profiling import fingerprint, normalize_sql, view_label
+
+logger = logging.getLogger(__name__)
+
+Capture = namedtuple("Capture", ["alias", "sql", "params", "many", "duration", "stack"])
+
+_PACKAGE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Middleware frames are on every stack and say nothing about the query
+_MIDDLEWARE_FILES = {
+    os.path.join(_PACKAGE, "assets", "profiling.py"),
+    os.path.join(_PACKAGE, "assets", "slow_queries.py"),
+}
+
+
+def code_stack(limit=8):
+    """Return the innermost application frames of the current stack."""
+    frames = [
+        frame
+        for frame in traceback.extract_stack()
+        if frame.filename.startswith(_PACKAGE)
+        and frame.filename not in _MIDDLEWARE_FILES
+    ]
+    return "\n".join(
+        f"{os.path.relpath(frame.filename, _PACKAGE)}:{frame.lineno} in {frame.name}"
+        for frame in frames[-limit:]
+    )
+
+
+class SlowQueryCollector:
+    """Execute wrapper keeping the queries slower than a threshold."""
+
+    def __init__(self, threshold_ms):
+        self.threshold = threshold_ms / 1000
+        self.captured = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            if duration >= self.threshold:
+                self.captured.append(
+                    Capture(
+                        context["connection"].alias,
+                        sql,
+                        params,
+                        many,
+                        duration,
+                        code_stack(),
+                    )
+                )
+
+
+def explainable(capture):
+    return not capture.many and capture.sql.lstrip().upper().startswith("SELECT")
+
+
+def explain(alias, sql, params):
+    """
+    Return the plan of a query and an error message, if explaining failed.
+
+    The query is executed again on PostgreSQL, so the transaction is always
+    rolled back.
+    """
+    connection = connections[alias]
+    try:
+        with transaction.atomic(using=alias), connection.cursor() as cursor:
+            if connection.vendor == "postgresql":
+                cursor.execute(
+                    "SET LOCAL statement_timeout = %s",
+                    [getattr(settings, "SLOW_QUERY_EXPLAIN_TIMEOUT_MS", 5000)],
+                )
+                prefix = connection.ops.explain_query_prefix(
+                    format="json", analyze=True, buffers=True
+                )
+            else:
+                prefix = connection.ops.explain_query_prefix()
+            cursor.execute(f"{prefix} {sql}", params)
+            rows = cursor.fetchall()
+            transaction.set_rollback(True, using=alias)
+    except DatabaseError as exc:
+        return None, str(exc).strip()
+    if connection.vendor == "postgresql":
+        return rows[0][0], ""
+    return [list(row) for row in rows], ""
+
+
+def store(view, captures):
+    """Save captured queries, explaining a sample of them."""
+    rate = getattr(settings, "SLOW_QUERY_EXPLAIN_RATE", 0.1)
+    explained = set()
+    rows = []
+    for capture in captures:
+        key = fingerprint(capture.sql)
+        plan, error = None, ""
+        # One plan per statement and request is enough
+        if key not in explained and explainable(capture) and random.random() < rate:
+            explained.add(key)
+            plan, error = explain(capture.alias, capture.sql, capture.params)
+        rows.append(
+            SlowQuery(
+                fingerprint=key,
+                view=view[:200],
+                sql=normalize_sql(capture.sql),
+                duration_ms=round(capture.duration * 1000, 2),
+                stack=capture.stack,
+                plan=plan,
+                plan_error=error,
+            )
+        )
+    SlowQuery.objects.bulk_create(rows)
+
+
+class SlowQueryWriter(threading.Thread):
+    """Daemon thread storing the captures of requests, one request at a time."""
+
+    def __init__(self, size):
+        super().__init__(name="slow-query-writer", daemon=True)
+        self.queue = queue.Queue(maxsize=size)
+
+    def submit(self, view, captures):
+        try:
+            self.queue.put_nowait((view, captures))
+        except queue.Full:
+            logger.warning("Dropped %d slow queries of %s", len(captures), view)
+
+    def run(self):
+        while True:
+            view, captures = self.queue.get()
+            try:
+                close_old_connections()
+                store(view, captures)
+            except Exception:
+                logger.warning("Could not store slow queries", exc_info=True)
+            finally:
+                self.queue.task_done()
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def writer():
+    """Return the writer of this process, starting it if needed."""
+    global _writer
+    with _writer_lock:
+        if _writer is None or not _writer.is_alive():
+            _writer = SlowQueryWriter(getattr(settings, "SLOW_QUERY_QUEUE_SIZE", 100))
+            _writer.start()
+        return _writer
+
+
+class SlowQueryMiddleware:
+    def __init__(self, get_response):
+        if not getattr(settings, "SLOW_QUERY_CAPTURE", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        collector = SlowQueryCollector(
+            getattr(settings, "SLOW_QUERY_THRESHOLD_MS", 200)
+        )
+        request.slow_query_view = "unresolved"
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(collector))
+            response = self.get_response(request)
+
+        if collector.captured:
+            writer().submit(request.slow_query_view, collector.captured)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.slow_query_view = view_label(request, view_func)
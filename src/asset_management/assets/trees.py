@@ -0,0 +1,222 @@
+"""
+The site → location → instrument tree, with instrument counts per status.
+
+The sites and their locations are read with one query and the counts of their
+instruments with another, grouped by location and status, and the nodes are
+assembled in memory with each site's counts rolled up from its locations.
+Instruments, the leaves, are listed with one more query when asked for.
+
+Site subtrees down to their locations are cached per site and department
+scope, as users limited to a department only count its instruments. Writes
+that move, add or remove instruments, or change locations or sites, replace
+the version token of the sites involved once they commit, so stale subtrees
+are never read again and simply expire. The tokens live in the default
+cache, so every process must share it (``REDIS_URL``) to see them replaced.
+"""
+
+import uuid
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+
+from .models import Instrument, Location, Site
+from .scoping import sees_all_departments
+
+STATUSES = [status for status, _ in Instrument.STATUS_CHOICES]
+
+SITES_KEY = "site-tree:sites"
+
+# Depth of the nodes at each level, counted from the sites
+SITES, LOCATIONS, INSTRUMENTS = 1, 2, 3
+
+
+def _timeout():
+    return getattr(settings, "SITE_TREE_CACHE_TIMEOUT", 600)
+
+
+def _scope(user):
+    if sees_all_departments(user):
+        return "all"
+    return f"department-{user.department_id}"
+
+
+def _counts():
+    return dict.fromkeys(STATUSES, 0)
+
+
+def all_site_ids():
+    """Return the ids of all sites in tree order."""
+    ids = cache.get(SITES_KEY)
+    if ids is None:
+        ids = list(Site.objects.order_by("name", "pk").values_list("pk", flat=True))
+        cache.set(SITES_KEY, ids, _timeout())
+    return ids
+
+
+def build_site_nodes(ids, user):
+    """
+    Return the nodes of sites, with their locations and the instrument counts
+    visible to a user, by site id.
+    """
+    sites = {}
+    locations = {}
+    rows = (
+        Site.objects.filter(pk__in=ids)
+        .order_by("pk", "locations__name", "locations__pk")
+        .values_list(
+            "pk",
+            "name",
+            "code",
+            "is_active",
+            "locations__pk",
+            "locations__name",
+            "locations__building",
+            "locations__room",
+        )
+    )
+    for site_id, name, code, is_active, location_id, *location in rows:
+        site = sites.get(site_id)
+        if site is None:
+            site = sites[site_id] = {
+                "type": "site",
+                "id": site_id,
+                "name": name,
+                "code": code,
+                "is_active": is_active,
+                "instrument_count": 0,
+                "status_counts": _counts(),
+                "children": [],
+            }
+        if location_id is not None:
+            node = locations[location_id] = {
+                "type": "location",
+                "id": location_id,
+                "name": location[0],
+                "building": location[1],
+                "room": location[2],
+                "instrument_count": 0,
+                "status_counts": _counts(),
+                "site": site,
+            }
+            site["children"].append(node)
+
+    counts = (
+        Instrument.objects.visible_to(user)
+        .filter(location__site__in=ids)
+        .order_by()
+        .values_list("location", "status")
+        .annotate(count=Count("pk"))
+    )
+    for location_id, status, count in counts:
+        location = locations[location_id]
+        for node in (location, location["site"]):
+            node["instrument_count"] += count
+            node["status_counts"][status] += count
+    for location in locations.values():
+        del location["site"]
+    return sites
+
+
+def _versions(ids):
+    keys = {site_id: f"site-tree-version:{site_id}" for site_id in ids}
+    found = cache.get_many(keys.values())
+    versions = {}
+    for site_id, key in keys.items():
+        version = found.get(key)
+        if version is None:
+            # A fresh token, rather than a default one, so that a version
+            # evicted from the cache can never bring back an old subtree
+            cache.add(key, uuid.uuid4().hex, None)
+            version = cache.get(key)
+        versions[site_id] = version
+    return versions
+
+
+def site_trees(user, ids=None, depth=LOCATIONS):
+    """
+    Return the tree of the given sites, or of all sites, down to ``depth``.
+
+    Nodes below the depth are left out and their parent's ``children`` is
+    None. Counts only include the instruments the user sees.
+    """
+    if ids is None:
+        ids = all_site_ids()
+    scope = _scope(user)
+    keys = {
+        site_id: f"site-tree:{site_id}:{version}:{scope}"
+        for site_id, version in _versions(ids).items()
+    }
+    found = cache.get_many(keys.values())
+    sites = {site_id: found[key] for site_id, key in keys.items() if key in found}
+    missing = [site_id for site_id in ids if site_id not in sites]
+    if missing:
+        built = build_site_nodes(missing, user)
+        cache.set_many(
+            {keys[site_id]: node for site_id, node in built.items()}, _timeout()
+        )
+        sites.update(built)
+
+    nodes = [sites[site_id] for site_id in ids if site_id in sites]
+    if depth == SITES:
+        for site in nodes:
+            site["children"] = None
+    elif depth == INSTRUMENTS:
+        _add_instruments(nodes, user)
+    else:
+        for site in nodes:
+            for location in site["children"]:
+                location["children"] = None
+    return nodes
+
+
+def _add_instruments(sites, user):
+    locations = {}
+    for site in sites:
+        for location in site["children"]:
+            location["children"] = []
+            locations[location["id"]] = location
+    instruments = (
+        Instrument.objects.visible_to(user)
+        .filter(location__in=locations)
+        .order_by("name", "pk")
+        .values_list("pk", "name", "serial_number", "status", "location")
+    )
+    for pk, name, serial_number, status, location_id in instruments:
+        locations[location_id]["children"].append(
+            {
+                "type": "instrument",
+                "id": pk,
+                "name": name,
+                "serial_number": serial_number,
+                "status": status,
+            }
+        )
+
+
+def invalidate_site_trees(site_ids=(), location_ids=(), sites_changed=False):
+    """
+    Drop the cached subtrees of sites, given directly or by their locations,
+    once the transaction commits. ``sites_changed`` also drops the list of
+    sites, for sites created, renamed or deleted.
+    """
+    transaction.on_commit(
+        partial(_invalidate, set(site_ids), set(location_ids), sites_changed)
+    )
+
+
+def _invalidate(site_ids, location_ids, sites_changed):
+    location_ids.discard(None)
+    if location_ids:
+        site_ids.update(
+            Location.objects.filter(pk__in=location_ids).values_list("site", flat=True)
+        )
+    site_ids.discard(None)
+    cache.set_many(
+        {f"site-tree-version:{site_id}": uuid.uuid4().hex for site_id in site_ids},
+        None,
+    )
+    if sites_changed:
+        cache.delete(SITES_KEY)
@@ -16,6 +16,8 @@ from .views import (
     IssueViewSet,
     SensorTypeViewSet,
     MeasurementTypeViewSet,
+    ArchivedRecordViewSet,
+    MetricsView,
 )
 
 router = DefaultRouter()
@@ -33,11 +35,13 @@ router.register(
 router.register(r"issues", IssueViewSet)
 router.register(r"sensor-types", SensorTypeViewSet)
 router.register(r"measurement-types", MeasurementTypeViewSet)
+router.register(r"archive", ArchivedRecordViewSet)
 
 app_name = "assets"
 
 urlpatterns = [
     path("", include(router.urls)),
+    path("metrics", MetricsView.as_view(), name="metrics"),
     path("instruments/", InstrumentListView.as_view(), name="instrument_list"),
     path(
         "instruments/<int:pk>/",
@@ -12,6 +12,8 @@ from .models import (
     Issue,
     SensorType,
     MeasurementType,
+    InstrumentSummary,
+    ArchivedRecord,
 )
 from .serializers import (
     LocationSerializer,
@@ -25,22 +27,37 @@ from .serializers import (
     IssueSerializer,
     SensorTypeSerializer,
     MeasurementTypeSerializer,
+    ArchivedRecordSerializer,
 )
-from django.db import models
 from rest_framework.decorators import action
+from rest_framework.reverse import reverse
 from rest_framework.response import Response
 from django.utils import timezone
-from .services import TicketService
+from .services import ReviewWorkflowService, TicketService
 from django.views.generic import ListView, DetailView, CreateView, UpdateView
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.urls import reverse_lazy
 from .forms import InstrumentForm
 from rest_framework.filters import SearchFilter
+from rest_framework.views import APIView
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.views import View
+from rest_framework.parsers import MultiPartParser
+from .events import stream_events
+from .scoping import sees_all_departments
+from .conditional import ConditionalListMixin, ConditionalViewSetMixin
+from .flat_serializers import FlatListMixin
+from .importers import SPECS as IMPORT_SPECS, detect_format, import_file
+from django.shortcuts import get_object_or_404
+from django.conf import settings
+from django.utils.crypto import constant_time_compare
+from . import audit, monitoring, trees
 
 # Create your views here.
 
 
-class LocationViewSet(viewsets.ModelViewSet):
+class LocationViewSet(ConditionalViewSetMixin, viewsets.ModelViewSet):
     queryset = Location.objects.all()
     serializer_class = LocationSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -49,7 +66,7 @@ class LocationViewSet(viewsets.ModelViewSet):
     search_fields = ["name", "building", "room"]
 
 
-class DepartmentViewSet(viewsets.ModelViewSet):
+class DepartmentViewSet(ConditionalViewSetMixin, viewsets.ModelViewSet):
     queryset = Department.objects.all()
     serializer_class = DepartmentSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -58,10 +75,11 @@ class DepartmentViewSet(viewsets.ModelViewSet):
     search_fields = ["name", "code"]
 
 
-class InstrumentViewSet(viewsets.ModelViewSet):
+class InstrumentViewSet(ConditionalViewSetMixin, FlatListMixin, viewsets.ModelViewSet):
     queryset = Instrument.objects.all()
     serializer_class = InstrumentSerializer
     permission_classes = [permissions.IsAuthenticated]
+    conditional_related = ("location", "department")
     filter_backends = [DjangoFilterBackend, filters.SearchFilter]
     filterset_fields = [
         "status",
@@ -75,17 +93,18 @@ class InstrumentViewSet(viewsets.ModelViewSet):
     search_fields = ["name", "serial_number", "model", "manufacturer"]
 
     def get_queryset(self):
-        queryset = Instrument.objects.all()
-        if not self.request.user.is_staff:
-            # Non-staff users can only see instruments in their department
-            queryset = queryset.filter(department=self.request.user.department)
-        return queryset
+        return Instrument.objects.visible_to(self.request.user)
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(ConditionalViewSetMixin, FlatListMixin, viewsets.ModelViewSet):
     queryset = Review.objects.all()
     serializer_class = ReviewSerializer
     permission_classes = [permissions.IsAuthenticated]
+    conditional_related = (
+        "instrument",
+        "instrument__location",
+        "instrument__department",
+    )
     filter_backends = [DjangoFilterBackend, filters.SearchFilter]
     filterset_fields = [
         "status",
@@ -97,15 +116,7 @@ class ReviewViewSet(viewsets.ModelViewSet):
     search_fields = ["reason"]
 
     def get_queryset(self):
-        queryset = Review.objects.all()
-        if not self.request.user.is_staff:
-            # Non-staff users can only see reviews they requested or are assigned to
-            queryset = queryset.filter(
-                models.Q(requested_by=self.request.user)
-                | models.Q(assigned_to=self.request.user)
-                | models.Q(instrument__department=self.request.user.department)
-            )
-        return queryset
+        return Review.objects.visible_to(self.request.user)
 
     def get_permissions(self):
         """
@@ -128,32 +139,64 @@ class ReviewViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_503_SERVICE_UNAVAILABLE,
             )
 
-        review.external_ticket_id = ticket_data["ticket_id"]
-        review.external_ticket_url = ticket_data["ticket_url"]
-        review.save()
+        with audit.action("create_ticket"):
+            ReviewWorkflowService().attach_ticket(review, ticket_data)
 
         return Response(ticket_data, status=status.HTTP_201_CREATED)
 
 
-class MaintenanceRecordViewSet(viewsets.ModelViewSet):
+class MaintenanceRecordViewSet(ConditionalViewSetMixin, viewsets.ModelViewSet):
     queryset = MaintenanceRecord.objects.all()
     serializer_class = MaintenanceRecordSerializer
     permission_classes = [permissions.IsAuthenticated]
+    conditional_related = (
+        "instrument",
+        "instrument__location",
+        "instrument__department",
+    )
     filter_backends = [DjangoFilterBackend, filters.SearchFilter]
-    filterset_fields = ["status", "maintenance_type", "instrument"]
+    # created_at is the partition key of the record tables
+    filterset_fields = {
+        "status": ["exact"],
+        "maintenance_type": ["exact"],
+        "instrument": ["exact"],
+        "created_at": ["gte", "lt"],
+    }
     search_fields = ["description"]
 
+    def get_queryset(self):
+        return MaintenanceRecord.objects.visible_to(self.request.user)
+
 
-class CalibrationRecordViewSet(viewsets.ModelViewSet):
+class CalibrationRecordViewSet(
+    ConditionalViewSetMixin, FlatListMixin, viewsets.ModelViewSet
+):
     queryset = CalibrationRecord.objects.all()
     serializer_class = CalibrationRecordSerializer
     permission_classes = [permissions.IsAuthenticated]
+    conditional_related = (
+        "instrument",
+        "instrument__location",
+        "instrument__department",
+    )
     filter_backends = [DjangoFilterBackend, filters.SearchFilter]
-    filterset_fields = ["status", "calibration_type", "instrument"]
+    # created_at is the partition key of the record tables
+    filterset_fields = {
+        "status": ["exact"],
+        "calibration_type": ["exact"],
+        "instrument": ["exact"],
+        "created_at": ["gte", "lt"],
+    }
     search_fields = ["description"]
 
+    def get_queryset(self):
+        # Calibration history is readable by everyone; changes are scoped
+        if self.action in ["create", "update", "partial_update", "destroy"]:
+            return CalibrationRecord.objects.visible_to(self.request.user)
+        return CalibrationRecord.objects.all()
+
 
-class CalibrationCertificateViewSet(viewsets.ModelViewSet):
+class CalibrationCertificateViewSet(ConditionalViewSetMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing calibration certificates.
     """
@@ -211,7 +254,8 @@ class CalibrationCertificateViewSet(viewsets.ModelViewSet):
             if is_approved
             else CalibrationCertificate.REJECTED
         )
-        certificate.save()
+        with audit.action("review"):
+            certificate.save()
 
         return Response(self.get_serializer(certificate).data)
 
@@ -227,28 +271,29 @@ class CalibrationCertificateViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN,
             )
 
-        # Create new version
-        new_certificate = CalibrationCertificate.objects.create(
-            certificate_number=certificate.certificate_number,
-            version=certificate.version + 1,
-            status=CalibrationCertificate.DRAFT,
-            issue_date=timezone.now().date(),
-            expiry_date=certificate.expiry_date,
-            certificate_type=certificate.certificate_type,
-            created_by=request.user,
-            calibration_data=certificate.calibration_data,
-        )
+        with audit.action("create_version"):
+            # Create new version
+            new_certificate = CalibrationCertificate.objects.create(
+                certificate_number=certificate.certificate_number,
+                version=certificate.version + 1,
+                status=CalibrationCertificate.DRAFT,
+                issue_date=timezone.now().date(),
+                expiry_date=certificate.expiry_date,
+                certificate_type=certificate.certificate_type,
+                created_by=request.user,
+                calibration_data=certificate.calibration_data,
+            )
 
-        # Mark old version as superseded
-        certificate.status = CalibrationCertificate.SUPERSEDED
-        certificate.save()
+            # Mark old version as superseded
+            certificate.status = CalibrationCertificate.SUPERSEDED
+            certificate.save()
 
         return Response(
             self.get_serializer(new_certificate).data, status=status.HTTP_201_CREATED
         )
 
 
-class SiteViewSet(viewsets.ModelViewSet):
+class SiteViewSet(ConditionalViewSetMixin, viewsets.ModelViewSet):
     queryset = Site.objects.all()
     serializer_class = SiteSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -263,11 +308,131 @@ class SiteViewSet(viewsets.ModelViewSet):
             permission_classes = [permissions.IsAuthenticated]
         return [permission() for permission in permission_classes]
 
+    @action(detail=False)
+    def tree(self, request):
+        """
+        All sites with their locations and instrument counts per status.
+        ``depth=1`` leaves out the locations.
+        """
+        return self.tree_response(None, max_depth=trees.LOCATIONS)
+
+    @action(detail=True, url_path="tree", url_name="subtree")
+    def site_tree(self, request, pk=None):
+        """
+        One site's subtree. ``depth=3`` adds the instruments of its locations.
+        """
+        if not pk.isdigit() or int(pk) not in trees.all_site_ids():
+            raise Http404
+        return self.tree_response([int(pk)], max_depth=trees.INSTRUMENTS)
+
+    def tree_response(self, ids, max_depth):
+        depth = self.request.query_params.get("depth", str(trees.LOCATIONS))
+        if not depth.isdigit() or not trees.SITES <= int(depth) <= max_depth:
+            return Response(
+                {"detail": f"depth must be between {trees.SITES} and {max_depth}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        nodes = trees.site_trees(self.request.user, ids, depth=int(depth))
+        # Children left out can be loaded on demand
+        for site in nodes:
+            if site["children"] is None:
+                site["children_url"] = reverse(
+                    "site-subtree", args=[site["id"]], request=self.request
+                )
+                continue
+            for location in site["children"]:
+                if location["children"] is None:
+                    location["children_url"] = (
+                        reverse("instrument-list", request=self.request)
+                        + f"?location={location['id']}"
+                    )
+        return Response(nodes)
+
+
+class EventStreamView(APIView):
+    """
+    Server-sent event stream of instrument, review and issue status changes.
+
+    Users limited to a department only receive events for its instruments.
+    The stream is held open indefinitely, so it is only served by the ASGI
+    application.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        if not isinstance(request._request, ASGIRequest):
+            return Response(
+                {"detail": "The event stream is only available over ASGI"},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
+
+        departments = None
+        if not sees_all_departments(request.user):
+            departments = {request.user.department_id}
+
+        response = StreamingHttpResponse(
+            stream_events(departments=departments),
+            content_type="text/event-stream",
+        )
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+
+class AssetImportView(APIView):
+    """
+    Bulk import of reference data or instruments from an uploaded file.
+
+    The multipart ``file`` is imported as the kind named in the URL; its
+    format comes from ``format`` or the file extension. With ``dry_run`` the
+    file is only validated. The response is the import report.
+    """
+
+    permission_classes = [permissions.IsAdminUser]
+    parser_classes = [MultiPartParser]
+
+    def post(self, request, kind):
+        if kind not in IMPORT_SPECS:
+            raise Http404(f"Unknown import kind {kind}")
+        upload = request.FILES.get("file")
+        if upload is None:
+            return Response(
+                {"detail": "No file was uploaded"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        dry_run = str(request.data.get("dry_run", "")).lower() in ("1", "true")
+
+        try:
+            file_format = request.data.get("format") or detect_format(upload.name)
+            report = import_file(kind, upload, file_format, dry_run=dry_run)
+        except ValueError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if report.error_count:
+            response_status = status.HTTP_400_BAD_REQUEST
+        elif report.committed:
+            response_status = status.HTTP_201_CREATED
+        else:
+            response_status = status.HTTP_200_OK
+        return Response(report.as_dict(), status=response_status)
+
 
 class InstrumentListView(LoginRequiredMixin, ListView):
-    model = Instrument
+    model = InstrumentSummary
     template_name = "assets/instrument_list.html"
     context_object_name = "instruments"
+    paginate_by = 25
+
+    def get_queryset(self):
+        queryset = InstrumentSummary.objects.all()
+        status_filter = self.request.GET.get("status")
+        if status_filter:
+            queryset = queryset.filter(status=status_filter)
+        category = self.request.GET.get("category")
+        if category:
+            queryset = queryset.filter(category=category)
+        return queryset
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -280,12 +445,24 @@ class InstrumentDetailView(LoginRequiredMixin, DetailView):
     model = Instrument
     template_name = "assets/instrument_detail.html"
     context_object_name = "instrument"
+    history_limit = 10
+
+    def get_queryset(self):
+        return Instrument.objects.select_related("summary")
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        instrument = self.get_object()
-        context["calibration_records"] = instrument.calibration_records.all()
-        context["maintenance_records"] = instrument.maintenance_records.all()
+        instrument = self.object
+        try:
+            context["summary"] = instrument.summary
+        except InstrumentSummary.DoesNotExist:
+            context["summary"] = None
+        context["calibration_records"] = instrument.calibration_records.select_related(
+            "performed_by"
+        ).order_by("-date_performed", "-pk")[: self.history_limit]
+        context["maintenance_records"] = instrument.maintenance_records.select_related(
+            "performed_by"
+        ).order_by("-start_date", "-pk")[: self.history_limit]
         return context
 
 
@@ -303,28 +480,38 @@ class InstrumentUpdateView(LoginRequiredMixin, UpdateView):
     success_url = reverse_lazy("instrument_list")
 
 
-class IssueListView(ListView):
+class IssueListView(ConditionalListMixin, ListView):
     model = Issue
     template_name = "assets/issue_list.html"
     context_object_name = "issues"
+    paginate_by = 25
 
     def get_queryset(self):
         instrument_id = self.kwargs.get("instrument_id")
-        return Issue.objects.filter(instrument_id=instrument_id)
+        return (
+            Issue.objects.filter(instrument_id=instrument_id)
+            .select_related("reported_by", "assigned_to")
+            .order_by("-created_at", "-pk")
+        )
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         instrument_id = self.kwargs.get("instrument_id")
-        context["instrument"] = Instrument.objects.get(id=instrument_id)
+        context["instrument"] = get_object_or_404(Instrument, id=instrument_id)
         context["priority_choices"] = Issue.PRIORITY_CHOICES
         context["status_choices"] = Issue.STATUS_CHOICES
         return context
 
 
-class IssueViewSet(viewsets.ModelViewSet):
+class IssueViewSet(ConditionalViewSetMixin, FlatListMixin, viewsets.ModelViewSet):
     queryset = Issue.objects.all()
     serializer_class = IssueSerializer
     permission_classes = [permissions.IsAuthenticated]
+    conditional_related = (
+        "instrument",
+        "instrument__location",
+        "instrument__department",
+    )
     filter_backends = [DjangoFilterBackend, SearchFilter]
     filterset_fields = [
         "status",
@@ -341,13 +528,10 @@ class IssueViewSet(viewsets.ModelViewSet):
         return super().get_permissions()
 
     def get_queryset(self):
-        user = self.request.user
-        if user.is_staff:
-            return Issue.objects.all()
-        return Issue.objects.filter(instrument__department=user.department)
+        return Issue.objects.visible_to(self.request.user)
 
 
-class SensorTypeViewSet(viewsets.ModelViewSet):
+class SensorTypeViewSet(ConditionalViewSetMixin, viewsets.ModelViewSet):
     queryset = SensorType.objects.all()
     serializer_class = SensorTypeSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -361,7 +545,7 @@ class SensorTypeViewSet(viewsets.ModelViewSet):
         return super().get_permissions()
 
 
-class MeasurementTypeViewSet(viewsets.ModelViewSet):
+class MeasurementTypeViewSet(ConditionalViewSetMixin, viewsets.ModelViewSet):
     queryset = MeasurementType.objects.all()
     serializer_class = MeasurementTypeSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -375,13 +559,62 @@ class MeasurementTypeViewSet(viewsets.ModelViewSet):
         return super().get_permissions()
 
 
-class CalibrationRecordView(ListView):
+class ArchivedRecordViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Read-only access to archived certificates, issues and reviews.
+
+    Archived rows no longer appear in the live endpoints; see ``archive.py``.
+    """
+
+    queryset = ArchivedRecord.objects.all()
+    serializer_class = ArchivedRecordSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = {
+        "kind": ["exact"],
+        "object_id": ["exact"],
+        "instrument": ["exact"],
+        "closed_at": ["gte", "lt"],
+    }
+
+    def get_queryset(self):
+        return ArchivedRecord.objects.visible_to(self.request.user)
+
+
+class MetricsView(View):
+    """
+    Prometheus metrics; see ``monitoring.py``.
+
+    When ``METRICS_TOKEN`` is set, scrapers must send it as a bearer token.
+    Without one, only internal clients are served unless ``DEBUG`` is on.
+    """
+
+    def get(self, request):
+        if monitoring.prometheus_client is None:
+            return HttpResponse("prometheus-client is not installed", status=501)
+        token = getattr(settings, "METRICS_TOKEN", None)
+        if token:
+            if not constant_time_compare(
+                request.headers.get("Authorization", ""), f"Bearer {token}"
+            ):
+                return HttpResponse(status=401)
+        elif not settings.DEBUG and not monitoring.is_internal_request(request):
+            return HttpResponse(status=403)
+        output, content_type = monitoring.render_metrics()
+        return HttpResponse(output, content_type=content_type)
+
+
+class CalibrationRecordView(ConditionalListMixin, ListView):
     model = CalibrationRecord
     template_name = "assets/calibration_list.html"
     context_object_name = "calibration_records"
+    paginate_by = 25
+    conditional_related = ("instrument",)
 
     def get_queryset(self):
-        return CalibrationRecord.objects.select_related("instrument").all()
+        return CalibrationRecord.objects.select_related("instrument").order_by(
+            "-date_performed", "-pk"
+        )
 
 
 class CalibrationDetailView(DetailView):
@@ -389,14 +622,23 @@ class CalibrationDetailView(DetailView):
     template_name = "assets/calibration_detail.html"
     context_object_name = "calibration"
 
+    def get_queryset(self):
+        return CalibrationRecord.objects.select_related(
+            "instrument", "performed_by", "certificate"
+        )
+
 
-class MaintenanceRecordView(ListView):
+class MaintenanceRecordView(ConditionalListMixin, ListView):
     model = MaintenanceRecord
     template_name = "assets/maintenance_list.html"
     context_object_name = "maintenance_records"
+    paginate_by = 25
+    conditional_related = ("instrument",)
 
     def get_queryset(self):
-        return MaintenanceRecord.objects.select_related("instrument").all()
+        return MaintenanceRecord.objects.select_related("instrument").order_by(
+            "-start_date", "-pk"
+        )
 
 
 class MaintenanceDetailView(DetailView):
@@ -404,8 +646,27 @@ class MaintenanceDetailView(DetailView):
     template_name = "assets/maintenance_detail.html"
     context_object_name = "maintenance"
 
+    def get_queryset(self):
+        return MaintenanceRecord.objects.select_related("instrument", "performed_by")
+
 
-class CalibrationCertificateView(ListView):
+class CalibrationCertificateView(ConditionalListMixin, ListView):
     model = CalibrationCertificate
     template_name = "assets/certificate_list.html"
     context_object_name = "certificates"
+    paginate_by = 25
+
+    def get_queryset(self):
+        # The list only shows summary columns, not the calibration data
+        return CalibrationCertificate.objects.defer(
+            "calibration_data", "non_conformities", "corrective_actions"
+        ).order_by("-created_at", "-pk")
+
+
+class CalibrationCertificateDetailView(DetailView):
+    model = CalibrationCertificate
+    template_name = "assets/certificate_detail.html"
+    context_object_name = "certificate"
+
+    def get_queryset(self):
+        return CalibrationCertificate.objects.select_related("created_by", "reviewer")
@@ -1,6 +1,7 @@
 import os
 from pathlib import Path
 from dotenv import load_dotenv
+
 load_dotenv()
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -45,10 +46,13 @@ SITE_ID = 1
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "asset_management.assets.profiling.RequestProfilingMiddleware",
+    "asset_management.assets.slow_queries.SlowQueryMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "asset_management.assets.audit.AuditMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "allauth.account.middleware.AccountMiddleware",
@@ -59,7 +63,7 @@ ROOT_URLCONF = "asset_management.urls"
 TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
-        "DIRS": [],
+        "DIRS": [BASE_DIR / "asset_management" / "templates"],
         "APP_DIRS": True,
         "OPTIONS": {
             "context_processors": [
@@ -73,6 +77,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = "asset_management.wsgi.application"
+ASGI_APPLICATION = "asset_management.core.asgi.application"
 
 # Database
 DATABASES = {
@@ -83,9 +88,30 @@ DATABASES = {
         "PASSWORD": os.getenv("POSTGRES_PASSWORD", "postgres"),
         "HOST": os.getenv("POSTGRES_HOST", "localhost"),
         "PORT": os.getenv("POSTGRES_PORT", "5432"),
+        "OPTIONS": {
+            "connect_timeout": int(os.getenv("POSTGRES_CONNECT_TIMEOUT", "5")),
+        },
     }
 }
 
+# Cache lookups are counted for the cache hit ratio metric. Cached site trees
+# are invalidated through the cache, so deployments running more than one
+# process must share a Redis cache through REDIS_URL
+REDIS_URL = os.getenv("REDIS_URL")
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "asset_management.assets.caches.MeteredRedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "asset_management.assets.caches.MeteredLocMemCache",
+        }
+    }
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -127,8 +153,69 @@ REST_FRAMEWORK = {
     "DEFAULT_FILTER_BACKENDS": ("django_filters.rest_framework.DjangoFilterBackend",),
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 10,
+    "DEFAULT_RENDERER_CLASSES": (
+        "asset_management.api.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "asset_management.api.parsers.ORJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ),
 }
 
+# Lifetime of cached table rows on the HTML list pages, in seconds
+FRAGMENT_CACHE_TIMEOUT = 600
+
+# Lifetime of cached site subtrees served by /api/sites/tree/, in seconds
+SITE_TREE_CACHE_TIMEOUT = 600
+
+# Admin listings count tables at least this large from the planner's estimate
+# and count filtered results only up to the limit
+ADMIN_ESTIMATED_COUNT_THRESHOLD = 100000
+ADMIN_COUNT_LIMIT = 10000
+
+# Superseded certificates, closed issues and completed reviews are archived
+# by the archive_records command once unchanged for this many days
+ARCHIVE_RETENTION_DAYS = int(os.getenv("ARCHIVE_RETENTION_DAYS", "365"))
+
+# Request profiling: every request is counted, and this fraction also has its
+# queries, serialization and rendering timed and reported in Server-Timing
+REQUEST_PROFILING_SAMPLE_RATE = float(
+    os.getenv("REQUEST_PROFILING_SAMPLE_RATE", "0.01")
+)
+REQUEST_PROFILING_SLOW_QUERIES = 3
+REQUEST_PROFILING_LOG_THRESHOLD_MS = 500
+# Server-Timing exposes query counts and timings to clients, so it is only
+# sent in development unless REQUEST_PROFILING_SERVER_TIMING=True
+REQUEST_PROFILING_SERVER_TIMING = (
+    os.getenv("REQUEST_PROFILING_SERVER_TIMING", str(DEBUG)) == "True"
+)
+
+# Slow query capture, off unless SLOW_QUERY_CAPTURE=True. Queries slower than
+# the threshold are stored with their view and stack, and a sample of them is
+# explained again with EXPLAIN (ANALYZE, BUFFERS), by a background thread that
+# holds the captures of at most SLOW_QUERY_QUEUE_SIZE requests
+SLOW_QUERY_CAPTURE = os.getenv("SLOW_QUERY_CAPTURE", "False") == "True"
+SLOW_QUERY_THRESHOLD_MS = int(os.getenv("SLOW_QUERY_THRESHOLD_MS", "200"))
+SLOW_QUERY_EXPLAIN_RATE = float(os.getenv("SLOW_QUERY_EXPLAIN_RATE", "0.1"))
+SLOW_QUERY_EXPLAIN_TIMEOUT_MS = 5000
+SLOW_QUERY_QUEUE_SIZE = 100
+
+# Metrics and readiness. METRICS_TOKEN, when set, is required as a bearer
+# token to scrape /metrics; without it, only clients connecting directly from
+# a private address are served outside DEBUG. METRICS_WORKER_CAPACITY is the number of requests
+# an instance serves at once (gunicorn workers times threads).
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+METRICS_WORKER_CAPACITY = int(os.getenv("WEB_CONCURRENCY", "1"))
+READINESS_DB_TIMEOUT_MS = int(os.getenv("READINESS_DB_TIMEOUT_MS", "500"))
+
+# Event stream settings
+# None relays events between processes with LISTEN/NOTIFY on PostgreSQL only
+ASSET_EVENTS_PG_NOTIFY = None
+ASSET_EVENTS_HEARTBEAT = int(os.getenv("ASSET_EVENTS_HEARTBEAT", "15"))
+ASSET_EVENTS_MAX_PENDING = 100
+
 # JWT settings
 from datetime import timedelta
 
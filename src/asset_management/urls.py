@@ -8,8 +8,11 @@ from asset_management.assets.views import (
     InstrumentUpdateView,
     IssueListView,
     CalibrationRecordView,  # Add these new views
+    CalibrationDetailView,
     MaintenanceRecordView,
+    MaintenanceDetailView,
     CalibrationCertificateView,
+    CalibrationCertificateDetailView,
 )
 
 urlpatterns = [
@@ -41,13 +44,13 @@ urlpatterns = [
     path("calibrations/", CalibrationRecordView.as_view(), name="calibration_list"),
     path(
         "calibrations/<int:pk>/",
-        CalibrationRecordView.as_view(),
+        CalibrationDetailView.as_view(),
         name="calibration_detail",
     ),
     path("maintenance/", MaintenanceRecordView.as_view(), name="maintenance_list"),
     path(
         "maintenance/<int:pk>/",
-        MaintenanceRecordView.as_view(),
+        MaintenanceDetailView.as_view(),
         name="maintenance_detail",
     ),
     path(
@@ -55,7 +58,7 @@ urlpatterns = [
     ),
     path(
         "certificates/<int:pk>/",
-        CalibrationCertificateView.as_view(),
+        CalibrationCertificateDetailView.as_view(),
         name="certificate_detail",
     ),
     path("", include("asset_management.assets.urls")),
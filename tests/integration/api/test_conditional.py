@@ -0,0 +1,81 @@
+import pytest
+from rest_framework import status
+from asset_management.assets.models import SensorType
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_unchanged_list_returns_not_modified(admin_client, instrument):
+    response = admin_client.get("/api/instruments/")
+    assert response.status_code == status.HTTP_200_OK
+    etag = response["ETag"]
+
+    response = admin_client.get("/api/instruments/", HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response["ETag"] == etag
+
+    # Different pages and filters have their own validators
+    response = admin_client.get(
+        "/api/instruments/", {"status": "active"}, HTTP_IF_NONE_MATCH=etag
+    )
+    assert response.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_list_etag_changes_on_delete(admin_client, site):
+    etag = admin_client.get("/api/sites/")["ETag"]
+    site.delete()
+    response = admin_client.get("/api/sites/", HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_unchanged_detail_returns_not_modified(admin_client, site):
+    response = admin_client.get(f"/api/sites/{site.id}/")
+    etag = response["ETag"]
+    assert "Last-Modified" in response
+
+    response = admin_client.get(f"/api/sites/{site.id}/", HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_nested_changes_invalidate_etag(admin_client, instrument):
+    """Test that capability changes move the ETag of embedding instruments."""
+    url = f"/api/instruments/{instrument.id}/"
+    etag = admin_client.get(url)["ETag"]
+
+    sensor = SensorType.objects.create(name="Thermocouple", unit="°C")
+    instrument.sensor_types.add(sensor)
+
+    response = admin_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data["sensor_types"][0]["name"] == "Thermocouple"
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_stale_if_match_is_rejected(admin_client, site):
+    url = f"/api/sites/{site.id}/"
+    etag = admin_client.get(url)["ETag"]
+
+    response = admin_client.patch(
+        url, {"name": "First"}, format="json", HTTP_IF_MATCH=etag
+    )
+    assert response.status_code == status.HTTP_200_OK
+    new_etag = response["ETag"]
+    assert new_etag != etag
+
+    # A second writer still holding the old representation loses
+    response = admin_client.patch(
+        url, {"name": "Second"}, format="json", HTTP_IF_MATCH=etag
+    )
+    assert response.status_code == status.HTTP_412_PRECONDITION_FAILED
+    site.refresh_from_db()
+    assert site.name == "First"
+
+    response = admin_client.get(url, HTTP_IF_NONE_MATCH=new_etag)
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
@@ -7,3 +7,16 @@ def test_health_endpoint(api_client):
     response = api_client.get("/api/health/")
     assert response.status_code == status.HTTP_200_OK
     assert response.json() == {"status": "healthy"}
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_readiness_checks_database(api_client, settings):
+    response = api_client.get("/api/health/ready/")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["database"]["ok"] is True
+
+    settings.READINESS_DB_TIMEOUT_MS = 0
+    response = api_client.get("/api/health/ready/")
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert response.json()["status"] == "unavailable"
@@ -0,0 +1,102 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from asset_management.assets import paginators
+from asset_management.assets.models import Instrument, MaintenanceRecord, Review
+from asset_management.assets.paginators import EstimatedCountPaginator
+
+
+def add_reviews(instrument, user, count):
+    Review.objects.bulk_create(
+        [
+            Review(
+                instrument=instrument,
+                requested_by=user,
+                assigned_to=user,
+                reason=f"Check {i}",
+            )
+            for i in range(count)
+        ]
+    )
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_changelist_queries_do_not_grow_with_rows(
+    client, admin_user, instrument, django_assert_max_num_queries
+):
+    """Test that listed foreign keys are joined rather than fetched per row."""
+    client.force_login(admin_user)
+    url = reverse("admin:assets_review_changelist")
+
+    add_reviews(instrument, admin_user, 2)
+    with django_assert_max_num_queries(10) as few:
+        assert client.get(url).status_code == 200
+
+    add_reviews(instrument, admin_user, 20)
+    with django_assert_max_num_queries(len(few.captured_queries)):
+        assert client.get(url).status_code == 200
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "model_name", ["instrument", "calibrationrecord", "maintenancerecord"]
+)
+def test_changelists_render(client, admin_user, maintenance_record, model_name):
+    client.force_login(admin_user)
+    response = client.get(reverse(f"admin:assets_{model_name}_changelist"))
+    assert response.status_code == 200
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_instrument_changelist_does_not_list_types(client, admin_user, instrument):
+    """Test that sensor and measurement types are not read as filter options."""
+    client.force_login(admin_user)
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(reverse("admin:assets_instrument_changelist"))
+
+    assert response.status_code == 200
+    assert not [
+        query
+        for query in queries.captured_queries
+        if "assets_sensortype" in query["sql"]
+        or "assets_measurementtype" in query["sql"]
+    ]
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_unfiltered_count_uses_estimate(instrument, monkeypatch):
+    monkeypatch.setattr(paginators, "estimated_count", lambda model, using: 5000000)
+
+    paginator = EstimatedCountPaginator(Instrument.objects.order_by("pk"), 100)
+    assert paginator.count == 5000000
+
+    # Filtered listings are counted, as the table estimate does not apply
+    filtered = Instrument.objects.filter(status="active").order_by("pk")
+    assert EstimatedCountPaginator(filtered, 100).count == 1
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_filtered_count_is_bounded(maintenance_record, settings):
+    settings.ADMIN_COUNT_LIMIT = 3
+    MaintenanceRecord.objects.bulk_create(
+        [
+            MaintenanceRecord(
+                instrument=maintenance_record.instrument,
+                performed_by=maintenance_record.performed_by,
+                maintenance_type="preventive",
+                description="Service",
+                start_date=timezone.now(),
+            )
+            for _ in range(5)
+        ]
+    )
+    queryset = MaintenanceRecord.objects.order_by("pk")
+    assert EstimatedCountPaginator(queryset, 2).count == 3
+    assert paginators.estimated_count(MaintenanceRecord) is None
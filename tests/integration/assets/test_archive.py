@@ -0,0 +1,154 @@
+import io
+from datetime import date, timedelta
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+from asset_management.assets.archive import archive_records
+from asset_management.assets.models import (
+    ArchivedRecord,
+    CalibrationCertificate,
+    CalibrationRecord,
+    Department,
+    Issue,
+    Review,
+)
+from asset_management.users.models import CustomUser as User
+
+
+def age(model, instance, days):
+    model.objects.filter(pk=instance.pk).update(
+        updated_at=timezone.now() - timedelta(days=days)
+    )
+
+
+@pytest.fixture
+def old_issue(instrument, regular_user):
+    issue = Issue.objects.create(
+        instrument=instrument,
+        title="Drift",
+        description="Reads high",
+        status="closed",
+        reported_by=regular_user,
+    )
+    age(Issue, issue, 400)
+    return issue
+
+
+def certificate(user, version, status):
+    return CalibrationCertificate.objects.create(
+        certificate_number="CERT-001",
+        version=version,
+        status=status,
+        certificate_type="ROUTINE",
+        issue_date=date(2020, 1, 1),
+        expiry_date=date(2021, 1, 1),
+        created_by=user,
+        calibration_data={"points": [1, 2]},
+    )
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_archive_moves_closed_rows(old_issue, instrument, regular_user):
+    recent = Issue.objects.create(
+        instrument=instrument,
+        title="Recent",
+        description="Closed yesterday",
+        status="closed",
+        reported_by=regular_user,
+    )
+    open_issue = Issue.objects.create(
+        instrument=instrument,
+        title="Open",
+        description="Still open",
+        reported_by=regular_user,
+    )
+    age(Issue, open_issue, 400)
+
+    assert archive_records("issue", dry_run=True) == 1
+    assert archive_records("issue", batch_size=1) == 1
+
+    assert set(Issue.objects.values_list("pk", flat=True)) == {recent.pk, open_issue.pk}
+    archived = ArchivedRecord.objects.get()
+    assert (archived.kind, archived.object_id) == ("issue", old_issue.pk)
+    assert archived.instrument_id == instrument.pk
+    assert archived.data["title"] == "Drift"
+    assert archived.data["reported_by"] == regular_user.pk
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_cited_certificates_stay(admin_user, instrument):
+    cited = certificate(admin_user, 1, CalibrationCertificate.SUPERSEDED)
+    unused = certificate(admin_user, 2, CalibrationCertificate.SUPERSEDED)
+    current = certificate(admin_user, 3, CalibrationCertificate.APPROVED)
+    CalibrationRecord.objects.create(
+        instrument=instrument,
+        performed_by=admin_user,
+        calibration_type="routine",
+        description="Cites version 1",
+        status="completed",
+        certificate=cited,
+        date_performed=timezone.now(),
+        next_calibration_date=timezone.now() + timedelta(days=365),
+    )
+    for instance in (cited, unused, current):
+        age(CalibrationCertificate, instance, 400)
+
+    assert archive_records("certificate") == 1
+    assert set(CalibrationCertificate.objects.values_list("pk", flat=True)) == {
+        cited.pk,
+        current.pk,
+    }
+    archived = ArchivedRecord.objects.get()
+    assert archived.object_id == unused.pk
+    assert archived.data["calibration_data"] == {"points": [1, 2]}
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_archive_api_is_read_only(api_client, admin_user, old_issue, instrument):
+    review = Review.objects.create(
+        instrument=instrument,
+        requested_by=admin_user,
+        reason="Annual",
+        status="completed",
+    )
+    age(Review, review, 400)
+    out = io.StringIO()
+    call_command("archive_records", stdout=out)
+    assert "Archived 1 review rows" in out.getvalue()
+
+    api_client.force_authenticate(user=admin_user)
+    response = api_client.get("/issues/")
+    assert response.data["count"] == 0
+
+    response = api_client.get(
+        "/api/archive/", {"kind": "issue", "instrument": instrument.pk}
+    )
+    assert [row["object_id"] for row in response.data["results"]] == [old_issue.pk]
+    archived_id = response.data["results"][0]["id"]
+
+    response = api_client.delete(f"/api/archive/{archived_id}/")
+    assert response.status_code == 405
+    assert api_client.get(f"/archive/{archived_id}/").data["data"]["title"] == "Drift"
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_archive_is_scoped_to_the_department(api_client, old_issue):
+    call_command("archive_records", stdout=io.StringIO())
+    other = Department.objects.create(name="Other Department", code="OTHER")
+    outsider = User.objects.create_user(
+        username="outsider", password="pass", role="technician", department=other
+    )
+    api_client.force_authenticate(user=outsider)
+
+    for prefix in ("/api/archive/", "/archive/"):
+        assert api_client.get(prefix).data["results"] == []
+    archived_id = ArchivedRecord.objects.get().pk
+    assert api_client.get(f"/archive/{archived_id}/").status_code == 404
+
+    outsider.department = old_issue.instrument.department
+    outsider.save()
+    assert api_client.get(f"/archive/{archived_id}/").status_code == 200
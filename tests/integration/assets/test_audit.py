@@ -0,0 +1,284 @@
+import io
+from datetime import timedelta
+
+import pytest
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from asset_management.assets import audit
+from asset_management.assets.importers import import_file
+from asset_management.assets.ingestion import CalibrationIngestor
+from asset_management.assets.models import (
+    AuditEvent,
+    CalibrationCertificate,
+    CalibrationIngestion,
+    CalibrationRecord,
+    Instrument,
+    Location,
+)
+from asset_management.assets.services import InstrumentTransferService
+from asset_management.users.models import CustomUser as User
+
+
+def events(instance):
+    return list(
+        AuditEvent.objects.filter(
+            object_type=instance._meta.label_lower, object_id=instance.pk
+        )
+        .order_by("pk")
+        .values_list("operation", "action", "changes")
+    )
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_saves_and_deletes_are_audited_with_their_changes(
+    location, department, maintenance_record, django_capture_on_commit_callbacks
+):
+    with django_capture_on_commit_callbacks(execute=True):
+        instrument = Instrument.objects.create(
+            name="Balance",
+            serial_number="BAL-1",
+            model="B1",
+            manufacturer="Acme",
+            location=location,
+            department=department,
+        )
+        instrument.name = "Analytical balance"
+        instrument.save()
+        # Saves that change nothing leave no event
+        instrument.save()
+        record_pk = maintenance_record.pk
+        maintenance_record.delete()
+
+    [created, updated] = events(instrument)
+    assert created[0] == AuditEvent.CREATE
+    assert created[2]["name"] == [None, "Balance"]
+    assert created[2]["location"] == [None, location.pk]
+    assert "description" not in created[2]
+    assert updated == (
+        AuditEvent.UPDATE,
+        "",
+        {"name": ["Balance", "Analytical balance"]},
+    )
+    assert AuditEvent.objects.filter(
+        object_type="assets.maintenancerecord",
+        object_id=record_pk,
+        operation=AuditEvent.DELETE,
+    ).exists()
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_rolled_back_changes_are_not_audited(
+    instrument, django_capture_on_commit_callbacks
+):
+    with django_capture_on_commit_callbacks(execute=True):
+        with pytest.raises(RuntimeError):
+            with transaction.atomic():
+                instrument.name = "Renamed"
+                instrument.save()
+                raise RuntimeError
+    assert not AuditEvent.objects.filter(operation=AuditEvent.UPDATE).exists()
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_events_are_written_with_their_change(instrument):
+    with transaction.atomic():
+        instrument.name = "Renamed"
+        instrument.save()
+        # Already there before the change commits
+        assert events(instrument)[-1] == (
+            AuditEvent.UPDATE,
+            "",
+            {"name": ["Test Instrument", "Renamed"]},
+        )
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_batched_events_are_written_with_one_query(maintenance_record):
+    with CaptureQueriesContext(connection) as queries:
+        with audit.batch():
+            for n in range(5):
+                maintenance_record.description = f"Pass {n}"
+                maintenance_record.save()
+            # A change rolled back to a savepoint takes its event with it
+            with pytest.raises(RuntimeError):
+                with transaction.atomic():
+                    maintenance_record.description = "Rolled back"
+                    maintenance_record.save()
+                    raise RuntimeError
+
+    inserts = [
+        query
+        for query in queries.captured_queries
+        if query["sql"].startswith('INSERT INTO "assets_auditevent"')
+    ]
+    assert len(inserts) == 2
+    assert [
+        changes["description"][1]
+        for operation, _, changes in events(maintenance_record)
+        if operation == AuditEvent.UPDATE
+    ] == [f"Pass {n}" for n in range(5)]
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_imported_instruments_are_audited(location, department):
+    csv = (
+        "name,serial_number,model,manufacturer,site,location,department\n"
+        f"Logger,SN-1,L1,Acme,{location.site.code},{location.name},{department.code}\n"
+    )
+    report = import_file("instruments", io.BytesIO(csv.encode()), "csv")
+    assert report.created == 1
+
+    [(operation, _, changes)] = events(Instrument.objects.get(serial_number="SN-1"))
+    assert operation == AuditEvent.CREATE
+    assert changes["serial_number"] == [None, "SN-1"]
+    assert changes["location"] == [None, location.pk]
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_ingested_records_are_audited(instrument, regular_user):
+    history = (
+        "instrument,performed_by,calibration_type,description,next_calibration_date\n"
+        "TEST123,regular,routine,Legacy check,2020-01-01 09:00:00\n"
+    )
+    ingestion = CalibrationIngestion.objects.create(name="legacy", source="test")
+    ingestor = CalibrationIngestor(ingestion)
+    ingestor.load(io.BytesIO(history.encode()))
+    ingestor.validate()
+    assert ingestor.merge() == 1
+
+    record = CalibrationRecord.objects.get()
+    [(operation, action, changes)] = events(record)
+    assert (operation, action) == (AuditEvent.CREATE, "ingest")
+    assert changes["description"] == [None, "Legacy check"]
+    assert changes["performed_by"] == [None, regular_user.pk]
+
+
+@pytest.mark.integration
+@pytest.mark.django_db(transaction=True)
+def test_custom_actions_are_audited_with_their_actor(admin_user, api_client):
+    certificate = CalibrationCertificate.objects.create(
+        certificate_number="CERT-001",
+        certificate_type="ROUTINE",
+        issue_date=timezone.now().date(),
+        expiry_date=(timezone.now() + timedelta(days=365)).date(),
+        created_by=admin_user,
+        calibration_data={"standard_used": "XYZ-123"},
+    )
+    api_client.force_authenticate(user=admin_user)
+    response = api_client.post(
+        f"/api/calibration-certificates/{certificate.pk}/create_version/"
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+
+    [superseded] = AuditEvent.objects.filter(
+        object_id=certificate.pk, action="create_version"
+    )
+    assert superseded.actor == admin_user
+    assert superseded.changes == {
+        "status": [CalibrationCertificate.DRAFT, CalibrationCertificate.SUPERSEDED]
+    }
+    assert AuditEvent.objects.filter(
+        object_id=response.data["id"],
+        operation=AuditEvent.CREATE,
+        action="create_version",
+        actor=admin_user,
+    ).exists()
+
+
+@pytest.mark.integration
+@pytest.mark.django_db(transaction=True)
+def test_events_of_a_request_are_written_with_one_query(admin_user, api_client):
+    certificate = CalibrationCertificate.objects.create(
+        certificate_number="CERT-001",
+        certificate_type="ROUTINE",
+        issue_date=timezone.now().date(),
+        expiry_date=(timezone.now() + timedelta(days=365)).date(),
+        created_by=admin_user,
+        calibration_data={"standard_used": "XYZ-123"},
+    )
+    api_client.force_authenticate(user=admin_user)
+    with CaptureQueriesContext(connection) as queries:
+        response = api_client.post(
+            f"/api/calibration-certificates/{certificate.pk}/create_version/"
+        )
+    assert response.status_code == status.HTTP_201_CREATED
+
+    inserts = [
+        query
+        for query in queries.captured_queries
+        if query["sql"].startswith('INSERT INTO "assets_auditevent"')
+    ]
+    assert len(inserts) == 1
+    assert AuditEvent.objects.filter(action="create_version").count() == 2
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_transfers_are_audited(
+    admin_user, instrument, location, site, django_capture_on_commit_callbacks
+):
+    new_location = Location.objects.create(
+        name="New Lab", building="B2", room="201", site=site
+    )
+    with django_capture_on_commit_callbacks(execute=True):
+        InstrumentTransferService().transfer(
+            Instrument.objects.all(), admin_user, location=new_location
+        )
+
+    assert events(instrument)[-1] == (
+        AuditEvent.UPDATE,
+        "",
+        {"location": [location.pk, new_location.pk]},
+    )
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_audit_events_endpoint(
+    api_client, admin_user, regular_user, instrument, maintenance_record
+):
+    # Leave out the events of the fixtures
+    AuditEvent.objects.all().delete()
+    AuditEvent.objects.create(
+        object_type="assets.instrument",
+        object_id=instrument.pk,
+        operation=AuditEvent.UPDATE,
+        actor=admin_user,
+        changes={"name": ["Old", "New"]},
+    )
+    AuditEvent.objects.create(
+        object_type="assets.maintenancerecord",
+        object_id=maintenance_record.pk,
+        operation=AuditEvent.CREATE,
+        actor=regular_user,
+    )
+
+    api_client.force_authenticate(user=regular_user)
+    response = api_client.get("/api/audit-events/")
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    auditor = User.objects.create_user(
+        username="auditor", password="pass", role="auditor"
+    )
+    api_client.force_authenticate(user=auditor)
+    response = api_client.get(
+        "/api/audit-events/",
+        {"object_type": "assets.instrument", "object_id": instrument.pk},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    [event] = response.data["results"]
+    assert event["changes"] == {"name": ["Old", "New"]}
+    assert event["actor"] == admin_user.pk
+
+    response = api_client.get("/api/audit-events/", {"actor": regular_user.pk})
+    assert [event["object_id"] for event in response.data["results"]] == [
+        maintenance_record.pk
+    ]
@@ -0,0 +1,174 @@
+import io
+from datetime import date
+import pytest
+from django.core.management import CommandError, call_command
+from asset_management.assets.ingestion import CalibrationIngestor
+from asset_management.assets.models import (
+    CalibrationCertificate,
+    CalibrationIngestion,
+    CalibrationRecord,
+    InstrumentSummary,
+)
+
+HEADER = (
+    "instrument,performed_by,calibration_type,description,status,"
+    "date_performed,next_calibration_date,certificate\n"
+)
+
+
+@pytest.fixture
+def certificate(admin_user):
+    for version in (1, 2):
+        latest = CalibrationCertificate.objects.create(
+            certificate_number="CERT-001",
+            version=version,
+            certificate_type="ROUTINE",
+            issue_date=date(2020, 1, 1),
+            expiry_date=date(2021, 1, 1),
+            created_by=admin_user,
+            calibration_data={},
+        )
+    return latest
+
+
+def history(rows):
+    return io.BytesIO((HEADER + "".join(f"{row}\n" for row in rows)).encode())
+
+
+def valid_rows(count):
+    return [
+        f"TEST123,regular,routine,Check {i},scheduled,"
+        f"2019-01-{i + 1:02d} 09:00:00,2020-01-{i + 1:02d} 09:00:00,"
+        for i in range(count)
+    ]
+
+
+def interrupt(phase, done, total):
+    raise KeyboardInterrupt
+
+
+def ingest(rows, batch_size=2):
+    ingestion = CalibrationIngestion.objects.create(name="legacy", source="test")
+    ingestor = CalibrationIngestor(ingestion)
+    ingestor.load(history(rows))
+    ingestor.validate(batch_size=batch_size)
+    return ingestor
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_ingest_calibration_history(
+    instrument, regular_user, certificate, django_capture_on_commit_callbacks
+):
+    rows = valid_rows(4) + [
+        "TEST123,regular,routine,Completed,completed,"
+        "2021-06-01T09:00:00Z,2022-06-01T09:00:00Z,CERT-001"
+    ]
+    ingestor = ingest(rows)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        assert ingestor.merge(batch_size=2) == 5
+
+    completed = CalibrationRecord.objects.get(status="completed")
+    # The latest version is used when none is given
+    assert completed.certificate == certificate
+    assert completed.performed_by == regular_user
+    # History keeps its own creation date, and so its year's partition
+    assert completed.created_at == completed.date_performed
+    assert list(
+        CalibrationRecord.objects.order_by("pk").values_list("description", flat=True)
+    ) == ["Check 0", "Check 1", "Check 2", "Check 3", "Completed"]
+    summary = InstrumentSummary.objects.get(instrument=instrument)
+    assert summary.latest_calibration_date == completed.date_performed
+
+    ingestion = ingestor.ingestion
+    ingestion.refresh_from_db()
+    assert ingestion.status == CalibrationIngestion.MERGED
+    assert (ingestion.staged_rows, ingestion.merged_rows) == (5, 5)
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_invalid_rows_are_reported(instrument, regular_user, certificate):
+    rows = valid_rows(1) + [
+        "MISSING,regular,routine,Lost,,,2020-01-01 00:00:00,",
+        "TEST123,nobody,routine,Who,,,2020-01-01 00:00:00,",
+        "TEST123,regular,yearly,Type,,,2020-01-01 00:00:00,",
+        "TEST123,regular,routine,Early,,2020-01-02 00:00:00,2020-01-01 00:00:00,",
+        "TEST123,regular,routine,Uncertified,completed,,2020-01-01 00:00:00,",
+        "TEST123,regular,routine,Forged,,,2020-01-01 00:00:00,CERT-999",
+    ]
+    ingestor = ingest(rows)
+
+    assert ingestor.ingestion.invalid_rows == 6
+    assert ingestor.errors() == [
+        (2, "Unknown instrument"),
+        (3, "Unknown user"),
+        (4, "Invalid calibration type"),
+        (5, "Next calibration date must be after the date performed"),
+        (6, "A completed calibration must have an associated certificate"),
+        (7, "Unknown certificate"),
+    ]
+    with pytest.raises(ValueError, match="6 of 7 rows are invalid"):
+        ingestor.merge()
+    assert not CalibrationRecord.objects.exists()
+
+    assert ingestor.merge(skip_invalid=True) == 1
+    assert CalibrationRecord.objects.get().status == "scheduled"
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_interrupted_merge_resumes(instrument, regular_user):
+    ingestor = ingest(valid_rows(5))
+    ingestor.progress = interrupt
+    with pytest.raises(KeyboardInterrupt):
+        ingestor.merge(batch_size=2)
+    assert CalibrationRecord.objects.count() == 2
+
+    resumed = CalibrationIngestor(CalibrationIngestion.objects.get(name="legacy"))
+    assert resumed.merge(batch_size=2) == 5
+    assert CalibrationRecord.objects.count() == 5
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_command_validates_and_merges(tmp_path, instrument, regular_user):
+    path = tmp_path / "history.csv"
+    path.write_bytes(history(valid_rows(3)).getvalue())
+    out = io.StringIO()
+
+    call_command(
+        "ingest_calibration_history", "legacy", str(path), "--validate-only", stdout=out
+    )
+    assert not CalibrationRecord.objects.exists()
+
+    # Resuming needs no file
+    call_command("ingest_calibration_history", "legacy", stdout=out)
+    assert "Merged 3 calibration records from legacy" in out.getvalue()
+    assert CalibrationRecord.objects.count() == 3
+
+    with pytest.raises(CommandError, match="Missing columns: description"):
+        path.write_bytes(b"instrument,calibration_type\n")
+        call_command("ingest_calibration_history", "other", str(path))
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_lost_staging_table_is_reloaded(instrument, regular_user):
+    ingestor = ingest(valid_rows(5))
+    ingestor.progress = interrupt
+    with pytest.raises(KeyboardInterrupt):
+        ingestor.merge(batch_size=2)
+
+    # As crash recovery does to unlogged tables
+    ingestor.execute(f"DELETE FROM {ingestor.table}")
+    ingestor.progress = lambda phase, done, total: None
+    with pytest.raises(ValueError, match="load the same file again"):
+        ingestor.merge(batch_size=2)
+    assert ingestor.ingestion.status == CalibrationIngestion.LOADING
+
+    ingestor.load(history(valid_rows(5)))
+    ingestor.validate(batch_size=2)
+    assert ingestor.merge(batch_size=2) == 5
+    assert CalibrationRecord.objects.count() == 5
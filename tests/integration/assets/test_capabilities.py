@@ -0,0 +1,149 @@
+from decimal import Decimal
+
+import pytest
+from rest_framework import status
+from asset_management.assets.capabilities import refresh_capabilities
+from asset_management.assets.models import (
+    Instrument,
+    InstrumentCapability,
+    SensorType,
+)
+from asset_management.users.models import CustomUser as User
+
+
+def sensor(name, unit, low, high, accuracy):
+    return SensorType.objects.create(
+        name=name,
+        unit=unit,
+        min_range=Decimal(low),
+        max_range=Decimal(high),
+        accuracy=Decimal(accuracy),
+    )
+
+
+@pytest.fixture
+def equipped(location, department, django_capture_on_commit_callbacks):
+    """A probe, a wide-range thermometer and a manometer."""
+    probe = sensor("Probe", "°C", "-50", "150", "0.10")
+    furnace = sensor("Furnace", "°C", "100", "1200", "1.00")
+    cold = sensor("Cryo", "°C", "-200", "-40", "0.50")
+    gauge = sensor("Gauge", "Pa", "0", "100000", "0.25")
+    instruments = {}
+    with django_capture_on_commit_callbacks(execute=True):
+        for name, sensor_types, resolution in [
+            ("Lab thermometer", [probe], "0.010"),
+            ("Wide thermometer", [furnace, cold], "0.100"),
+            ("Manometer", [gauge], None),
+        ]:
+            instrument = Instrument.objects.create(
+                name=name,
+                serial_number=f"CAP-{name}",
+                model="M1",
+                manufacturer="Acme",
+                location=location,
+                department=department,
+                resolution=resolution and Decimal(resolution),
+            )
+            instrument.sensor_types.set(sensor_types)
+            instruments[name] = instrument
+    return instruments, probe, furnace, cold
+
+
+def capabilities(instrument):
+    return list(
+        instrument.capabilities.order_by("unit", "range_min", "range_max").values_list(
+            "unit", "range_min", "range_max", "best_accuracy"
+        )
+    )
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_capabilities_follow_sensor_types(equipped, django_capture_on_commit_callbacks):
+    instruments, probe, furnace, cold = equipped
+    wide = instruments["Wide thermometer"]
+    assert capabilities(wide) == [
+        ("°C", Decimal("-200"), Decimal("-40"), Decimal("0.50")),
+        ("°C", Decimal("100"), Decimal("1200"), Decimal("1.00")),
+    ]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        wide.sensor_types.add(probe)
+    # The probe closes the gap between the other two, but only its part of
+    # the range is as accurate as the probe
+    assert capabilities(wide) == [
+        ("°C", Decimal("-200"), Decimal("150"), Decimal("0.50")),
+        ("°C", Decimal("-200"), Decimal("1200"), Decimal("1.00")),
+        ("°C", Decimal("-50"), Decimal("150"), Decimal("0.10")),
+    ]
+    matches = InstrumentCapability.objects.filter(instrument=wide)
+    assert matches.covering(0, 1000).ranked().first().best_accuracy == Decimal("1.00")
+    assert matches.covering(-100, 0).ranked().first().best_accuracy == Decimal("0.50")
+    assert matches.covering(0, 100).ranked().first().best_accuracy == Decimal("0.10")
+
+    with django_capture_on_commit_callbacks(execute=True):
+        furnace.max_range = Decimal("1500")
+        furnace.save()
+        cold.delete()
+    assert capabilities(wide) == [
+        ("°C", Decimal("-50"), Decimal("150"), Decimal("0.10")),
+        ("°C", Decimal("-50"), Decimal("1500"), Decimal("1.00")),
+    ]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        wide.resolution = Decimal("0.050")
+        wide.save()
+        probe.instruments.clear()
+    assert wide.capabilities.get().resolution == Decimal("0.050")
+    assert capabilities(instruments["Lab thermometer"]) == []
+
+    InstrumentCapability.objects.all().delete()
+    assert refresh_capabilities() == 2
+    assert capabilities(wide) == [
+        ("°C", Decimal("100"), Decimal("1500"), Decimal("1.00")),
+    ]
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_capability_search_ranks_matches(admin_client, equipped):
+    url = "/api/instruments/capable/"
+
+    def names(params):
+        response = admin_client.get(url, params)
+        assert response.status_code == status.HTTP_200_OK
+        return [match["instrument_name"] for match in response.data]
+
+    assert names({"unit": "°C", "range_min": 20, "range_max": 120}) == [
+        "Lab thermometer"
+    ]
+    # The most accurate first
+    assert names({"unit": "°C", "range_min": 120}) == [
+        "Lab thermometer",
+        "Wide thermometer",
+    ]
+    assert names({"unit": "°C", "range_min": 120, "max_accuracy": "0.5"}) == [
+        "Lab thermometer"
+    ]
+    assert names({"unit": "°C", "range_min": -100, "range_max": 130}) == []
+    assert names({"unit": "Pa"}) == ["Manometer"]
+    # Each instrument once, with its best range
+    assert names({"unit": "°C"}) == ["Lab thermometer", "Wide thermometer"]
+    assert names({"unit": "Pa", "max_resolution": "0.1"}) == []
+    assert names({"unit": "°C", "range_min": 120, "status": "inactive"}) == []
+
+    response = admin_client.get(url, {"unit": "°C", "range_min": 5, "range_max": 1})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    response = admin_client.get(url, {"range_min": 5})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_capability_search_is_scoped_to_the_department(api_client, equipped):
+    technician = User.objects.create_user(
+        username="technician", password="pass", role="technician"
+    )
+    api_client.force_authenticate(user=technician)
+    response = api_client.get("/api/instruments/capable/", {"unit": "Pa"})
+    assert response.data == []
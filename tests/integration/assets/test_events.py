@@ -0,0 +1,162 @@
+import asyncio
+import json
+import pytest
+from rest_framework import status
+from asset_management.assets import events
+from asset_management.assets.models import Issue, Review
+
+
+@pytest.fixture
+def published(monkeypatch):
+    """Collect events handed to the broker instead of delivering them."""
+    collected = []
+    monkeypatch.setattr(events.broker, "publish", collected.append)
+    return collected
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_instrument_status_change_published_on_commit(
+    instrument, published, django_capture_on_commit_callbacks
+):
+    """Test that a status transition is only published once committed."""
+    with django_capture_on_commit_callbacks(execute=True):
+        instrument.status = "maintenance"
+        instrument.save()
+        assert published == []
+
+    assert len(published) == 1
+    assert published[0]["type"] == "instrument.status"
+    assert published[0]["old"] == "active"
+    assert published[0]["new"] == "maintenance"
+    assert published[0]["department_id"] == instrument.department_id
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_unchanged_save_not_published(
+    instrument, published, django_capture_on_commit_callbacks
+):
+    """Test that saving without a transition publishes nothing."""
+    with django_capture_on_commit_callbacks(execute=True):
+        instrument.name = "Renamed"
+        instrument.save()
+
+    assert published == []
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_review_and_issue_transitions_published(
+    instrument, admin_user, published, django_capture_on_commit_callbacks
+):
+    """Test that review and issue status changes carry the instrument."""
+    with django_capture_on_commit_callbacks(execute=True):
+        review = Review.objects.create(
+            instrument=instrument, requested_by=admin_user, reason="Check"
+        )
+        issue = Issue.objects.create(
+            instrument=instrument,
+            title="Drift",
+            description="Readings drift",
+            reported_by=admin_user,
+        )
+        review.status = "in_progress"
+        review.save()
+        Issue.objects.get(pk=issue.pk).save()
+
+    assert [event["type"] for event in published] == [
+        "review.status",
+        "issue.status",
+        "review.status",
+    ]
+    assert published[-1]["old"] == "pending"
+    assert all(event["instrument_id"] == instrument.id for event in published)
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_issue_transitions_do_not_load_the_instrument(
+    instrument, admin_user, published, django_capture_on_commit_callbacks
+):
+    """Test that events read the department copied onto the issue."""
+    Issue.objects.create(
+        instrument=instrument,
+        title="Drift",
+        description="Readings drift",
+        reported_by=admin_user,
+    )
+    issue = Issue.objects.get(instrument=instrument)
+    with django_capture_on_commit_callbacks(execute=True):
+        issue.status = "closed"
+        issue.save(update_fields=["status", "updated_at"])
+
+    assert published[-1]["department_id"] == instrument.department_id
+    assert not Issue._meta.get_field("instrument").is_cached(issue)
+
+
+def test_broker_filters_by_department():
+    """Test that subscriptions only receive events for their departments."""
+
+    async def scenario():
+        broker = events.EventBroker()
+        scoped = broker.subscribe(departments={1})
+        everything = broker.subscribe()
+        broker.publish({"type": "instrument.status", "department_id": 2})
+        broker.publish({"type": "instrument.status", "department_id": 1})
+        await asyncio.sleep(0)
+        return scoped.queue.qsize(), everything.queue.qsize()
+
+    assert asyncio.run(scenario()) == (1, 2)
+
+
+def test_slow_subscriber_drops_oldest_events():
+    """Test that a full subscription discards its oldest pending event."""
+
+    async def scenario():
+        broker = events.EventBroker()
+        subscription = broker.subscribe()
+        subscription.queue = asyncio.Queue(maxsize=2)
+        for i in range(3):
+            broker.publish({"type": "issue.status", "id": i})
+        await asyncio.sleep(0)
+        return subscription.dropped, (await subscription.get())["id"]
+
+    assert asyncio.run(scenario()) == (1, 1)
+
+
+def test_stream_yields_published_events():
+    """Test that the stream emits frames for events and then heartbeats."""
+
+    async def scenario():
+        stream = events.stream_events(heartbeat=0.01)
+        frames = [await stream.__anext__()]
+        events.broker.publish({"type": "instrument.status", "id": 7})
+        frames.append(await stream.__anext__())
+        frames.append(await stream.__anext__())
+        await stream.aclose()
+        return frames
+
+    retry, frame, heartbeat = asyncio.run(scenario())
+    assert retry.startswith("retry:")
+    assert frame.startswith("event: instrument.status\n")
+    assert json.loads(frame.split("data: ")[1])["id"] == 7
+    assert heartbeat == ": keep-alive\n\n"
+    assert events.broker.subscriber_count == 0
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_event_stream_requires_authentication(api_client):
+    response = api_client.get("/api/events/")
+    assert response.status_code in (
+        status.HTTP_401_UNAUTHORIZED,
+        status.HTTP_403_FORBIDDEN,
+    )
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_event_stream_unavailable_over_wsgi(authenticated_client):
+    response = authenticated_client.get("/api/events/")
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
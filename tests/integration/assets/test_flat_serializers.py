@@ -0,0 +1,138 @@
+import pytest
+from datetime import timedelta
+from decimal import Decimal
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from asset_management.api import serializers as api_serializers
+from asset_management.assets import serializers as asset_serializers
+from asset_management.assets.flat_serializers import FlatSerializer, UnsupportedField
+from asset_management.assets.models import (
+    CalibrationCertificate,
+    CalibrationRecord,
+    Instrument,
+    Issue,
+    MeasurementType,
+    Review,
+    SensorType,
+)
+
+
+@pytest.fixture
+def fleet(instrument, location, department, admin_user, regular_user):
+    """Instruments and records covering nulls, decimals and relations."""
+    thermocouple = SensorType.objects.create(
+        name="Thermocouple",
+        unit="°C",
+        min_range=Decimal("-40.50"),
+        max_range=Decimal("1200"),
+        accuracy=Decimal("0.1"),
+    )
+    hygrometer = SensorType.objects.create(name="Hygrometer", unit="%")
+    pressure = MeasurementType.objects.create(name="Pressure")
+
+    second = Instrument.objects.create(
+        name="Barometer",
+        serial_number="BAR-1",
+        model="B1",
+        manufacturer="Acme",
+        location=location,
+        department=department,
+        resolution=Decimal("0.001"),
+        last_review_date=timezone.now(),
+    )
+    second.sensor_types.add(hygrometer, thermocouple)
+    second.measurement_types.add(pressure)
+    instrument.sensor_types.add(thermocouple)
+
+    certificate = CalibrationCertificate.objects.create(
+        certificate_number="CERT-1",
+        issue_date=timezone.now().date(),
+        expiry_date=(timezone.now() + timedelta(days=365)).date(),
+        certificate_type="ROUTINE",
+        created_by=admin_user,
+        calibration_data={},
+    )
+    for target, cert in ((instrument, None), (second, certificate)):
+        CalibrationRecord.objects.create(
+            instrument=target,
+            performed_by=regular_user,
+            calibration_type="routine",
+            description="Annual",
+            certificate=cert,
+            date_performed=timezone.now() if cert else None,
+            next_calibration_date=timezone.now() + timedelta(days=365),
+        )
+        Review.objects.create(
+            instrument=target,
+            requested_by=regular_user,
+            assigned_to=admin_user if cert else None,
+            reason="Check",
+        )
+        Issue.objects.create(
+            instrument=target,
+            title="Drift",
+            description="Readings drift",
+            reported_by=regular_user,
+            assigned_to=None if cert else admin_user,
+        )
+
+
+def render(data):
+    return JSONRenderer().render(data)
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "serializer_class",
+    [
+        asset_serializers.InstrumentSerializer,
+        asset_serializers.ReviewSerializer,
+        asset_serializers.CalibrationRecordSerializer,
+        asset_serializers.IssueSerializer,
+        api_serializers.InstrumentSerializer,
+        api_serializers.ReviewSerializer,
+        api_serializers.CalibrationRecordSerializer,
+    ],
+)
+def test_output_matches_serializer(fleet, serializer_class):
+    """Test that flat output is byte-identical to the model serializer."""
+    queryset = serializer_class.Meta.model.objects.order_by("pk")
+    expected = render(serializer_class(queryset, many=True).data)
+
+    flat = FlatSerializer(serializer_class())
+    assert render(flat.serialize(flat.values(queryset))) == expected
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_list_query_count_independent_of_page_size(
+    fleet, admin_client, django_assert_max_num_queries
+):
+    # Session and user, count, page, then one lookup per relation
+    with django_assert_max_num_queries(9):
+        response = admin_client.get("/reviews/")
+    assert response.status_code == 200
+    assert response.data["count"] == 2
+
+    reviews = Review.objects.all()
+    expected = asset_serializers.ReviewSerializer(reviews, many=True).data
+    assert render(response.data["results"]) == render(expected)
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_unsupported_fields_fall_back():
+    class CountingSerializer(serializers.ModelSerializer):
+        issue_count = serializers.SerializerMethodField()
+
+        class Meta:
+            model = Instrument
+            fields = ["id", "issue_count"]
+
+        def get_issue_count(self, obj):
+            return obj.issues.count()
+
+    with pytest.raises(UnsupportedField):
+        FlatSerializer(CountingSerializer())
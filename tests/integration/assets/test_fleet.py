@@ -0,0 +1,189 @@
+import io
+import json
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from asset_management.assets.fleet import FleetGenerator
+from asset_management.assets.models import (
+    CalibrationCertificate,
+    CalibrationRecord,
+    Instrument,
+    InstrumentSummary,
+    Issue,
+)
+
+
+def small_fleet(seed, prefix, **options):
+    return FleetGenerator(
+        **{
+            "seed": seed,
+            "prefix": prefix,
+            "departments": 2,
+            "users_per_role": 1,
+            "sites": 2,
+            "locations_per_site": 2,
+            "instruments": 30,
+            "points": 5,
+            **options,
+        }
+    )
+
+
+def fleet(prefix):
+    return [
+        (
+            i.name,
+            i.manufacturer,
+            i.status,
+            i.review_status,
+            i.resolution,
+            i.created_at,
+            i.calibration_records.count(),
+            i.sensor_types.count(),
+        )
+        for i in Instrument.objects.filter(serial_number__startswith=prefix).order_by(
+            "serial_number"
+        )
+    ]
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_fleet_is_reproducible():
+    counts = small_fleet(1, "A", chunk_size=30, batch_size=1000).generate()
+    small_fleet(1, "B", chunk_size=7, batch_size=5).generate()
+
+    assert counts["instruments"] == 30
+    assert counts["users"] == 10
+    assert (
+        counts["calibration records"]
+        == CalibrationRecord.objects.filter(
+            instrument__serial_number__startswith="A-"
+        ).count()
+    )
+    assert InstrumentSummary.objects.count() == 60
+    assert fleet("A-") == fleet("B-")
+
+    small_fleet(2, "C").generate()
+    assert fleet("A-") != fleet("C-")
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_fleet_history_is_consistent():
+    small_fleet(3, "H", years=6, versions=3).generate()
+    now = timezone.now()
+
+    certificates = CalibrationCertificate.objects.all()
+    for number in certificates.values_list("certificate_number", flat=True).distinct():
+        chain = list(
+            certificates.filter(certificate_number=number)
+            .order_by("version")
+            .values_list("version", "status")
+        )
+        assert [version for version, _ in chain] == list(range(1, len(chain) + 1))
+        assert all(s == CalibrationCertificate.SUPERSEDED for _, s in chain[:-1])
+        assert chain[-1][1] == CalibrationCertificate.APPROVED
+    assert certificates.filter(version__gt=1).exists()
+
+    completed = CalibrationRecord.objects.filter(status="completed")
+    assert not completed.filter(certificate__isnull=True).exists()
+    assert not completed.filter(
+        certificate__status=CalibrationCertificate.SUPERSEDED
+    ).exists()
+    certificate = completed.first().certificate
+    assert certificate.validate_correlation_data()[0]
+    assert all(
+        len(values["measured_values"]) == 5
+        for values in certificate.calibration_data.values()
+    )
+
+    for instrument in Instrument.objects.all():
+        records = instrument.calibration_records
+        open_calibration = records.filter(status="in_progress").exists()
+        open_maintenance = instrument.maintenance_records.filter(
+            status="in_progress"
+        ).exists()
+        assert open_calibration == (instrument.status == "calibration")
+        assert open_maintenance == (instrument.status == "maintenance")
+        assert records.filter(status="scheduled").exists() == (
+            instrument.status in ("active", "maintenance")
+        )
+        open_review = instrument.reviews.filter(
+            status__in=["pending", "in_progress"]
+        ).first()
+        if open_review:
+            assert instrument.review_status == open_review.status
+        elif instrument.reviews.filter(status="completed").exists():
+            assert instrument.review_status == "completed"
+            assert instrument.next_review_date > instrument.last_review_date
+        else:
+            assert instrument.review_status == "none"
+        assert 1 <= instrument.sensor_types.count() <= 3
+        assert 1 <= instrument.measurement_types.count() <= 3
+        assert instrument.created_at <= instrument.updated_at <= now
+        history = list(instrument.history.order_by("valid_from"))
+        assert history[0].valid_from == instrument.created_at
+        assert all(a.valid_to == b.valid_from for a, b in zip(history, history[1:]))
+        assert (history[-1].status, history[-1].valid_to) == (instrument.status, None)
+
+    assert Instrument.objects.filter(created_at__lt=now - timedelta(days=365)).exists()
+    assert not Issue.objects.filter(
+        status__in=["in_progress", "resolved", "closed"], assigned_to__isnull=True
+    ).exists()
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_generate_fleet_reports_progress():
+    out = io.StringIO()
+    call_command(
+        "generate_fleet",
+        "--instruments",
+        "5",
+        "--chunk-size",
+        "2",
+        "--users-per-role",
+        "1",
+        stdout=out,
+    )
+
+    output = out.getvalue()
+    assert "2/5 instruments" in output
+    assert "5/5 instruments" in output
+    assert "Created 5 instruments" in output
+    assert Instrument.objects.count() == 5
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_seed_load_test_writes_tokens(tmp_path, api_client):
+    path = tmp_path / "tokens.json"
+    call_command(
+        "seed_load_test",
+        "--instruments",
+        "5",
+        "--users-per-role",
+        "1",
+        "--tokens",
+        str(path),
+        stdout=io.StringIO(),
+    )
+
+    tokens = json.loads(path.read_text())
+    assert {account["role"] for account in tokens} == {
+        "admin",
+        "manager",
+        "technician",
+        "researcher",
+        "auditor",
+    }
+    technician = next(a for a in tokens if a["role"] == "technician")
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {technician['token']}")
+    response = api_client.get(
+        "/api/instruments/", {"department": technician["department"]}
+    )
+    assert response.status_code == 200
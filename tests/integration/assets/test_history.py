@@ -0,0 +1,146 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+from rest_framework import status
+from asset_management.assets.models import (
+    Department,
+    Instrument,
+    InstrumentHistory,
+    Location,
+)
+from asset_management.assets.services import InstrumentTransferService
+from asset_management.users.models import CustomUser as User
+
+
+@pytest.fixture
+def new_location(site):
+    return Location.objects.create(name="New Lab", building="B2", room="201", site=site)
+
+
+@pytest.fixture
+def other_department():
+    return Department.objects.create(name="Other Department", code="OTHER")
+
+
+def periods(instrument):
+    return list(
+        instrument.history.order_by("valid_from").values_list(
+            "location_id", "department_id", "status", "valid_to"
+        )
+    )
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_changes_of_placement_start_periods(instrument, location, new_location):
+    [first] = instrument.history.all()
+    assert first.valid_from == instrument.created_at
+    assert first.valid_to is None
+
+    instrument.description = "Recalibrated sensor"
+    instrument.save()
+    assert instrument.history.count() == 1
+
+    instrument.location = new_location
+    instrument.save()
+    instrument.status = "maintenance"
+    instrument.save()
+
+    history = periods(instrument)
+    assert [(row[0], row[2]) for row in history] == [
+        (location.pk, "active"),
+        (new_location.pk, "active"),
+        (new_location.pk, "maintenance"),
+    ]
+    assert all(row[3] is not None for row in history[:2])
+    assert history[2][3] is None
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_transfers_start_periods(
+    admin_user, instrument, department, new_location, other_department
+):
+    InstrumentTransferService().transfer(
+        Instrument.objects.all(),
+        admin_user,
+        location=new_location,
+        department=other_department,
+    )
+
+    current = InstrumentHistory.objects.get(instrument=instrument, valid_to=None)
+    assert current.location == new_location
+    assert current.department == other_department
+    assert instrument.history.count() == 2
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_as_of_returns_the_periods_in_force(instrument, location, new_location):
+    created = instrument.created_at
+    instrument.location = new_location
+    instrument.save()
+    moved = instrument.history.get(valid_to=None).valid_from
+
+    def location_at(when):
+        return list(
+            InstrumentHistory.objects.as_of(when).values_list("location", flat=True)
+        )
+
+    assert location_at(created - timedelta(seconds=1)) == []
+    assert location_at(created) == [location.pk]
+    assert location_at(moved - timedelta(microseconds=1)) == [location.pk]
+    assert location_at(moved) == [new_location.pk]
+    assert location_at(timezone.now() + timedelta(days=1)) == [new_location.pk]
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_as_of_endpoint(api_client, instrument, department, other_department):
+    past = timezone.now()
+    instrument.department = other_department
+    instrument.status = "inactive"
+    instrument.save()
+
+    researcher = User.objects.create_user(
+        username="researcher", password="pass", role="researcher", department=department
+    )
+    api_client.force_authenticate(user=researcher)
+
+    response = api_client.get("/api/instruments/as-of/", {"at": past.isoformat()})
+    assert response.status_code == status.HTTP_200_OK
+    [period] = response.data["results"]
+    assert period["instrument"] == instrument.pk
+    assert period["status"] == "active"
+
+    # Filters apply to the values at that time
+    response = api_client.get(
+        "/api/instruments/as-of/", {"at": past.isoformat(), "status": "inactive"}
+    )
+    assert response.data["results"] == []
+
+    # The instrument has since left the researcher's department
+    response = api_client.get(
+        "/api/instruments/as-of/", {"at": timezone.now().isoformat()}
+    )
+    assert response.data["results"] == []
+
+    response = api_client.get("/api/instruments/as-of/", {"at": "yesterday"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_instrument_history_endpoint(admin_client, instrument, new_location):
+    instrument.location = new_location
+    instrument.save()
+
+    response = admin_client.get(f"/api/instruments/{instrument.pk}/history/")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [period["location"] for period in response.data["results"]] == [
+        instrument.history.earliest("valid_from").location_id,
+        new_location.pk,
+    ]
+    assert response.data["results"][-1]["valid_to"] is None
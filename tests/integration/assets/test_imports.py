@@ -0,0 +1,178 @@
+import io
+import json
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from rest_framework import status
+from asset_management.assets.importers import import_file
+from asset_management.assets.models import (
+    Instrument,
+    InstrumentSummary,
+    Location,
+    SensorType,
+)
+
+HEADER = "name,serial_number,model,manufacturer,site,location,department,sensor_types,resolution\n"
+
+
+@pytest.fixture
+def sensor_types():
+    return [
+        SensorType.objects.create(name="Thermocouple", unit="°C"),
+        SensorType.objects.create(name="Hygrometer", unit="%"),
+    ]
+
+
+def instrument_csv(location, department, count, start=0):
+    rows = [
+        f"Logger {i},SN-{i},L1,Acme,{location.site.code},{location.name},"
+        f"{department.code},Thermocouple;Hygrometer,0.001\n"
+        for i in range(start, start + count)
+    ]
+    return (HEADER + "".join(rows)).encode()
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_import_instruments_from_csv(
+    tmp_path, location, department, sensor_types, django_capture_on_commit_callbacks
+):
+    path = tmp_path / "instruments.csv"
+    path.write_bytes(instrument_csv(location, department, 3))
+
+    with django_capture_on_commit_callbacks(execute=True):
+        call_command("import_assets", "instruments", str(path), stdout=io.StringIO())
+
+    instrument = Instrument.objects.get(serial_number="SN-1")
+    assert instrument.location == location
+    assert str(instrument.resolution) == "0.001"
+    assert sorted(instrument.sensor_types.values_list("name", flat=True)) == [
+        "Hygrometer",
+        "Thermocouple",
+    ]
+    assert InstrumentSummary.objects.count() == 3
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_query_count_independent_of_rows(
+    location, department, sensor_types, django_assert_max_num_queries
+):
+    """Test that lookups, validation and inserts are batched per chunk."""
+    with django_assert_max_num_queries(12) as small:
+        import_file(
+            "instruments", io.BytesIO(instrument_csv(location, department, 2)), "csv"
+        )
+
+    with django_assert_max_num_queries(len(small.captured_queries)):
+        report = import_file(
+            "instruments",
+            io.BytesIO(instrument_csv(location, department, 50, start=2)),
+            "csv",
+        )
+    assert report.created == 50
+    assert Instrument.objects.count() == 52
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_invalid_rows_roll_back_import(
+    tmp_path, instrument, location, department, sensor_types
+):
+    path = tmp_path / "instruments.csv"
+    path.write_bytes(
+        instrument_csv(location, department, 2)
+        + f"Clone,{instrument.serial_number},L1,Acme,{location.site.code},"
+        f"{location.name},{department.code},,0.001\n".encode()
+        + f"Lost,SN-9,L1,Acme,{location.site.code},Nowhere,"
+        f"{department.code},Barometer,abc\n".encode()
+        + f"Twin,SN-0,L1,Acme,{location.site.code},{location.name},"
+        f"{department.code},,\n".encode()
+    )
+
+    report = import_file("instruments", open(path, "rb"), "csv", chunk_size=2)
+
+    assert not report.committed
+    assert report.created == 0
+    assert report.invalid_rows == 3
+    errors = {(error["row"], error["field"]) for error in report.errors}
+    assert errors == {
+        (4, "__all__"),
+        (5, "location"),
+        (5, "sensor_types"),
+        (5, "resolution"),
+        (6, "__all__"),
+    }
+    assert Instrument.objects.count() == 1
+
+    with pytest.raises(CommandError, match="nothing was imported"):
+        call_command("import_assets", "instruments", str(path), stderr=io.StringIO())
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_dry_run_writes_nothing(location, department, sensor_types):
+    report = import_file(
+        "instruments",
+        io.BytesIO(instrument_csv(location, department, 5)),
+        "csv",
+        dry_run=True,
+    )
+    assert report.as_dict()["rows"] == 5
+    assert report.error_count == 0
+    assert not report.committed
+    assert not Instrument.objects.exists()
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_import_locations_from_json(site):
+    rows = [
+        {"name": "Lab 1", "building": "Main", "room": "101", "site": site.code},
+        {"name": "Lab 2", "building": "Main", "room": "102", "site": site.code},
+    ]
+    report = import_file("locations", io.BytesIO(json.dumps(rows).encode()), "json")
+    assert report.created == 2
+    assert Location.objects.filter(site=site).count() == 2
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_upload_xlsx_through_api(admin_client, location, department):
+    openpyxl = pytest.importorskip("openpyxl")
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append(HEADER.strip().split(","))
+    sheet.append(
+        [
+            "Scale",
+            12345,
+            "S1",
+            "Acme",
+            location.site.code,
+            location.name,
+            department.code,
+            None,
+            0.01,
+        ]
+    )
+    content = io.BytesIO()
+    workbook.save(content)
+    upload = SimpleUploadedFile("fleet.xlsx", content.getvalue())
+
+    response = admin_client.post(
+        "/api/imports/instruments/", {"file": upload}, format="multipart"
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+    assert response.data["created"] == 1
+    assert Instrument.objects.get(serial_number="12345").name == "Scale"
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_upload_requires_staff(authenticated_client):
+    upload = SimpleUploadedFile("fleet.csv", HEADER.encode())
+    response = authenticated_client.post(
+        "/api/imports/instruments/", {"file": upload}, format="multipart"
+    )
+    assert response.status_code == status.HTTP_403_FORBIDDEN
@@ -0,0 +1,160 @@
+import pytest
+from datetime import timedelta
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from asset_management.assets.models import (
+    CalibrationCertificate,
+    CalibrationRecord,
+    Instrument,
+    InstrumentSummary,
+    Issue,
+    Site,
+)
+from asset_management.assets.read_models import refresh_instrument_summaries
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_summary_created_on_commit(
+    location, department, django_capture_on_commit_callbacks
+):
+    """Test that saving an instrument builds its summary after commit."""
+    with django_capture_on_commit_callbacks(execute=True):
+        instrument = Instrument.objects.create(
+            name="Barometer",
+            serial_number="BAR-1",
+            model="B1",
+            manufacturer="Acme",
+            location=location,
+            department=department,
+        )
+        instrument.status = "maintenance"
+        instrument.save()
+        assert not InstrumentSummary.objects.exists()
+
+    summary = InstrumentSummary.objects.get(instrument=instrument)
+    assert summary.status == "maintenance"
+    assert summary.location_name == location.name
+    assert summary.site_name == location.site.name
+    assert summary.department_name == department.name
+    assert summary.open_issue_count == 0
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_summary_tracks_issues_and_calibrations(
+    instrument, admin_user, django_capture_on_commit_callbacks
+):
+    """Test that related records keep the summary aggregates current."""
+    performed = timezone.now() - timedelta(days=1)
+    certificate = CalibrationCertificate.objects.create(
+        certificate_number="CERT-1",
+        issue_date=performed.date(),
+        expiry_date=(performed + timedelta(days=365)).date(),
+        certificate_type="ROUTINE",
+        created_by=admin_user,
+        calibration_data={},
+    )
+    with django_capture_on_commit_callbacks(execute=True):
+        CalibrationRecord.objects.create(
+            instrument=instrument,
+            performed_by=admin_user,
+            calibration_type="routine",
+            description="Annual",
+            status="completed",
+            certificate=certificate,
+            date_performed=performed,
+            next_calibration_date=performed + timedelta(days=365),
+        )
+        issue = Issue.objects.create(
+            instrument=instrument,
+            title="Drift",
+            description="Readings drift",
+            reported_by=admin_user,
+        )
+
+    summary = InstrumentSummary.objects.get(instrument=instrument)
+    assert summary.latest_calibration_date == performed
+    assert summary.next_calibration_date == performed + timedelta(days=365)
+    assert summary.open_issue_count == 1
+
+    with django_capture_on_commit_callbacks(execute=True):
+        issue.status = "closed"
+        issue.save()
+
+    summary.refresh_from_db()
+    assert summary.open_issue_count == 0
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_renaming_location_updates_summaries(instrument, location):
+    refresh_instrument_summaries()
+    location.name = "Cold Room"
+    location.save()
+    site = location.site
+    site.name = "North Campus"
+    site.save()
+
+    summary = InstrumentSummary.objects.get(instrument=instrument)
+    assert summary.location_name == "Cold Room"
+    assert summary.site_name == "North Campus"
+
+    location.site = Site.objects.create(name="South Campus", code="SOUTH")
+    location.save()
+    summary.refresh_from_db()
+    assert summary.site_name == "South Campus"
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_rebuild_command(instrument):
+    call_command("rebuild_instrument_summaries", "--batch-size", "1", stdout=None)
+    assert InstrumentSummary.objects.filter(instrument=instrument).exists()
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_instrument_list_is_paginated(
+    client, regular_user, location, department, django_assert_num_queries
+):
+    for i in range(30):
+        Instrument.objects.create(
+            name=f"Instrument {i:02d}",
+            serial_number=f"SN-{i}",
+            model="M",
+            manufacturer="Acme",
+            location=location,
+            department=department,
+        )
+    refresh_instrument_summaries()
+    client.force_login(regular_user)
+
+    # Session, user, page count and page rows
+    with django_assert_num_queries(4):
+        response = client.get(reverse("instrument_list"), {"page": 2})
+    assert response.status_code == 200
+    assert [i.name for i in response.context["instruments"]] == [
+        f"Instrument {i:02d}" for i in range(25, 30)
+    ]
+
+    # Page links keep the filters
+    response = client.get(reverse("instrument_list"), {"status": "active"})
+    assert 'href="?status=active&amp;page=2"' in response.content.decode()
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_instrument_detail_bounds_history(
+    client, regular_user, instrument, maintenance_record, django_assert_num_queries
+):
+    refresh_instrument_summaries()
+    client.force_login(regular_user)
+
+    # Session, user, instrument with summary, calibrations, maintenance
+    with django_assert_num_queries(5):
+        response = client.get(reverse("instrument_detail", args=[instrument.pk]))
+    assert response.status_code == 200
+    assert response.context["summary"].instrument_id == instrument.pk
+    assert list(response.context["maintenance_records"]) == [maintenance_record]
@@ -0,0 +1,111 @@
+import pytest
+from datetime import timedelta
+from django.urls import reverse
+from django.utils import timezone
+from asset_management.assets.models import (
+    CalibrationRecord,
+    Issue,
+    MaintenanceRecord,
+)
+
+
+@pytest.fixture
+def maintenance_history(instrument, regular_user):
+    return MaintenanceRecord.objects.bulk_create(
+        [
+            MaintenanceRecord(
+                instrument=instrument,
+                performed_by=regular_user,
+                maintenance_type="preventive",
+                description=f"Service {i}",
+                status="completed",
+                start_date=timezone.now() - timedelta(days=i),
+            )
+            for i in range(30)
+        ]
+    )
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_maintenance_list_is_paginated(client, regular_user, maintenance_history):
+    client.force_login(regular_user)
+    response = client.get(reverse("maintenance_list"))
+    assert response.status_code == 200
+    assert len(response.context["maintenance_records"]) == 25
+    assert response.context["page_obj"].paginator.count == 30
+    assert "ETag" in response
+    assert "Last-Modified" in response
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_unchanged_list_returns_not_modified(
+    client, regular_user, maintenance_history, django_assert_max_num_queries
+):
+    client.force_login(regular_user)
+    etag = client.get(reverse("maintenance_list"))["ETag"]
+
+    # Only the session, user and validator aggregate are queried
+    with django_assert_max_num_queries(3):
+        response = client.get(reverse("maintenance_list"), HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+    assert response["ETag"] == etag
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_etag_changes_when_rows_change(client, regular_user, maintenance_history):
+    client.force_login(regular_user)
+    etag = client.get(reverse("maintenance_list"))["ETag"]
+
+    record = maintenance_history[0]
+    record.status = "cancelled"
+    record.save()
+
+    response = client.get(reverse("maintenance_list"), HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response["ETag"] != etag
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_detail_routes_render_detail_views(client, regular_user, maintenance_record):
+    client.force_login(regular_user)
+    response = client.get(reverse("maintenance_detail", args=[maintenance_record.pk]))
+    assert response.status_code == 200
+    assert response.context["maintenance"] == maintenance_record
+
+    calibration = CalibrationRecord.objects.create(
+        instrument=maintenance_record.instrument,
+        performed_by=regular_user,
+        calibration_type="routine",
+        description="Scheduled",
+        next_calibration_date=timezone.now() + timedelta(days=30),
+    )
+    response = client.get(reverse("calibration_detail", args=[calibration.pk]))
+    assert response.status_code == 200
+    assert response.context["calibration"] == calibration
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_issue_list_pages_issues_for_instrument(client, regular_user, instrument):
+    Issue.objects.bulk_create(
+        [
+            Issue(
+                instrument=instrument,
+                title=f"Issue {i}",
+                description="Broken",
+                reported_by=regular_user,
+            )
+            for i in range(26)
+        ]
+    )
+    client.force_login(regular_user)
+    response = client.get(reverse("issue_list", args=[instrument.pk]), {"page": 2})
+    assert response.status_code == 200
+    assert len(response.context["issues"]) == 1
+
+    response = client.get(reverse("issue_list", args=[instrument.pk + 1]))
+    assert response.status_code == 404
@@ -0,0 +1,75 @@
+import pytest
+from prometheus_client import REGISTRY
+from asset_management.assets.caches import MeteredLocMemCache
+from asset_management.assets.models import Review
+
+
+def cache_lookups(result):
+    return REGISTRY.get_sample_value("asset_cache_requests_total", {"result": result})
+
+
+def test_metered_cache_counts_hits_and_misses():
+    cache = MeteredLocMemCache("test-metered", {})
+    hits, misses = cache_lookups("hit") or 0, cache_lookups("miss") or 0
+    cache.set("present", 0)
+
+    assert cache.get("present") == 0
+    assert cache.get("absent", "default") == "default"
+    assert cache.get_many(["present", "absent"]) == {"present": 0}
+
+    assert cache_lookups("hit") == hits + 2
+    assert cache_lookups("miss") == misses + 2
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_metrics_endpoint(client, instrument, admin_user, settings):
+    settings.TICKET_API_URL = "https://tickets.example.com"
+    settings.TICKET_API_KEY = "key"
+    settings.METRICS_WORKER_CAPACITY = 4
+    Review.objects.bulk_create(
+        [
+            Review(instrument=instrument, requested_by=admin_user, reason="No ticket"),
+            Review(
+                instrument=instrument,
+                requested_by=admin_user,
+                reason="Ticketed",
+                external_ticket_id="T-1",
+            ),
+        ]
+    )
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response["Content-Type"].startswith("text/plain")
+    lines = response.content.decode().splitlines()
+    assert "asset_worker_capacity 4.0" in lines
+    assert "asset_ticket_backlog 1.0" in lines
+    assert "asset_event_queue_depth 0.0" in lines
+    assert any(line.startswith("asset_requests_in_progress") for line in lines)
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_metrics_token(client, settings):
+    settings.METRICS_TOKEN = "s3cret"
+    assert client.get("/metrics").status_code == 401
+    response = client.get("/metrics", HTTP_AUTHORIZATION="Bearer s3cret")
+    assert response.status_code == 200
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_metrics_without_token_are_internal(client, settings):
+    settings.METRICS_TOKEN = None
+    assert client.get("/metrics", REMOTE_ADDR="10.0.3.7").status_code == 200
+    assert client.get("/metrics", REMOTE_ADDR="93.184.216.34").status_code == 403
+    # Relayed by a proxy from anywhere
+    response = client.get(
+        "/metrics", REMOTE_ADDR="10.0.0.2", HTTP_X_FORWARDED_FOR="93.184.216.34"
+    )
+    assert response.status_code == 403
+
+    settings.DEBUG = True
+    assert client.get("/metrics", REMOTE_ADDR="93.184.216.34").status_code == 200
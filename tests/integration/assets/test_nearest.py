@@ -0,0 +1,189 @@
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.utils import timezone
+from rest_framework import status
+from asset_management.assets.geo import location_tree, nearest_instruments
+from asset_management.assets.models import (
+    CalibrationCertificate,
+    CalibrationRecord,
+    Instrument,
+    Location,
+    SensorType,
+    Site,
+)
+
+
+@pytest.fixture
+def placed(
+    site, location, department, regular_user, django_capture_on_commit_callbacks
+):
+    """Instruments in London, Cambridge and Paris, and one in a location without
+    coordinates."""
+    site.latitude, site.longitude = Decimal("51.507400"), Decimal("-0.127800")
+    site.save()
+    location.refresh_from_db()
+    cambridge = Location.objects.create(
+        name="Cambridge Lab",
+        building="C",
+        room="1",
+        site=site,
+        latitude=Decimal("52.205300"),
+        longitude=Decimal("0.121800"),
+    )
+    abroad = Site.objects.create(
+        name="Paris",
+        code="PAR",
+        address="1 Rue Test",
+        contact_email="paris@example.com",
+        contact_phone="555-0101",
+        latitude=Decimal("48.856600"),
+        longitude=Decimal("2.352200"),
+    )
+    paris = Location.objects.create(
+        name="Paris Lab", building="P", room="1", site=abroad
+    )
+    nowhere = Site.objects.create(
+        name="Unknown",
+        code="UNK",
+        address="Somewhere",
+        contact_email="unknown@example.com",
+        contact_phone="555-0102",
+    )
+    unplaced = Location.objects.create(
+        name="Store", building="S", room="1", site=nowhere
+    )
+    thermometer = SensorType.objects.create(name="Thermometer", unit="°C")
+    instruments = {}
+    for name, where, instrument_status in [
+        ("London", location, "active"),
+        ("London spare", location, "inactive"),
+        ("Cambridge", cambridge, "active"),
+        ("Paris", paris, "active"),
+        ("Store", unplaced, "active"),
+    ]:
+        instruments[name] = Instrument.objects.create(
+            name=name,
+            serial_number=f"GEO-{name}",
+            model="M1",
+            manufacturer="Acme",
+            location=where,
+            department=department,
+            status=instrument_status,
+        )
+    for name in ("Cambridge", "Paris", "Store"):
+        instruments[name].sensor_types.add(thermometer)
+    certificate = CalibrationCertificate.objects.create(
+        certificate_number="CERT-GEO",
+        certificate_type="ROUTINE",
+        issue_date=timezone.now().date(),
+        expiry_date=(timezone.now() + timedelta(days=30)).date(),
+        created_by=regular_user,
+        calibration_data={"standard_used": "XYZ-123"},
+    )
+    with django_capture_on_commit_callbacks(execute=True):
+        CalibrationRecord.objects.create(
+            instrument=instruments["Paris"],
+            performed_by=regular_user,
+            calibration_type="routine",
+            description="Annual calibration",
+            status="completed",
+            certificate=certificate,
+            date_performed=timezone.now(),
+            next_calibration_date=timezone.now() + timedelta(days=30),
+        )
+    return instruments, thermometer
+
+
+def names(response):
+    return [instrument["name"] for instrument in response.data]
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_locations_take_their_site_coordinates(site, location, placed):
+    assert (location.latitude, location.longitude) == (
+        Decimal("51.507400"),
+        Decimal("-0.127800"),
+    )
+    site.latitude = Decimal("51.500000")
+    site.save()
+    location.refresh_from_db()
+    assert location.latitude == Decimal("51.500000")
+    # Locations with coordinates of their own keep them
+    assert Location.objects.get(name="Cambridge Lab").latitude == Decimal("52.205300")
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_nearest_instruments_are_ranked_by_distance(placed):
+    found = nearest_instruments(Instrument.objects.all(), 52.0, 0.0, limit=3)
+    assert [(instrument.name, round(km)) for km, instrument in found] == [
+        ("Cambridge", 24),
+        ("London", 55),
+        ("London spare", 55),
+    ]
+    found = nearest_instruments(
+        Instrument.objects.all(), 52.0, 0.0, limit=10, max_distance_km=100
+    )
+    assert len(found) == 3
+    # Instruments of locations without coordinates are never found
+    assert len(nearest_instruments(Instrument.objects.all(), 52.0, 0.0)) == 4
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_nearest_endpoint_filters(admin_client, placed):
+    _, thermometer = placed
+    url = "/api/instruments/nearest/"
+    here = {"latitude": 51.5, "longitude": -0.12}
+
+    response = admin_client.get(url, {**here, "limit": 2})
+    assert response.status_code == status.HTTP_200_OK
+    assert names(response) == ["London", "London spare"]
+    assert response.data[0]["distance_km"] < 1
+
+    response = admin_client.get(url, {**here, "status": "active", "limit": 2})
+    assert names(response) == ["London", "Cambridge"]
+
+    response = admin_client.get(url, {**here, "sensor_type": thermometer.pk})
+    assert names(response) == ["Cambridge", "Paris"]
+
+    response = admin_client.get(
+        url, {**here, "sensor_type": thermometer.pk, "calibrated": "true"}
+    )
+    assert names(response) == ["Paris"]
+    assert response.data[0]["distance_km"] == pytest.approx(343, abs=1)
+
+    response = admin_client.get(url, {"latitude": 91, "longitude": 0})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    response = admin_client.get(url, {"latitude": 51.5})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_location_tree_follows_the_database(placed):
+    tree = location_tree()
+    assert location_tree() is tree
+
+    # As another process would, change locations without telling this one
+    Location.objects.filter(name="Store").update(
+        latitude=Decimal("52.000000"),
+        longitude=Decimal("0.000000"),
+        updated_at=timezone.now(),
+    )
+    assert location_tree() is not tree
+    [(km, instrument)] = nearest_instruments(
+        Instrument.objects.all(), 52.0, 0.0, limit=1
+    )
+    assert instrument.name == "Store"
+
+    assert location_tree().size == 4
+    Location.objects.create(
+        name="Annex", building="A", room="1", site=Site.objects.get(code="PAR")
+    )
+    assert location_tree().size == 5
+    Location.objects.filter(name="Annex").delete()
+    assert location_tree().size == 4
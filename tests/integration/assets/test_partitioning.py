@@ -0,0 +1,93 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+import pytest
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.utils import timezone
+from asset_management.assets import partitioning
+from asset_management.assets.models import CalibrationRecord, MaintenanceRecord
+
+postgresql_only = pytest.mark.skipif(
+    connection.vendor != "postgresql", reason="Partitioning requires PostgreSQL"
+)
+
+
+def add_record(instrument, user, created_at):
+    record = CalibrationRecord.objects.create(
+        instrument=instrument,
+        performed_by=user,
+        calibration_type="routine",
+        description=f"Created {created_at.year}",
+        date_performed=created_at,
+        next_calibration_date=created_at + timedelta(days=365),
+    )
+    CalibrationRecord.objects.filter(pk=record.pk).update(created_at=created_at)
+    return record
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "calibration_url,maintenance_url",
+    [
+        ("/calibration-records/", "/maintenance-records/"),
+        ("/api/calibration-records/", "/api/maintenance/"),
+    ],
+)
+def test_records_filter_on_partition_key(
+    api_client, admin_user, instrument, calibration_url, maintenance_url
+):
+    add_record(instrument, admin_user, datetime(2019, 6, 1, tzinfo=dt_timezone.utc))
+    recent = add_record(instrument, admin_user, timezone.now())
+    api_client.force_authenticate(user=admin_user)
+
+    start, end = partitioning.year_bounds(timezone.now().year)
+    response = api_client.get(
+        calibration_url,
+        {"created_at__gte": start, "created_at__lt": end},
+    )
+    assert [record["id"] for record in response.data["results"]] == [recent.pk]
+
+    response = api_client.get(maintenance_url, {"created_at__gte": start})
+    assert response.status_code == 200
+
+
+def test_year_bounds():
+    assert partitioning.year_bounds(2024) == (
+        "2024-01-01 00:00:00+00",
+        "2025-01-01 00:00:00+00",
+    )
+    assert (
+        partitioning.partition_name(CalibrationRecord, 2024)
+        == "assets_calibrationrecord_y2024"
+    )
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+@pytest.mark.skipif(connection.vendor == "postgresql", reason="Runs on PostgreSQL")
+def test_command_requires_postgresql():
+    with pytest.raises(CommandError, match="requires PostgreSQL"):
+        call_command("manage_partitions", "list")
+
+
+@postgresql_only
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_convert_and_prune(instrument, admin_user, maintenance_record):
+    old = add_record(
+        instrument, admin_user, datetime(2019, 6, 1, tzinfo=dt_timezone.utc)
+    )
+    add_record(instrument, admin_user, timezone.now())
+
+    call_command("manage_partitions", "convert", "--batch-size", "1")
+
+    assert partitioning.is_partitioned(CalibrationRecord)
+    assert partitioning.is_partitioned(MaintenanceRecord)
+    names = {p.name for p in partitioning.list_partitions(CalibrationRecord)}
+    assert partitioning.partition_name(CalibrationRecord, 2019) in names
+    assert CalibrationRecord.objects.get(pk=old.pk).description == "Created 2019"
+    # Ids continue after the copied rows
+    assert add_record(instrument, admin_user, timezone.now()).pk > old.pk
+
+    for model, scanned, expected in partitioning.check_pruning():
+        assert scanned == expected
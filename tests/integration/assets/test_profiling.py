@@ -0,0 +1,86 @@
+import logging
+import pytest
+from prometheus_client import REGISTRY
+from asset_management.assets.profiling import RequestProfile, fingerprint
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def test_fingerprint_ignores_parameters():
+    assert fingerprint("SELECT * FROM t WHERE id = 1") == fingerprint(
+        "SELECT *  FROM t WHERE id = 42"
+    )
+    assert fingerprint("SELECT * FROM t WHERE id IN (%s, %s)") == fingerprint(
+        "SELECT * FROM t WHERE id IN (%s)"
+    )
+    assert fingerprint("SELECT * FROM t WHERE name = 'a'") != fingerprint(
+        "SELECT * FROM u WHERE name = 'a'"
+    )
+
+
+def test_profile_keeps_slowest_queries():
+    profile = RequestProfile(slow_query_count=2)
+    for duration, sql in [(0.1, "a"), (0.3, "b"), (0.2, "c"), (0.05, "d")]:
+        profile.record_query(sql, duration)
+    assert profile.query_count == 4
+    assert [sql for _, sql in profile.slowest] == ["b", "c"]
+    assert profile.phases["db"] == pytest.approx(0.65)
+
+
+def test_queries_are_not_counted_as_serializing(monkeypatch):
+    profile = RequestProfile()
+    clock = iter([10.0, 10.5])
+    monkeypatch.setattr(
+        "asset_management.assets.profiling.time.perf_counter", lambda: next(clock)
+    )
+    with profile.measure("serialize"):
+        profile.record_query("a", 0.2)
+    assert profile.phases["serialize"] == pytest.approx(0.3)
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_sampled_requests_are_profiled(
+    api_client, admin_user, instrument, settings, caplog
+):
+    settings.REQUEST_PROFILING_SAMPLE_RATE = 1
+    settings.REQUEST_PROFILING_LOG_THRESHOLD_MS = 0
+    settings.REQUEST_PROFILING_SERVER_TIMING = True
+    api_client.force_authenticate(user=admin_user)
+    before = sample("asset_request_queries_count", view="InstrumentViewSet.list")
+
+    with caplog.at_level(logging.WARNING, "asset_management.assets.profiling"):
+        response = api_client.get("/api/instruments/")
+
+    assert response.status_code == 200
+    phases = [entry.split(";")[0] for entry in response["Server-Timing"].split(", ")]
+    assert phases == ["db", "serialize", "render", "total"]
+    assert (
+        sample("asset_request_queries_count", view="InstrumentViewSet.list")
+        == before + 1
+    )
+    assert "Slow request InstrumentViewSet.list" in caplog.text
+    (record,) = caplog.records
+    assert record.slow_queries[0]["fingerprint"] in caplog.text
+
+    # Timings are only shown to clients when asked for, or with DEBUG
+    del settings.REQUEST_PROFILING_SERVER_TIMING
+    response = api_client.get(f"/api/instruments/{instrument.pk}/")
+    assert response.status_code == 200
+    assert "Server-Timing" not in response
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_unsampled_requests_are_counted(api_client, admin_user, settings):
+    settings.REQUEST_PROFILING_SAMPLE_RATE = 0
+    api_client.force_authenticate(user=admin_user)
+    labels = {"view": "InstrumentViewSet.retrieve", "method": "GET", "status": "404"}
+    before = sample("asset_requests_total", **labels)
+
+    response = api_client.get("/api/instruments/0/")
+
+    assert "Server-Timing" not in response
+    assert sample("asset_requests_total", **labels) == before + 1
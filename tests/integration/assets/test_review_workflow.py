@@ -0,0 +1,131 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from asset_management.assets import events
+from asset_management.assets.models import Instrument, Review
+from asset_management.assets.services import ReviewWorkflowService, TicketService
+
+
+@pytest.fixture
+def tickets(monkeypatch):
+    """Record calls to the ticket system instead of making them."""
+    calls = []
+
+    def create_ticket(self, review):
+        calls.append(("create", review.pk))
+        return {"ticket_id": "T-1", "ticket_url": "http://tickets/T-1"}
+
+    def update_ticket(self, review):
+        calls.append(("update", review.status))
+
+    monkeypatch.setattr(TicketService, "create_ticket", create_ticket)
+    monkeypatch.setattr(TicketService, "update_ticket", update_ticket)
+    return calls
+
+
+def updates(queries):
+    return [q["sql"] for q in queries if q["sql"].startswith("UPDATE")]
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_request_review_marks_instrument_pending(
+    instrument, admin_user, tickets, monkeypatch, django_capture_on_commit_callbacks
+):
+    """Test that a new review updates only the instrument's review columns."""
+    published = []
+    monkeypatch.setattr(events.broker, "publish", published.append)
+    with django_capture_on_commit_callbacks(execute=True):
+        with CaptureQueriesContext(connection) as queries:
+            review = ReviewWorkflowService().request_review(
+                instrument=instrument, requested_by=admin_user, reason="Drift"
+            )
+        assert tickets == []
+
+    [instrument_update] = updates(queries.captured_queries)
+    assert '"review_status"' in instrument_update
+    assert '"name"' not in instrument_update
+
+    instrument.refresh_from_db()
+    assert instrument.review_status == "pending"
+    assert tickets == [("create", review.pk)]
+    review.refresh_from_db()
+    assert review.external_ticket_id == "T-1"
+    assert "instrument.review_status" in [event["type"] for event in published]
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_pending_instrument_not_rewritten(instrument, admin_user):
+    Instrument.objects.filter(pk=instrument.pk).update(review_status="pending")
+    instrument.refresh_from_db()
+    updated_at = instrument.updated_at
+
+    ReviewWorkflowService().request_review(
+        instrument=instrument, requested_by=admin_user, reason="Second opinion"
+    )
+
+    instrument.refresh_from_db()
+    assert instrument.updated_at == updated_at
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_completing_review_defers_ticket_update(
+    instrument, admin_user, tickets, django_capture_on_commit_callbacks
+):
+    review = Review.objects.create(
+        instrument=instrument,
+        requested_by=admin_user,
+        reason="Annual",
+        status="in_progress",
+        external_ticket_id="T-1",
+    )
+
+    with django_capture_on_commit_callbacks(execute=True):
+        with CaptureQueriesContext(connection) as queries:
+            ReviewWorkflowService().update_review(review, status="completed")
+        assert tickets == []
+
+    review_update, instrument_update = updates(queries.captured_queries)
+    assert '"reason"' not in review_update
+    assert '"name"' not in instrument_update
+    assert tickets == [("update", "completed")]
+
+    instrument.refresh_from_db()
+    assert instrument.review_status == "completed"
+    assert instrument.last_review_date == review.updated_at
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_unchanged_update_writes_nothing(instrument, admin_user, tickets):
+    review = Review.objects.create(
+        instrument=instrument, requested_by=admin_user, reason="Annual"
+    )
+    with CaptureQueriesContext(connection) as queries:
+        ReviewWorkflowService().update_review(
+            review, status="pending", assigned_to=None
+        )
+    assert queries.captured_queries == []
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_review_endpoint_uses_workflow(admin_client, instrument):
+    response = admin_client.post(
+        "/reviews/",
+        {"instrument_id": instrument.id, "reason": "Drift"},
+        format="json",
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+    instrument.refresh_from_db()
+    assert instrument.review_status == "pending"
+
+    response = admin_client.patch(
+        f"/reviews/{response.data['id']}/", {"status": "in_progress"}, format="json"
+    )
+    assert response.status_code == status.HTTP_200_OK
+    instrument.refresh_from_db()
+    assert instrument.review_status == "in_progress"
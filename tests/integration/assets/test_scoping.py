@@ -0,0 +1,190 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+from asset_management.api import views as api_views
+from asset_management.assets import views as asset_views
+from asset_management.assets.models import (
+    CalibrationRecord,
+    Department,
+    Instrument,
+    Issue,
+    MaintenanceRecord,
+    Review,
+)
+from asset_management.users.models import CustomUser as User
+
+
+@pytest.fixture
+def departments(instrument, location, admin_user):
+    """A second department with its own instrument, issue and review."""
+    other = Department.objects.create(name="Other Department", code="OTHER")
+    foreign = Instrument.objects.create(
+        name="Foreign Instrument",
+        serial_number="OTHER1",
+        model="O1",
+        manufacturer="Acme",
+        location=location,
+        department=other,
+    )
+    for each in (instrument, foreign):
+        Issue.objects.create(
+            instrument=each,
+            title="Drift",
+            description="Readings outside tolerance",
+            reported_by=admin_user,
+        )
+        Review.objects.create(
+            instrument=each, requested_by=admin_user, reason="Periodic review"
+        )
+    return instrument.department, other
+
+
+def user(username, role, department=None):
+    return User.objects.create_user(
+        username=username, password="pass", role=role, department=department
+    )
+
+
+def ids(response):
+    assert response.status_code == 200
+    return {item["id"] for item in response.data["results"]}
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_querysets_scope_by_department(departments):
+    own, other = departments
+    technician = user("tech", "technician", own)
+    auditor = user("auditor", "auditor")
+    unassigned = user("unassigned", "researcher")
+
+    assert set(Instrument.objects.visible_to(technician)) == set(
+        Instrument.objects.filter(department=own)
+    )
+    assert Issue.objects.visible_to(technician).count() == 1
+    assert Issue.objects.visible_to(auditor).count() == 2
+    assert not Instrument.objects.visible_to(unassigned).exists()
+    assert not MaintenanceRecord.objects.visible_to(unassigned).exists()
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_users_without_department_see_nothing(departments, django_assert_num_queries):
+    unassigned = user("unassigned", "researcher")
+
+    for queryset in (Instrument.objects, Issue.objects, CalibrationRecord.objects):
+        assert queryset.visible_to(unassigned).query.is_empty()
+        with django_assert_num_queries(0):
+            assert list(queryset.visible_to(unassigned)) == []
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_reviews_are_visible_to_their_requester(departments, instrument):
+    own, other = departments
+    researcher = user("researcher", "researcher", own)
+    foreign = Review.objects.get(instrument__department=other)
+    foreign.requested_by = researcher
+    foreign.save()
+
+    assert Review.objects.visible_to(researcher).count() == 2
+    assert not Review.objects.visible_to(user("outsider", "manager", None)).exists()
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+@pytest.mark.parametrize("role", ["technician", "auditor"])
+def test_both_apis_scope_alike(api_client, rf, departments, role):
+    own, other = departments
+    member = user(role, role, own)
+    api_client.force_authenticate(user=member)
+
+    assert ids(api_client.get("/api/reviews/")) == ids(api_client.get("/reviews/"))
+    expected = 2 if role == "auditor" else 1
+    assert len(ids(api_client.get("/api/reviews/"))) == expected
+    assert len(ids(api_client.get("/issues/"))) == expected
+
+    # The assets instrument list is routed behind the HTML view
+    request = rf.get("/")
+    request.user = member
+    querysets = [
+        view(request=request, action="list").get_queryset()
+        for view in (api_views.InstrumentViewSet, asset_views.InstrumentViewSet)
+    ]
+    assert set(querysets[0]) == set(querysets[1])
+    assert len(querysets[0]) == expected
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_assets_record_endpoints_scope_changes(api_client, departments):
+    own, other = departments
+    foreign = Instrument.objects.get(department=other)
+    maintenance = MaintenanceRecord.objects.create(
+        instrument=foreign,
+        performed_by=foreign.issues.get().reported_by,
+        maintenance_type="preventive",
+        description="Filter change",
+        start_date=timezone.now(),
+    )
+    calibration = CalibrationRecord.objects.create(
+        instrument=foreign,
+        performed_by=maintenance.performed_by,
+        calibration_type="routine",
+        description="Annual calibration",
+        next_calibration_date=timezone.now() + timedelta(days=365),
+    )
+    api_client.force_authenticate(user=user("manager", "manager", own))
+
+    for prefix in ("/api/maintenance/", "/maintenance-records/"):
+        assert ids(api_client.get(prefix)) == set()
+    response = api_client.delete(f"/maintenance-records/{maintenance.pk}/")
+    assert response.status_code == 404
+    assert MaintenanceRecord.objects.filter(pk=maintenance.pk).exists()
+
+    # Calibration history is readable by everyone, but changed only in scope
+    for prefix in ("/api/calibration-records/", "/calibration-records/"):
+        assert ids(api_client.get(prefix)) == {calibration.pk}
+        response = api_client.patch(
+            f"{prefix}{calibration.pk}/", {"description": "Moved"}, format="json"
+        )
+        assert response.status_code == 404
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_records_copy_their_instruments_department(departments, instrument):
+    own, other = departments
+    issue = Issue.objects.get(instrument=instrument)
+    assert issue.department == own
+
+    Review.objects.bulk_create(
+        [Review(instrument_id=instrument.pk, requested_by=issue.reported_by, reason="")]
+    )
+    assert (
+        not Review.objects.exclude(department=own)
+        .filter(instrument=instrument)
+        .exists()
+    )
+
+    # Scoped listings filter on the record's own table
+    technician = user("tech", "technician", own)
+    assert "assets_instrument" not in str(Issue.objects.visible_to(technician).query)
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_records_move_with_their_instrument(departments, instrument):
+    own, other = departments
+    before = Issue.objects.get(instrument=instrument).updated_at
+
+    instrument = Instrument.objects.get(pk=instrument.pk)
+    instrument.department = other
+    instrument.save()
+
+    issue = Issue.objects.get(instrument=instrument)
+    assert issue.department == other
+    assert issue.updated_at > before
+    assert Review.objects.filter(department=other).count() == 2
+    assert not Review.objects.filter(department=own).exists()
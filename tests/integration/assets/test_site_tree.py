@@ -0,0 +1,165 @@
+import pytest
+from django.core.cache import cache
+from rest_framework import status
+from asset_management.assets.checks import check_shared_cache
+from asset_management.assets.models import Department, Instrument, Location, Site
+from asset_management.users.models import CustomUser as User
+
+
+@pytest.fixture
+def tree_cache(settings):
+    settings.CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "site-tree-tests",
+        }
+    }
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def fleet(site, location, department):
+    """Two sites, with instruments in two locations of the test site."""
+    other_site = Site.objects.create(
+        name="Annex",
+        address="2 Side Street",
+        code="ANX",
+        contact_email="annex@example.com",
+        contact_phone="555-0100",
+    )
+    Location.objects.create(name="Store", building="A", room="1", site=other_site)
+    second = Location.objects.create(name="Lab 2", building="B", room="2", site=site)
+    other_department = Department.objects.create(name="Other", code="OTHER")
+    statuses = ["active", "active", "maintenance", "inactive"]
+    for n, instrument_status in enumerate(statuses):
+        Instrument.objects.create(
+            name=f"Instrument {n}",
+            serial_number=f"TREE-{n}",
+            model="M1",
+            manufacturer="Acme",
+            location=location if n < 3 else second,
+            department=department if n < 2 else other_department,
+            status=instrument_status,
+        )
+    return other_site, second
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_site_tree_counts_instruments_per_status(
+    admin_client, site, location, fleet, tree_cache, django_assert_num_queries
+):
+    other_site, second = fleet
+
+    with django_assert_num_queries(3):
+        response = admin_client.get("/api/sites/tree/")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [node["code"] for node in response.data] == ["ANX", site.code]
+    annex, test_site = response.data
+    assert annex["instrument_count"] == 0
+    assert test_site["instrument_count"] == 4
+    assert test_site["status_counts"] == {
+        "active": 2,
+        "inactive": 1,
+        "maintenance": 1,
+        "calibration": 0,
+    }
+    assert [
+        (node["id"], node["instrument_count"]) for node in test_site["children"]
+    ] == [(second.pk, 1), (location.pk, 3)]
+    assert test_site["children"][0]["children"] is None
+    assert test_site["children"][0]["children_url"].endswith(
+        f"/api/instruments/?location={second.pk}"
+    )
+
+    # Served from the cache
+    with django_assert_num_queries(0):
+        admin_client.get("/api/sites/tree/")
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_site_tree_is_rebuilt_after_changes(
+    admin_client,
+    site,
+    location,
+    fleet,
+    tree_cache,
+    django_capture_on_commit_callbacks,
+    django_assert_num_queries,
+):
+    other_site, _ = fleet
+    admin_client.get("/api/sites/tree/")
+
+    with django_capture_on_commit_callbacks(execute=True):
+        instrument = Instrument.objects.get(serial_number="TREE-0")
+        instrument.status = "calibration"
+        instrument.save()
+
+    # Only the site of the instrument is rebuilt
+    with django_assert_num_queries(2):
+        response = admin_client.get("/api/sites/tree/")
+    test_site = response.data[1]
+    assert test_site["status_counts"]["calibration"] == 1
+    assert test_site["status_counts"]["active"] == 1
+
+    with django_capture_on_commit_callbacks(execute=True):
+        location.site = other_site
+        location.save()
+    annex, test_site = admin_client.get("/api/sites/tree/").data
+    assert annex["instrument_count"] == 3
+    assert test_site["instrument_count"] == 1
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_site_tree_depths(admin_client, site, location, fleet):
+    response = admin_client.get("/api/sites/tree/", {"depth": 1})
+    assert all(node["children"] is None for node in response.data)
+    assert response.data[1]["children_url"].endswith(f"/api/sites/{site.pk}/tree/")
+
+    response = admin_client.get(f"/api/sites/{site.pk}/tree/", {"depth": 3})
+    assert response.status_code == status.HTTP_200_OK
+    [test_site] = response.data
+    by_location = {node["id"]: node["children"] for node in test_site["children"]}
+    assert [node["serial_number"] for node in by_location[location.pk]] == [
+        "TREE-0",
+        "TREE-1",
+        "TREE-2",
+    ]
+
+    response = admin_client.get("/api/sites/tree/", {"depth": 3})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    response = admin_client.get("/api/sites/0/tree/")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_site_tree_only_counts_visible_instruments(
+    api_client, site, department, fleet, tree_cache
+):
+    technician = User.objects.create_user(
+        username="technician", password="pass", role="technician", department=department
+    )
+    api_client.force_authenticate(user=technician)
+
+    response = api_client.get(f"/api/sites/{site.pk}/tree/", {"depth": 3})
+
+    [test_site] = response.data
+    assert test_site["instrument_count"] == 2
+    assert sum(len(node["children"]) for node in test_site["children"]) == 2
+
+
+@pytest.mark.integration
+def test_deployments_are_warned_about_process_local_caches(settings, tree_cache):
+    settings.DEBUG = False
+    [warning] = check_shared_cache(None)
+    assert warning.id == "assets.W001"
+
+    settings.CACHES = {
+        "default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}
+    }
+    assert check_shared_cache(None) == []
@@ -0,0 +1,102 @@
+import io
+import threading
+import pytest
+from django.core.management import call_command
+from asset_management.assets import slow_queries
+from asset_management.assets.management.commands.slow_queries import plan_lines
+from asset_management.assets.models import SlowQuery
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_capture_is_opt_in(api_client, admin_user, instrument, settings):
+    settings.SLOW_QUERY_THRESHOLD_MS = 0
+    api_client.force_authenticate(user=admin_user)
+    api_client.get("/api/instruments/")
+    assert not SlowQuery.objects.exists()
+
+
+@pytest.mark.integration
+@pytest.mark.django_db(transaction=True)
+def test_slow_queries_are_captured_and_explained(
+    api_client, admin_user, instrument, settings
+):
+    settings.SLOW_QUERY_CAPTURE = True
+    settings.SLOW_QUERY_THRESHOLD_MS = 0
+    settings.SLOW_QUERY_EXPLAIN_RATE = 1
+    api_client.force_authenticate(user=admin_user)
+
+    response = api_client.get("/api/instruments/", {"status": "active"})
+
+    assert response.status_code == 200
+    slow_queries.writer().queue.join()
+    captures = SlowQuery.objects.filter(sql__contains='FROM "assets_instrument"')
+    assert {capture.view for capture in captures} == {"InstrumentViewSet.list"}
+    assert any("flat_serializers.py" in capture.stack for capture in captures)
+    listing = captures.exclude(plan__isnull=True).first()
+    assert "?" in listing.sql and "active" not in listing.sql
+    assert plan_lines(listing.plan)
+
+    out = io.StringIO()
+    call_command(
+        "slow_queries", "--plans", "--view", "InstrumentViewSet.list", stdout=out
+    )
+    output = out.getvalue()
+    assert f"{listing.fingerprint}:" in output
+    assert "Views: InstrumentViewSet.list" in output
+
+    out = io.StringIO()
+    call_command("slow_queries", "--prune", "0", stdout=out)
+    assert not SlowQuery.objects.exists()
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_storing_captures_does_not_delay_the_response(
+    api_client, admin_user, instrument, settings, monkeypatch
+):
+    settings.SLOW_QUERY_CAPTURE = True
+    settings.SLOW_QUERY_THRESHOLD_MS = 0
+    release = threading.Event()
+    stored = []
+
+    def store(view, captures):
+        release.wait(5)
+        stored.append(view)
+
+    monkeypatch.setattr(slow_queries, "store", store)
+    api_client.force_authenticate(user=admin_user)
+
+    # Answered while the captures are still waiting to be stored
+    response = api_client.get("/api/instruments/")
+    assert response.status_code == 200
+    assert not stored
+
+    release.set()
+    slow_queries.writer().queue.join()
+    assert stored == ["InstrumentViewSet.list"]
+
+
+def test_postgresql_plan_outline():
+    plan = [
+        {
+            "Plan": {
+                "Node Type": "Limit",
+                "Actual Total Time": 1.5,
+                "Actual Rows": 20,
+                "Plans": [
+                    {
+                        "Node Type": "Index Scan",
+                        "Index Name": "assets_inst_status_idx",
+                        "Actual Total Time": 1.2,
+                        "Actual Rows": 20,
+                        "Shared Read Blocks": 3,
+                    }
+                ],
+            }
+        }
+    ]
+    assert plan_lines(plan) == [
+        "Limit (actual 1.5 ms, 20 rows, 0 blocks read)",
+        "  Index Scan on assets_inst_status_idx (actual 1.2 ms, 20 rows, 3 blocks read)",
+    ]
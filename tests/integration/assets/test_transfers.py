@@ -0,0 +1,168 @@
+import pytest
+from rest_framework import status
+from asset_management.assets.models import (
+    Department,
+    Instrument,
+    InstrumentSummary,
+    InstrumentTransfer,
+    Issue,
+    Location,
+)
+from asset_management.users.models import CustomUser as User
+
+
+@pytest.fixture
+def lab(location, department, admin_user):
+    """Instruments in the test location, each with an issue."""
+    instruments = Instrument.objects.bulk_create(
+        Instrument(
+            name=f"Instrument {n}",
+            serial_number=f"LAB-{n}",
+            model="M1",
+            manufacturer="Acme",
+            location=location,
+            department=department,
+        )
+        for n in range(20)
+    )
+    Issue.objects.bulk_create(
+        Issue(
+            instrument=instrument,
+            title="Drift",
+            description="Readings outside tolerance",
+            reported_by=admin_user,
+        )
+        for instrument in instruments
+    )
+    return instruments
+
+
+@pytest.fixture
+def new_location(site):
+    return Location.objects.create(name="New Lab", building="B2", room="201", site=site)
+
+
+@pytest.fixture
+def other_department():
+    return Department.objects.create(name="Other Department", code="OTHER")
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_transfer_moves_filtered_instruments(
+    api_client,
+    admin_user,
+    lab,
+    location,
+    department,
+    new_location,
+    other_department,
+    django_capture_on_commit_callbacks,
+    django_assert_max_num_queries,
+):
+    api_client.force_authenticate(user=admin_user)
+    with django_capture_on_commit_callbacks(execute=True):
+        with django_assert_max_num_queries(20):
+            response = api_client.post(
+                f"/api/instruments/transfer/?location={location.pk}",
+                {
+                    "location": new_location.pk,
+                    "department": other_department.pk,
+                    "reason": "Lab move",
+                },
+                format="json",
+            )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data["instrument_count"] == 20
+    assert not Instrument.objects.filter(location=location).exists()
+    assert not Issue.objects.exclude(department=other_department).exists()
+    assert set(InstrumentSummary.objects.values_list("location_name", flat=True)) == {
+        "New Lab"
+    }
+
+    transfer = InstrumentTransfer.objects.get()
+    assert transfer.transferred_by == admin_user
+    assert sorted(transfer.moved) == sorted(
+        [instrument.pk, location.pk, department.pk] for instrument in lab
+    )
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_transfer_of_listed_instruments_skips_those_in_place(
+    api_client, admin_user, lab, location, new_location
+):
+    Instrument.objects.filter(pk=lab[1].pk).update(location=new_location)
+    api_client.force_authenticate(user=admin_user)
+    response = api_client.post(
+        "/api/instruments/transfer/",
+        {"location": new_location.pk, "instruments": [lab[0].pk, lab[1].pk]},
+        format="json",
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data["moved"] == [[lab[0].pk, location.pk, lab[0].department_id]]
+    assert Instrument.objects.filter(location=new_location).count() == 2
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_transfer_needs_a_selection_and_a_destination(
+    api_client, admin_user, lab, new_location
+):
+    api_client.force_authenticate(user=admin_user)
+    response = api_client.post(
+        "/api/instruments/transfer/", {"location": new_location.pk}, format="json"
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    # Empty filters select nothing either
+    response = api_client.post(
+        "/api/instruments/transfer/?status=&category=",
+        {"location": new_location.pk},
+        format="json",
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    response = api_client.post(
+        "/api/instruments/transfer/", {"instruments": [lab[0].pk]}, format="json"
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert not InstrumentTransfer.objects.exists()
+
+
+@pytest.mark.integration
+@pytest.mark.django_db
+def test_managers_move_instruments_within_their_department(
+    api_client, lab, department, new_location, other_department
+):
+    manager = User.objects.create_user(
+        username="manager", password="pass", role="manager", department=department
+    )
+    api_client.force_authenticate(user=manager)
+    response = api_client.post(
+        f"/api/instruments/transfer/?department={department.pk}",
+        {"department": other_department.pk},
+        format="json",
+    )
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    response = api_client.post(
+        f"/api/instruments/transfer/?department={department.pk}",
+        {"location": new_location.pk},
+        format="json",
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data["instrument_count"] == 20
+
+    technician = User.objects.create_user(
+        username="technician", password="pass", role="technician", department=department
+    )
+    api_client.force_authenticate(user=technician)
+    response = api_client.post(
+        "/api/instruments/transfer/",
+        {"location": new_location.pk, "instruments": [lab[0].pk]},
+        format="json",
+    )
+    assert response.status_code == status.HTTP_403_FORBIDDEN
@@ -2,6 +2,8 @@
 Test settings for the project.
 """
 
+from pathlib import Path
+
 # Use test secret key
 SECRET_KEY = "test-key-not-for-production"
 
@@ -35,10 +37,13 @@ INSTALLED_APPS = [
 # Required middleware
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "asset_management.assets.profiling.RequestProfilingMiddleware",
+    "asset_management.assets.slow_queries.SlowQueryMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "asset_management.assets.audit.AuditMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "allauth.account.middleware.AccountMiddleware",
@@ -61,6 +66,15 @@ REST_FRAMEWORK = {
         "rest_framework.filters.SearchFilter",
         "rest_framework.filters.OrderingFilter",
     ],
+    "DEFAULT_RENDERER_CLASSES": [
+        "asset_management.api.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "asset_management.api.parsers.ORJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
 }
 
 # Authentication settings
@@ -72,6 +86,26 @@ AUTHENTICATION_BACKENDS = [
 # Site ID for django.contrib.sites
 SITE_ID = 1
 
+# Templates live in the project-level templates directory
+TEMPLATES = [
+    {
+        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        "DIRS": [
+            Path(__file__).resolve().parent.parent / "src/asset_management/templates"
+        ],
+        "APP_DIRS": True,
+        "OPTIONS": {
+            "context_processors": [
+                "django.template.context_processors.request",
+                "django.contrib.auth.context_processors.auth",
+                "django.contrib.messages.context_processors.messages",
+            ],
+        },
+    },
+]
+
+STATIC_URL = "static/"
+
 # Root URL Configuration
 ROOT_URLCONF = "asset_management.urls"
 
@@ -112,6 +146,9 @@ CACHES = {
     }
 }
 
+# Profile requests only when a test asks for it
+REQUEST_PROFILING_SAMPLE_RATE = 0
+
 # Disable email sending during tests
 EMAIL_BACKEND = "django.core.mail.backends.locmem.EmailBackend"
 
@@ -0,0 +1,85 @@
+import io
+import json
+import uuid
+import pytest
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+from asset_management.api.parsers import ORJSONParser
+from asset_management.api.renderers import ORJSONRenderer
+
+
+@pytest.fixture
+def payload():
+    return {
+        "resolution": Decimal("0.001"),
+        "min_range": Decimal("-40.50"),
+        "id": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+        "created_at": datetime(2024, 3, 1, 12, 30, 15, 250000, tzinfo=dt_timezone.utc),
+        "local": datetime(2024, 3, 1, 12, 30, tzinfo=dt_timezone(timedelta(hours=2))),
+        "naive": datetime(2024, 3, 1, 12, 30),
+        "issue_date": date(2024, 3, 1),
+        "at": time(9, 15),
+        "interval": timedelta(days=365),
+        "label": gettext_lazy("Approved"),
+        "unit": "°C\u2028\u2029",
+        "errors": {0: ["Invalid"]},
+        "items": [1, 2.5, None, True],
+    }
+
+
+@pytest.mark.unit
+def test_renders_same_bytes_as_json_renderer(payload):
+    """Test that orjson output matches the stock renderer byte for byte."""
+    assert ORJSONRenderer().render(payload) == JSONRenderer().render(payload)
+
+
+@pytest.mark.unit
+def test_floats_keep_their_values():
+    """Floats may be spelled differently from the stock renderer, not valued."""
+    floats = [1e-05, 1e16, 0.1, -2.5, 1.5e300, 123456789.123]
+    rendered = ORJSONRenderer().render({"values": floats})
+    assert rendered == b'{"values":[0.00001,1e16,0.1,-2.5,1.5e300,123456789.123]}'
+    assert json.loads(rendered) == json.loads(JSONRenderer().render({"values": floats}))
+
+
+@pytest.mark.unit
+def test_wide_integers_use_stock_renderer():
+    data = {"calibration_data": {"counts": [2**64, -(2**70)]}}
+    assert ORJSONRenderer().render(data) == JSONRenderer().render(data)
+
+
+@pytest.mark.unit
+def test_renders_indented_output():
+    rendered = ORJSONRenderer().render(
+        {"name": "Thermometer"}, accepted_media_type="application/json; indent=4"
+    )
+    assert rendered == b'{\n  "name": "Thermometer"\n}'
+    assert ORJSONRenderer().render(None) == b""
+
+
+@pytest.mark.unit
+def test_parses_json():
+    parsed = ORJSONParser().parse(io.BytesIO(b'{"resolution": "0.001", "n": 1}'))
+    assert parsed == {"resolution": "0.001", "n": 1}
+
+    with pytest.raises(ParseError):
+        ORJSONParser().parse(io.BytesIO(b'{"name": '))
+
+
+@pytest.mark.unit
+def test_non_utf8_bodies_use_stock_parser():
+    body = '{"unit": "°C"}'.encode("latin-1")
+    parsed = ORJSONParser().parse(
+        io.BytesIO(body), parser_context={"encoding": "latin-1"}
+    )
+    assert parsed == {"unit": "°C"}
+
+
+@pytest.mark.unit
+def test_configured_as_default():
+    assert api_settings.DEFAULT_RENDERER_CLASSES[0] is ORJSONRenderer
+    assert api_settings.DEFAULT_PARSER_CLASSES[0] is ORJSONParser
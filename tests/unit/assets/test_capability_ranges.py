@@ -0,0 +1,46 @@
+from decimal import Decimal as D
+
+import pytest
+from asset_management.assets.capabilities import merge_ranges
+
+
+@pytest.mark.unit
+def test_merge_ranges_per_unit():
+    sensors = [
+        ("°C", D("-50"), D("0"), D("1.00")),
+        ("°C", D("0"), D("150"), D("0.50")),
+        ("°C", D("300"), D("600"), None),
+        ("Pa", D("0"), D("100"), D("2.00")),
+        ("Pa", D("10"), D("20"), D("0.10")),
+        ("V", None, D("10"), D("0.20")),
+        ("V", None, None, D("0.10")),
+    ]
+
+    # A merged range is only as accurate as its worst part, and its more
+    # accurate parts are kept separately
+    assert merge_ranges(sensors) == [
+        ("Pa", D("0"), D("100"), D("2.00")),
+        ("Pa", D("10"), D("20"), D("0.10")),
+        ("V", None, None, D("0.10")),
+        ("°C", D("-50"), D("150"), D("1.00")),
+        ("°C", D("0"), D("150"), D("0.50")),
+        ("°C", D("300"), D("600"), None),
+    ]
+    assert merge_ranges([]) == []
+
+
+@pytest.mark.unit
+def test_merge_ranges_splits_at_accuracy_changes():
+    sensors = [
+        ("bar", D("0"), D("10"), None),
+        ("bar", D("5"), D("20"), D("0.20")),
+        ("bar", D("15"), D("30"), D("0.05")),
+        ("bar", D("40"), D("40"), D("0.30")),
+    ]
+
+    assert merge_ranges(sensors) == [
+        ("bar", D("0"), D("30"), None),
+        ("bar", D("5"), D("30"), D("0.20")),
+        ("bar", D("15"), D("30"), D("0.05")),
+        ("bar", D("40"), D("40"), D("0.30")),
+    ]
@@ -0,0 +1,35 @@
+import math
+import random
+
+import pytest
+from asset_management.assets.geo import KDTree, chord_to_km, distance_km, to_xyz
+
+
+@pytest.mark.unit
+def test_distance_km():
+    # London to Paris
+    assert distance_km(51.5074, -0.1278, 48.8566, 2.3522) == pytest.approx(
+        343.5, abs=0.5
+    )
+    assert distance_km(10, 20, 10, 20) == 0
+    # Across the antimeridian
+    assert distance_km(0, 179.5, 0, -179.5) == pytest.approx(111.2, abs=0.1)
+
+
+@pytest.mark.unit
+def test_kd_tree_yields_points_nearest_first():
+    rng = random.Random(4)
+    coordinates = [(rng.uniform(-90, 90), rng.uniform(-180, 180)) for _ in range(300)]
+    tree = KDTree([(to_xyz(*point), n) for n, point in enumerate(coordinates)])
+    here = (51.5, -0.1)
+
+    found = [(chord_to_km(chord), n) for chord, n in tree.nearest(to_xyz(*here))]
+
+    expected = sorted(
+        (distance_km(*here, *point), n) for n, point in enumerate(coordinates)
+    )
+    assert [n for _, n in found] == [n for _, n in expected]
+    assert all(
+        math.isclose(a, b, abs_tol=1e-6) for (a, _), (b, _) in zip(found, expected)
+    )
+    assert list(KDTree([]).nearest(to_xyz(*here))) == []